@@ -0,0 +1,60 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterable, Iterator
+import sqlite3
+
+
+@contextmanager
+def transaction(db: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """Run the block inside one explicit transaction.
+
+    If the connection is already inside a transaction the block joins it and
+    leaves the commit to whoever opened it, so bulk writes can be nested.
+
+    The write lock is taken up front with ``BEGIN IMMEDIATE``. A deferred
+    transaction that reads before it writes can't wait for another process's
+    writer to finish, and fails with "database is locked" instead.
+    """
+    if db.in_transaction:
+        yield db
+        return
+
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        yield db
+    except BaseException:
+        db.rollback()
+        raise
+    db.commit()
+
+
+def write_rows(db: sqlite3.Connection, sql: str, rows: Iterable[tuple]) -> int:
+    """Write a batch of rows with a single ``executemany`` in one transaction.
+
+    Args:
+        db: Connection to write to
+        sql: Parameterized statement executed once per row
+        rows: Row tuples matching the statement's placeholders
+
+    Returns:
+        int: Number of rows written
+    """
+    rows = rows if isinstance(rows, list) else list(rows)
+    if not rows:
+        return 0
+    with transaction(db):
+        db.executemany(sql, rows)
+    return len(rows)
+
+
+def timestamp(value: datetime | None) -> str | None:
+    """Format a datetime the way sqlite3's default adapter stores it, in UTC.
+
+    Timestamps are compared and sorted as text, which only orders them by
+    time when they share an offset. Naive datetimes are stored as they are.
+    """
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.isoformat(" ")
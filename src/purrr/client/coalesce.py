@@ -0,0 +1,116 @@
+"""Merge concurrent API calls for the same objects.
+
+``SingleFlight`` lets concurrent callers asking for the same key share one
+in-flight call. ``MicroBatcher`` collects single-key lookups made within a
+short window and answers them all with one call for the whole batch::
+
+    runs = MicroBatcher(read_runs_by_ids, window=0.005, max_batch=200)
+    a, b = await asyncio.gather(runs.get(id_a), runs.get(id_b))  # one call
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+T = TypeVar("T")
+
+
+def _consume_error(task: asyncio.Task) -> None:
+    # Every caller may have been cancelled; don't warn that nobody saw it.
+    if not task.cancelled():
+        task.exception()
+
+
+class SingleFlight:
+    """Share one in-flight call among everyone asking for the same key."""
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """Run ``call``, or wait for the call already running for ``key``.
+
+        A caller that's cancelled stops waiting without cancelling the call
+        for the others.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            task.add_done_callback(_consume_error)
+        return await asyncio.shield(task)
+
+
+class MicroBatcher(Generic[K, V]):
+    """Answer single-key lookups with one call per batch of keys.
+
+    The first lookup starts a ``window`` second timer; every lookup made
+    before it fires joins the batch, up to ``max_batch`` keys, and the batch
+    is then handed to ``fetch_many``. Keys it doesn't return resolve to None.
+    If it raises, every lookup in the batch raises.
+
+    Args:
+        fetch_many: Fetches a batch of keys, returning the values found.
+        window: Seconds to wait for more lookups before fetching.
+        max_batch: Most keys fetched in one call. A full batch is fetched
+            without waiting for the window to end.
+    """
+
+    def __init__(
+        self,
+        fetch_many: Callable[[list[K]], Awaitable[dict[K, V]]],
+        window: float,
+        max_batch: int,
+    ):
+        self.fetch_many = fetch_many
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: dict[K, asyncio.Future] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._batches: set[asyncio.Task] = set()
+
+    async def get(self, key: K) -> V | None:
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[key] = future
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(
+                    self.window, self._flush
+                )
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.ensure_future(self._fetch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _fetch(self, batch: dict[K, asyncio.Future]) -> None:
+        try:
+            found = await self.fetch_many(list(batch))
+        except Exception as e:
+            logging.debug("Batch of %d lookups failed: %s", len(batch), e)
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # Callers that gave up never await it.
+                    future.add_done_callback(lambda f: f.exception())
+            return
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(found.get(key))
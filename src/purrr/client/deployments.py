@@ -1,16 +1,41 @@
-from typing import Sequence
+from typing import Iterable, Sequence
 from uuid import UUID
 import sqlite3
 
 from prefect.client.schemas.responses import DeploymentResponse
 
+from purrr.client.bulk import transaction, write_rows
+
+
+# What the deployments list can be sorted by, and the SQL each one sorts on.
+# Sorting by flow name joins the cached flows.
+SORTABLE_COLUMNS = {
+    "name": "deployments.name",
+    "flow_name": "flows.name",
+    "status": "json_extract(deployments.data, '$.status')",
+    "schedule": "json_extract(deployments.data, '$.schedules')",
+    "tags": "json_extract(deployments.data, '$.tags')",
+}
+
+
+def order_sql(order_by: str | None, descending: bool = False) -> str:
+    """Build an ``ORDER BY`` list for a sortable column, by name by default."""
+    if order_by is None:
+        return "deployments.name, deployments.id"
+    if order_by not in SORTABLE_COLUMNS:
+        raise ValueError(f"Can't sort deployments by {order_by!r}")
+    direction = "DESC" if descending else "ASC"
+    return f"{SORTABLE_COLUMNS[order_by]} {direction}, deployments.id {direction}"
+
 
 class DeploymentCache:
     """Client for managing deployment data in SQLite cache."""
 
-    def __init__(self, db: sqlite3.Connection):
+    def __init__(self, db: sqlite3.Connection, migrate: bool = True):
         self.db = db
-        self._init_table()
+        if migrate:
+            with transaction(self.db):
+                self._init_table()
 
     def _init_table(self):
         """Initialize the deployments table if it doesn't exist."""
@@ -27,7 +52,6 @@ class DeploymentCache:
             )
             """
         )
-        self.db.commit()
 
     def upsert(self, deployments: Sequence[DeploymentResponse]):
         """Insert or update deployment records in the cache.
@@ -38,32 +62,27 @@ class DeploymentCache:
         if not deployments:
             return
 
-        values = [
-            (
-                str(d.id),
-                d.name,
-                str(d.flow_id) if d.flow_id else None,
-                1 if d.paused else 0,  # Convert boolean to integer for SQLite
-                d.work_pool_name,
-                d.work_queue_name,
-                d.json(),
-            )
-            for d in deployments
-        ]
-
-        # Perform upsert operation
-        cursor = self.db.cursor()
-        for value in values:
-            cursor.execute(
-                """
-                INSERT OR REPLACE INTO deployments (
+        write_rows(
+            self.db,
+            """
+            INSERT OR REPLACE INTO deployments (
                 id, name, flow_id, paused, work_pool_name, work_queue_name, data
             )
             VALUES (?, ?, ?, ?, ?, ?, ?)
             """,
-                value,
-            )
-        self.db.commit()
+            [
+                (
+                    str(d.id),
+                    d.name,
+                    str(d.flow_id) if d.flow_id else None,
+                    1 if d.paused else 0,  # Convert boolean to integer for SQLite
+                    d.work_pool_name,
+                    d.work_queue_name,
+                    d.model_dump_json(),
+                )
+                for d in deployments
+            ],
+        )
 
     def read(self, deployment_id: UUID | str) -> DeploymentResponse | None:
         """Read a deployment from the cache by ID.
@@ -86,3 +105,58 @@ class DeploymentCache:
         if result:
             return DeploymentResponse.parse_raw(result[0])
         return None
+
+    def read_many(
+        self, deployment_ids: Iterable[UUID | str]
+    ) -> dict[UUID, DeploymentResponse]:
+        """Read several deployments from the cache in one query.
+
+        Args:
+            deployment_ids: UUIDs of the deployments to retrieve
+
+        Returns:
+            Mapping of deployment ID to DeploymentResponse for the IDs that were cached
+        """
+        ids = list({str(deployment_id) for deployment_id in deployment_ids})
+        if not ids:
+            return {}
+
+        placeholders = ", ".join("?" for _ in ids)
+        result = self.db.execute(
+            f"SELECT data FROM deployments WHERE id IN ({placeholders})", ids
+        ).fetchall()
+
+        deployments = (DeploymentResponse.parse_raw(row[0]) for row in result)
+        return {deployment.id: deployment for deployment in deployments}
+
+    def is_empty(self) -> bool:
+        return self.db.execute("SELECT 1 FROM deployments LIMIT 1").fetchone() is None
+
+    def read_all(
+        self, order_by: str | None = None, descending: bool = False
+    ) -> list[DeploymentResponse]:
+        """Read every cached deployment.
+
+        Args:
+            order_by: A column from ``SORTABLE_COLUMNS``. Defaults to by name.
+            descending: Sort ``order_by`` from high to low.
+        """
+        sql = "SELECT deployments.data FROM deployments"
+        if order_by == "flow_name":
+            sql += " LEFT JOIN flows ON flows.id = deployments.flow_id"
+        sql += f" ORDER BY {order_sql(order_by, descending)}"
+        return [DeploymentResponse.parse_raw(row[0]) for row in self.db.execute(sql)]
+
+    def retain(self, deployment_ids: Iterable[UUID | str]) -> int:
+        """Delete cached deployments that aren't in ``deployment_ids``.
+
+        Returns:
+            int: Number of deployments deleted
+        """
+        keep = {str(deployment_id) for deployment_id in deployment_ids}
+        cached = [row[0] for row in self.db.execute("SELECT id FROM deployments")]
+        return write_rows(
+            self.db,
+            "DELETE FROM deployments WHERE id = ?",
+            [(deployment_id,) for deployment_id in cached if deployment_id not in keep],
+        )
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Callable
+from uuid import UUID
+
+import pendulum
+from prefect.client.schemas.objects import FlowRun
+from prefect.events.clients import PrefectEventSubscriber, get_events_subscriber
+from prefect.events.filters import EventFilter, EventNameFilter
+from prefect.events.schemas.events import Event
+
+if TYPE_CHECKING:
+    from purrr.client.main import CachingPrefectClient
+
+FLOW_RUN_PREFIX = "prefect.flow-run."
+
+# When a subscriber (re)connects, the server replays events from this far back.
+REPLAY_WINDOW = timedelta(minutes=1)
+
+
+def flow_run_id(event: Event) -> UUID | None:
+    """Return the ID of the flow run an event is about, if it's about one."""
+    resource_id = event.resource.id
+    if not resource_id.startswith(FLOW_RUN_PREFIX):
+        return None
+    try:
+        return UUID(resource_id.removeprefix(FLOW_RUN_PREFIX))
+    except ValueError:
+        return None
+
+
+class RunEventsListener:
+    """Keep ``RunsCache`` current from the Prefect flow run event stream.
+
+    State change events are collected for ``debounce`` seconds, then the runs
+    they mention are refetched in one listing and upserted. When the
+    connection drops, the listener reconnects with exponential backoff. If it
+    was away for longer than the server replays on reconnect, it runs a delta
+    sync to pick up whatever was missed.
+    """
+
+    def __init__(
+        self,
+        client: CachingPrefectClient,
+        on_runs_updated: Callable[[list[FlowRun]], Any] | None = None,
+        api_url: str | None = None,
+        debounce: float = 0.25,
+        max_backoff: float = 30.0,
+        replay_window: timedelta = REPLAY_WINDOW,
+    ):
+        self.client = client
+        self.on_runs_updated = on_runs_updated
+        self.api_url = api_url
+        self.debounce = debounce
+        self.max_backoff = max_backoff
+        self.replay_window = replay_window
+        self.connected = asyncio.Event()
+
+        self._pending: set[UUID] = set()
+        self._flush_task: asyncio.Task | None = None
+        self._disconnected_at: datetime | None = None
+
+    def _subscriber(self) -> PrefectEventSubscriber:
+        event_filter = EventFilter(event=EventNameFilter(prefix=[FLOW_RUN_PREFIX]))
+        if self.api_url:
+            return PrefectEventSubscriber(
+                api_url=self.api_url, filter=event_filter, reconnection_attempts=0
+            )
+        return get_events_subscriber(filter=event_filter, reconnection_attempts=0)
+
+    async def run(self) -> None:
+        """Listen for events until cancelled."""
+        backoff = 0.5
+        try:
+            while True:
+                try:
+                    await self._listen()
+                    backoff = 0.5
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logging.warning("Event stream disconnected: %s", e)
+
+                self.connected.clear()
+                if self._disconnected_at is None:
+                    self._disconnected_at = pendulum.now("UTC")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+        finally:
+            if self._flush_task is not None:
+                self._flush_task.cancel()
+
+    async def _listen(self) -> None:
+        async with self._subscriber() as subscriber:
+            self.connected.set()
+            if self._disconnected_at is not None:
+                await self._backfill(self._disconnected_at)
+                self._disconnected_at = None
+
+            async for event in subscriber:
+                run_id = flow_run_id(event)
+                if run_id is not None:
+                    self._queue(run_id)
+
+    async def _backfill(self, disconnected_at: datetime) -> None:
+        """Catch up on changes the server won't replay after a long gap."""
+        if pendulum.now("UTC") - disconnected_at <= self.replay_window:
+            return
+        flow_runs = await self.client.get_runs_changed_since(
+            disconnected_at - self.replay_window
+        )
+        await self._notify(flow_runs)
+
+    def _queue(self, run_id: UUID) -> None:
+        self._pending.add(run_id)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+
+    async def _flush(self) -> None:
+        delay = self.debounce
+        while self._pending:
+            await asyncio.sleep(delay)
+            run_ids, self._pending = self._pending, set()
+            try:
+                flow_runs = await self.client.refresh_runs(run_ids)
+            except Exception as e:
+                logging.error("Failed to refresh runs from events: %s", e)
+                # Keep them for the next flush, backing off while it fails.
+                self._pending |= run_ids
+                delay = min(delay * 2, self.max_backoff)
+                continue
+            delay = self.debounce
+            await self._notify(flow_runs)
+
+    async def _notify(self, flow_runs: list[FlowRun]) -> None:
+        if not flow_runs or self.on_runs_updated is None:
+            return
+        result = self.on_runs_updated(flow_runs)
+        if inspect.isawaitable(result):
+            await result
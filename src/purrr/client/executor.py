@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, TypeVar
+
+from purrr.client.bulk import transaction
+from purrr.settings import settings
+
+if TYPE_CHECKING:
+    from purrr.client.main import SQLiteCache
+
+T = TypeVar("T")
+
+CacheCall = Callable[["SQLiteCache"], T]
+
+_STOP = object()
+
+
+def _resolve(
+    future: asyncio.Future, result: Any = None, error: BaseException | None = None
+) -> None:
+    """Hand a result computed on a worker thread back to its event loop."""
+
+    def settle() -> None:
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    try:
+        future.get_loop().call_soon_threadsafe(settle)
+    except RuntimeError:
+        # The loop that asked has already been closed; nobody is waiting.
+        pass
+
+
+class CacheExecutor:
+    """Run ``SQLiteCache`` calls on worker threads behind an awaitable API.
+
+    Writes go to a single writer thread that owns ``cache`` and its
+    connection, so they're serialized. Whatever writes are queued when the
+    writer wakes up are applied in one transaction, up to ``write_batch`` of
+    them. If any write in a batch fails the batch is rolled back and its
+    writes are replayed one transaction each, so only the failing call sees
+    the error.
+
+    Reads run on a pool of ``readers`` threads, each with its own connection.
+    An in-memory database can't be shared between connections, so for those
+    (or with ``readers=0``) reads are queued on the writer thread as well.
+
+    Calls are plain functions taking the thread's ``SQLiteCache``::
+
+        runs = await executor.read(lambda cache: cache.runs.read_all())
+        await executor.write(lambda cache: cache.runs.upsert(runs))
+    """
+
+    def __init__(
+        self,
+        cache: SQLiteCache,
+        readers: int | None = None,
+        write_batch: int | None = None,
+    ):
+        self.cache = cache
+        self.readers = settings.cache_readers if readers is None else readers
+        self.write_batch = write_batch or settings.cache_write_batch
+
+        self._writes: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer: threading.Thread | None = None
+        self._reader_pool: ThreadPoolExecutor | None = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def shares_connection(self) -> bool:
+        """Whether reads have to go through the writer's connection."""
+        return self.readers < 1 or self.cache.db_path == ":memory:"
+
+    async def write(self, call: CacheCall[T]) -> T:
+        """Queue ``call`` on the writer thread and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        self._start_writer()
+        self._writes.put((call, future))
+        return await future
+
+    async def read(self, call: CacheCall[T]) -> T:
+        """Run ``call`` on a reader connection and wait for its result."""
+        if self.shares_connection:
+            return await self.write(call)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._start_readers(), self._read, call)
+
+    def close(self) -> None:
+        """Finish queued writes and stop the worker threads."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+            readers, self._reader_pool = self._reader_pool, None
+        if writer is not None:
+            self._writes.put(_STOP)
+            writer.join()
+        if readers is not None:
+            readers.shutdown(wait=True)
+
+    def _start_writer(self) -> None:
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_loop, name="purrr-cache-writer", daemon=True
+                )
+                self._writer.start()
+
+    def _start_readers(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._reader_pool is None:
+                self._reader_pool = ThreadPoolExecutor(
+                    max_workers=self.readers, thread_name_prefix="purrr-cache-reader"
+                )
+            return self._reader_pool
+
+    def _read(self, call: CacheCall[T]) -> T:
+        reader = getattr(self._local, "cache", None)
+        if reader is None:
+            reader = self._local.cache = self.cache.reader()
+        return call(reader)
+
+    def _write_loop(self) -> None:
+        while True:
+            batch = [self._writes.get()]
+            while len(batch) < self.write_batch:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(job is _STOP for job in batch)
+            jobs = [job for job in batch if job is not _STOP]
+            if jobs:
+                self._run_batch(jobs)
+            if stop:
+                return
+
+    def _run_batch(self, jobs: list[tuple[CacheCall, asyncio.Future]]) -> None:
+        results = []
+        try:
+            with transaction(self.cache.db):
+                for call, _ in jobs:
+                    results.append(call(self.cache))
+        except Exception as e:
+            if len(jobs) == 1:
+                _resolve(jobs[0][1], error=e)
+            else:
+                for job in jobs:
+                    self._run_one(*job)
+            return
+
+        for (_, future), result in zip(jobs, results):
+            _resolve(future, result)
+
+    def _run_one(self, call: CacheCall, future: asyncio.Future) -> None:
+        try:
+            with transaction(self.cache.db):
+                result = call(self.cache)
+        except Exception as e:
+            _resolve(future, error=e)
+        else:
+            _resolve(future, result)
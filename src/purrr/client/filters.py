@@ -0,0 +1,275 @@
+"""The filter language typed into the runs screen.
+
+A filter is one or more comparisons joined with ``and`` / ``or`` and grouped
+with parentheses::
+
+    state = Failed and created > -2h
+    work_pool in (default, gpu) or name ~ nightly
+    updated between 2024-01-01 and 2024-02-01
+    tag = prod and state_type != COMPLETED
+
+Comparisons are ``=``, ``!=``, ``<``, ``<=``, ``>``, ``>=``, ``~`` (contains),
+``in (...)``, ``not in (...)`` and ``between ... and ...``. Values are bare
+words or quoted strings. On time fields, a value like ``-2h`` means that long
+before now, in seconds (``s``), minutes (``m``), hours (``h``), days (``d``) or
+weeks (``w``).
+
+Filters compile to a parameterized ``WHERE`` clause over ``flow_runs``; user
+text never ends up in the SQL itself, and unknown fields are rejected.
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+from purrr.client.bulk import timestamp
+
+STATE_TYPE_SQL = (
+    "COALESCE(json_extract(raw_json, '$.state_type'), "
+    "json_extract(raw_json, '$.state.type'))"
+)
+
+TAGS_SQL = "EXISTS (SELECT 1 FROM json_each(flow_runs.raw_json, '$.tags') WHERE {})"
+
+
+class Field(NamedTuple):
+    sql: str
+    kind: str = "text"
+
+
+FIELDS = {
+    "id": Field("id"),
+    "name": Field("name"),
+    "state": Field("state_name"),
+    "state_name": Field("state_name"),
+    "state_type": Field(STATE_TYPE_SQL, "state_type"),
+    "created": Field("created", "time"),
+    "updated": Field("updated", "time"),
+    "deployment": Field("deployment_id"),
+    "deployment_id": Field("deployment_id"),
+    "flow": Field("flow_id"),
+    "flow_id": Field("flow_id"),
+    "work_pool": Field("work_pool_name"),
+    "work_pool_name": Field("work_pool_name"),
+    "tag": Field("value", "tag"),
+}
+
+COMPARISONS = {"=", "!=", "<", "<=", ">", ">="}
+
+RELATIVE_TIME = re.compile(r"^-(\d+(?:\.\d+)?)([smhdw])$")
+UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+TOKEN = re.compile(
+    r"""
+    \s*(?:
+        (?P<string>'(?:[^']|'')*'|"(?:[^"]|"")*")
+      | (?P<op>!=|>=|<=|=|<|>|~)
+      | (?P<punct>[(),])
+      | (?P<word>[^\s(),'"=!<>~]+)
+    )
+    """,
+    re.VERBOSE,
+)
+
+
+class FilterError(ValueError):
+    """A filter that can't be compiled, with a message fit to show the user."""
+
+
+class CompiledFilter(NamedTuple):
+    where: str
+    params: list
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+
+    @property
+    def keyword(self) -> str | None:
+        return self.text.lower() if self.kind == "word" else None
+
+
+def tokenize(text: str) -> list[Token]:
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            raise FilterError(f"Unexpected character at {text[position:]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "string":
+            quote = value[0]
+            value = value[1:-1].replace(quote * 2, quote)
+        tokens.append(Token(kind, value))
+        position = match.end()
+    return tokens
+
+
+def compile_filter(text: str, now: datetime | None = None) -> CompiledFilter:
+    """Compile a filter into a ``WHERE`` clause and its parameters.
+
+    Args:
+        text: The filter as typed. Blank text matches every run.
+        now: The time relative values count back from. Defaults to now.
+
+    Raises:
+        FilterError: The filter is malformed or names an unknown field.
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        return CompiledFilter("1 = 1", [])
+    parser = _Parser(tokens, now or datetime.now(timezone.utc))
+    where = parser.parse()
+    return CompiledFilter(where, parser.params)
+
+
+class _Parser:
+    def __init__(self, tokens: list[Token], now: datetime):
+        self.tokens = tokens
+        self.position = 0
+        self.now = now
+        self.params: list = []
+
+    def parse(self) -> str:
+        where = self.disjunction()
+        if self.peek() is not None:
+            raise FilterError(f"Unexpected {self.peek().text!r}")
+        return where
+
+    def peek(self) -> Token | None:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def next(self, expected: str) -> Token:
+        token = self.peek()
+        if token is None:
+            raise FilterError(f"Expected {expected} at the end of the filter")
+        self.position += 1
+        return token
+
+    def expect(self, text: str) -> None:
+        token = self.next(repr(text))
+        if token.text.lower() != text:
+            raise FilterError(f"Expected {text!r} but found {token.text!r}")
+
+    def accept_keyword(self, keyword: str) -> bool:
+        token = self.peek()
+        if token is not None and token.keyword == keyword:
+            self.position += 1
+            return True
+        return False
+
+    def disjunction(self) -> str:
+        clauses = [self.conjunction()]
+        while self.accept_keyword("or"):
+            clauses.append(self.conjunction())
+        return clauses[0] if len(clauses) == 1 else f"({' OR '.join(clauses)})"
+
+    def conjunction(self) -> str:
+        clauses = [self.term()]
+        while self.accept_keyword("and"):
+            clauses.append(self.term())
+        return clauses[0] if len(clauses) == 1 else " AND ".join(clauses)
+
+    def term(self) -> str:
+        token = self.peek()
+        if token is not None and token.text == "(":
+            self.position += 1
+            clause = self.disjunction()
+            self.expect(")")
+            return f"({clause})"
+        return self.comparison()
+
+    def comparison(self) -> str:
+        token = self.next("a field name")
+        if token.kind != "word":
+            raise FilterError(f"Expected a field name but found {token.text!r}")
+        field = FIELDS.get(token.text.lower())
+        if field is None:
+            known = ", ".join(sorted(FIELDS))
+            raise FilterError(f"Unknown field {token.text!r}. Known fields: {known}")
+
+        if self.accept_keyword("between"):
+            low = self.value(field)
+            self.expect("and")
+            high = self.value(field)
+            return self.clause(field, f"{field.sql} BETWEEN ? AND ?", [low, high])
+
+        negate = self.accept_keyword("not")
+        if negate or self.accept_keyword("in"):
+            if negate:
+                self.expect("in")
+            values = self.value_list(field)
+            placeholders = ", ".join("?" for _ in values)
+            if field.kind == "tag":
+                # A run is "not in" tags when none of its tags match.
+                clause = self.clause(field, f"value IN ({placeholders})", values)
+                return f"NOT {clause}" if negate else clause
+            operator = "NOT IN" if negate else "IN"
+            return self.clause(
+                field, f"{field.sql} {operator} ({placeholders})", values
+            )
+
+        operator = self.next("a comparison")
+        if operator.text == "~":
+            value = self.value(field)
+            escaped = (
+                value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            )
+            return self.clause(
+                field, f"{field.sql} LIKE ? ESCAPE '\\'", [f"%{escaped}%"]
+            )
+        if operator.kind != "op" or operator.text not in COMPARISONS:
+            raise FilterError(f"Expected a comparison but found {operator.text!r}")
+        if field.kind == "tag" and operator.text not in ("=", "!="):
+            raise FilterError("Tags can only be compared with =, != or in")
+        value = self.value(field)
+        if field.kind == "tag" and operator.text == "!=":
+            return f"NOT {self.clause(field, 'value = ?', [value])}"
+        return self.clause(field, f"{field.sql} {operator.text} ?", [value])
+
+    def clause(self, field: Field, sql: str, params: list) -> str:
+        self.params.extend(params)
+        if field.kind == "tag":
+            return TAGS_SQL.format(sql)
+        return sql
+
+    def value_list(self, field: Field) -> list:
+        self.expect("(")
+        values = [self.value(field)]
+        while self.peek() is not None and self.peek().text == ",":
+            self.position += 1
+            values.append(self.value(field))
+        self.expect(")")
+        return values
+
+    def value(self, field: Field) -> str:
+        token = self.next("a value")
+        if token.kind not in ("word", "string"):
+            raise FilterError(f"Expected a value but found {token.text!r}")
+        if field.kind == "time":
+            return self.time_value(token.text)
+        if field.kind == "state_type":
+            return token.text.upper()
+        return token.text
+
+    def time_value(self, text: str) -> str:
+        match = RELATIVE_TIME.match(text)
+        if match:
+            amount, unit = match.groups()
+            ago = timedelta(**{UNITS[unit]: float(amount)})
+            return timestamp(self.now - ago)
+        try:
+            when = datetime.fromisoformat(text)
+        except ValueError:
+            raise FilterError(
+                f"{text!r} isn't a time. Use an ISO date like 2024-01-31 "
+                "or a relative time like -2h"
+            ) from None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return timestamp(when.astimezone(timezone.utc))
@@ -0,0 +1,182 @@
+import json
+import sqlite3
+from typing import Iterable, NamedTuple
+from uuid import UUID
+
+from prefect.client.schemas.objects import Flow
+
+from purrr.client.bulk import timestamp, transaction, write_rows
+
+
+class FlowSummary(NamedTuple):
+    """A cached flow with rollups of its cached runs, as the flows list shows it."""
+
+    id: str
+    name: str
+    created: str | None
+    tags: list[str]
+    run_count: int
+    last_run_state: str | None
+    last_run_created: str | None
+
+
+# One pass over flow_runs per flow: SQLite takes the bare state_name from the
+# row holding MAX(created), so the latest run's state comes with the count.
+# {runs} narrows the runs rolled up, {flows} the flows listed.
+SUMMARY_SQL = """
+    SELECT
+        flows.id,
+        flows.name,
+        CAST(flows.created AS TEXT),
+        flows.tags,
+        COALESCE(runs.run_count, 0),
+        runs.state_name,
+        CAST(runs.last_created AS TEXT)
+    FROM flows
+    LEFT JOIN (
+        SELECT flow_id, COUNT(*) AS run_count, MAX(created) AS last_created, state_name
+        FROM flow_runs
+        {runs}
+        GROUP BY flow_id
+    ) AS runs ON runs.flow_id = flows.id
+    {flows}
+"""
+
+# What the flows list can be sorted by, and the SQL each one sorts on.
+SORTABLE_COLUMNS = {
+    "id": "flows.id",
+    "name": "flows.name",
+    "created": "flows.created",
+    "tags": "flows.tags",
+    "run_count": "COALESCE(runs.run_count, 0)",
+    "last_run_state": "runs.state_name",
+}
+
+
+def order_sql(order_by: str | None, descending: bool = False) -> str:
+    """Build an ``ORDER BY`` list for a sortable column, by name by default."""
+    if order_by is None:
+        return "flows.name, flows.id"
+    if order_by not in SORTABLE_COLUMNS:
+        raise ValueError(f"Can't sort flows by {order_by!r}")
+    direction = "DESC" if descending else "ASC"
+    return f"{SORTABLE_COLUMNS[order_by]} {direction}, flows.id {direction}"
+
+
+class FlowsCache:
+    """Client for managing flow data in SQLite cache."""
+
+    def __init__(self, db: sqlite3.Connection, migrate: bool = True):
+        self.db = db
+        if migrate:
+            with transaction(self.db):
+                self._init_table()
+
+    def _init_table(self):
+        """Initialize the flows table if it doesn't exist."""
+        self.db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS flows (
+                id TEXT PRIMARY KEY,
+                name TEXT,
+                created TIMESTAMP,
+                updated TIMESTAMP,
+                tags JSON,
+                data JSON
+            )
+            """
+        )
+
+    def upsert(self, flows: Iterable[Flow]) -> None:
+        """Insert or update flow records in the cache."""
+        write_rows(
+            self.db,
+            """
+            INSERT OR REPLACE INTO flows (id, name, created, updated, tags, data)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    str(flow.id),
+                    flow.name,
+                    timestamp(flow.created),
+                    timestamp(flow.updated),
+                    json.dumps(flow.tags or []),
+                    flow.model_dump_json(),
+                )
+                for flow in flows
+            ],
+        )
+
+    def read(self, flow_id: UUID | str) -> Flow | None:
+        result = self.db.execute(
+            "SELECT data FROM flows WHERE id = ?", [str(flow_id)]
+        ).fetchone()
+        if result:
+            return Flow.model_validate_json(result[0])
+        return None
+
+    def read_all(self) -> list[Flow]:
+        """Read every cached flow, ordered by name."""
+        result = self.db.execute("SELECT data FROM flows ORDER BY name, id")
+        return [Flow.model_validate_json(row[0]) for row in result]
+
+    def names(self, flow_ids: Iterable[UUID | str]) -> dict[UUID, str]:
+        """Look up the names of cached flows, skipping ones that aren't cached."""
+        ids = list({str(flow_id) for flow_id in flow_ids})
+        if not ids:
+            return {}
+        placeholders = ", ".join("?" for _ in ids)
+        result = self.db.execute(
+            f"SELECT id, name FROM flows WHERE id IN ({placeholders})", ids
+        )
+        return {UUID(row[0]): row[1] for row in result}
+
+    def summaries(
+        self, order_by: str | None = None, descending: bool = False
+    ) -> list[FlowSummary]:
+        """Read every cached flow with its run count and latest run.
+
+        The rollups only count runs in the cache.
+
+        Args:
+            order_by: A column from ``SORTABLE_COLUMNS``. Defaults to by name.
+            descending: Sort ``order_by`` from high to low.
+        """
+        sql = SUMMARY_SQL.format(
+            runs="", flows=f"ORDER BY {order_sql(order_by, descending)}"
+        )
+        return self._read_summaries(sql, [])
+
+    def summary(self, flow_id: UUID | str) -> FlowSummary | None:
+        """Read one cached flow with its run rollups."""
+        sql = SUMMARY_SQL.format(runs="WHERE flow_id = ?", flows="WHERE flows.id = ?")
+        summaries = self._read_summaries(sql, [str(flow_id)] * 2)
+        return summaries[0] if summaries else None
+
+    def _read_summaries(self, sql: str, params: list) -> list[FlowSummary]:
+        return [
+            FlowSummary(
+                id, name, created, json.loads(tags or "[]"), count, state, last_created
+            )
+            for id, name, created, tags, count, state, last_created in self.db.execute(
+                sql, params
+            )
+        ]
+
+    def is_empty(self) -> bool:
+        return self.db.execute("SELECT 1 FROM flows LIMIT 1").fetchone() is None
+
+    def retain(self, flow_ids: Iterable[UUID | str]) -> int:
+        """Delete cached flows that aren't in ``flow_ids``.
+
+        Returns:
+            int: Number of flows deleted
+        """
+        keep = {str(flow_id) for flow_id in flow_ids}
+        cached = [row[0] for row in self.db.execute("SELECT id FROM flows")]
+        return write_rows(
+            self.db,
+            "DELETE FROM flows WHERE id = ?",
+            [(flow_id,) for flow_id in cached if flow_id not in keep],
+        )
@@ -3,13 +3,43 @@ from datetime import datetime
 from prefect.client.schemas.objects import Log
 from uuid import UUID
 
+from purrr.client.bulk import timestamp, transaction, write_rows
+
+COLUMNS = [
+    "id",
+    "name",
+    "level",
+    "message",
+    "timestamp",
+    "flow_run_id",
+    "task_run_id",
+]
+
+# The timestamp is cast so connections that parse declared types still hand
+# back the stored text, offset included.
+SELECT_COLUMNS = ", ".join(
+    f"CAST({column} AS TEXT)" if column == "timestamp" else column for column in COLUMNS
+)
+
+# Where a reader left off in a run's logs: the (timestamp, rowid) of the last
+# log it read.
+LogCursor = tuple[str, int]
+
 
 class LogsCache:
-    def __init__(self, db: sqlite3.Connection):
+    def __init__(self, db: sqlite3.Connection, migrate: bool = True):
         self.db = db
-        self._create_table()
+        if migrate:
+            with transaction(self.db):
+                self._create_table()
 
     def _create_table(self):
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(logs)")}
+        if columns and "id" not in columns:
+            # Logs cached before they were keyed on their Prefect ID can't be
+            # deduplicated, so drop them and let them be fetched again.
+            self.db.execute("DROP TABLE logs")
+
         self.db.execute("""
             CREATE TABLE IF NOT EXISTS logs (
                 name TEXT,
@@ -18,63 +48,106 @@ class LogsCache:
                 timestamp TIMESTAMP,
                 flow_run_id TEXT DEFAULT NULL,
                 task_run_id TEXT DEFAULT NULL,
-                worker_id TEXT DEFAULT NULL
+                worker_id TEXT DEFAULT NULL,
+                id TEXT PRIMARY KEY
             )
         """)
-        self.db.commit()
+        self.db.execute("""
+            CREATE INDEX IF NOT EXISTS ix_logs_flow_run_id_timestamp
+            ON logs (flow_run_id, timestamp)
+        """)
+        self.db.execute("""
+            CREATE INDEX IF NOT EXISTS ix_logs_task_run_id_timestamp
+            ON logs (task_run_id, timestamp)
+        """)
 
     def upsert(self, logs: list[Log]):
-        for log in logs:
-            # Delete existing logs with same timestamp and run IDs
-            delete_query = """
-                DELETE FROM logs
-                WHERE timestamp = ?
-                AND (
-                    (flow_run_id = ? OR (flow_run_id IS NULL AND ? IS NULL))
-                    AND (task_run_id = ? OR (task_run_id IS NULL AND ? IS NULL))
-                )
+        # Logs never change once written, so a log that's already cached is
+        # left alone.
+        write_rows(
+            self.db,
             """
-            self.db.execute(
-                delete_query,
-                [
-                    datetime.fromisoformat(str(log.timestamp)),
-                    str(log.flow_run_id) if log.flow_run_id else None,
-                    str(log.flow_run_id) if log.flow_run_id else None,
-                    str(log.task_run_id) if log.task_run_id else None,
-                    str(log.task_run_id) if log.task_run_id else None,
-                ],
-            )
-
-            # Insert the new log
-            self.db.execute(
-                """
-                INSERT INTO logs
-                (name, level, message, timestamp, flow_run_id, task_run_id)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                [
+            INSERT OR IGNORE INTO logs
+            (name, level, message, timestamp, flow_run_id, task_run_id, id)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
                     log.name,
                     log.level,
                     log.message,
-                    datetime.fromisoformat(str(log.timestamp)),
+                    timestamp(log.timestamp),
                     str(log.flow_run_id) if log.flow_run_id else None,
                     str(log.task_run_id) if log.task_run_id else None,
-                ],
-            )
-        self.db.commit()
+                    str(log.id),
+                )
+                for log in logs
+            ],
+        )
+
+    def flow_run(
+        self, flow_run_id: UUID | str, after: LogCursor | None = None
+    ) -> list[dict]:
+        """Read a flow run's cached logs, oldest first, optionally after ``after``.
 
-    def flow_run(self, flow_run_id: UUID | str) -> list[dict]:
-        cursor = self.db.cursor()
-        result = cursor.execute(
-            "SELECT * FROM logs WHERE flow_run_id = ? ORDER BY timestamp",
-            [str(flow_run_id)],
+        Each log also carries its ``rowid``, which with its timestamp makes
+        the cursor for reading on from it.
+        """
+        return self._read("flow_run_id", flow_run_id, after)
+
+    def task_run(self, task_run_id: UUID | str) -> list[dict]:
+        return self._read("task_run_id", task_run_id)
+
+    def latest_timestamp(
+        self,
+        flow_run_id: UUID | str | None = None,
+        task_run_id: UUID | str | None = None,
+    ) -> datetime | None:
+        """Return the timestamp of the newest cached log for a flow or task run."""
+        column, run_id = _run_column(flow_run_id, task_run_id)
+        result = self.db.execute(
+            f"SELECT MAX(timestamp) FROM logs WHERE {column} = ?", [str(run_id)]
+        ).fetchone()
+        if result is None or result[0] is None:
+            return None
+        return datetime.fromisoformat(result[0])
+
+    def ids_at(
+        self,
+        when: datetime,
+        flow_run_id: UUID | str | None = None,
+        task_run_id: UUID | str | None = None,
+    ) -> set[str]:
+        """Return the IDs of a run's cached logs stamped exactly ``when``."""
+        column, run_id = _run_column(flow_run_id, task_run_id)
+        result = self.db.execute(
+            f"SELECT id FROM logs WHERE {column} = ? AND timestamp = ?",
+            [str(run_id), timestamp(when)],
         ).fetchall()
-        columns = [
-            "name",
-            "level",
-            "message",
-            "timestamp",
-            "flow_run_id",
-            "task_run_id",
-        ]
-        return [dict(zip(columns, row)) for row in result]
+        return {row[0] for row in result}
+
+    def _read(
+        self, column: str, run_id: UUID | str, after: LogCursor | None = None
+    ) -> list[dict]:
+        sql = f"SELECT {SELECT_COLUMNS}, rowid FROM logs WHERE {column} = ?"
+        params = [str(run_id)]
+        if after is not None:
+            sql += " AND (timestamp > ? OR (timestamp = ? AND rowid > ?))"
+            params += [after[0], after[0], after[1]]
+        # Logs stamped the same time keep the order they were cached in, and
+        # a cursor never skips or repeats them.
+        sql += " ORDER BY timestamp, rowid"
+        result = self.db.execute(sql, params).fetchall()
+        return [dict(zip([*COLUMNS, "rowid"], row)) for row in result]
+
+
+def _run_column(
+    flow_run_id: UUID | str | None, task_run_id: UUID | str | None
+) -> tuple[str, UUID | str]:
+    if flow_run_id and task_run_id:
+        raise ValueError("Cannot filter by both flow_run_id and task_run_id")
+    if flow_run_id:
+        return "flow_run_id", flow_run_id
+    if task_run_id:
+        return "task_run_id", task_run_id
+    raise ValueError("Either flow_run_id or task_run_id is required")
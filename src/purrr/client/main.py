@@ -1,110 +1,553 @@
+from collections import deque
+from contextlib import aclosing
+from typing import AsyncIterator, Awaitable, Callable, Iterable, TypeVar
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timedelta
+import asyncio
+import importlib.util
+import logging
 import sqlite3
 
+import httpx
 from prefect import get_client
+from prefect.client.orchestration import PrefectClient
 from prefect.client.schemas.filters import (
+    DeploymentFilter,
+    DeploymentFilterId,
+    FlowFilter,
+    FlowFilterId,
+    FlowRunFilterExpectedStartTime,
+    FlowRunFilterId,
+    FlowRunFilterStartTime,
     FlowRunFilterState,
     FlowRunFilterStateType,
     FlowRunFilter,
     LogFilterFlowRunId,
     LogFilterTaskRunId,
+    LogFilterTimestamp,
     LogFilter,
+    Operator,
 )
 from prefect.client.schemas.objects import (
-    TERMINAL_STATES,
+    Flow,
     FlowRun,
+    Log,
     StateType as FlowRunStates,
 )
 from prefect.client.schemas.responses import DeploymentResponse
-from prefect.client.schemas.sorting import FlowRunSort
+from prefect.client.schemas.sorting import (
+    DeploymentSort,
+    FlowRunSort,
+    FlowSort,
+    LogSort,
+)
 from prefect.exceptions import ObjectNotFound
 
-from purrr.client.logs import LogsCache
-from purrr.client.runs import RunsCache
+from purrr.client.bulk import timestamp, transaction
+from purrr.client.coalesce import MicroBatcher, SingleFlight
+from purrr.client.executor import CacheExecutor
+from purrr.client.flows import FlowsCache, FlowSummary
+from purrr.client.logs import LogCursor, LogsCache
+from purrr.client.policy import CacheEntries, CachePolicy, Decision
+from purrr.client.runs import RunRow, RunsCache, is_terminal
 from purrr.client.deployments import DeploymentCache
+from purrr.settings import settings
+
+# How far before the high-water mark a delta sync starts looking, to cover
+# runs that were committed on the server while the previous sync was reading.
+DELTA_SYNC_OVERLAP = timedelta(minutes=1)
+
+T = TypeVar("T")
+
+# Called with each page of runs as it's cached, so views can merge it in.
+OnPage = Callable[[list[FlowRun]], None]
+
+
+async def paginate(
+    fetch_page: Callable[[int, int], Awaitable[list[T]]],
+    page_size: int | None = None,
+    concurrency: int | None = None,
+) -> AsyncIterator[list[T]]:
+    """Yield pages from an offset-paginated API call, fetching several at once.
+
+    The first page is requested on its own, so small listings cost a single
+    call. Every full page then doubles the number of requests kept in flight,
+    up to ``concurrency``. Pages are yielded in offset order, and iteration
+    stops at the first page shorter than ``page_size``; requests already sent
+    past that point are cancelled.
+
+    Args:
+        fetch_page: Called as ``fetch_page(offset, limit)`` to read one page.
+        page_size: Rows per page. Defaults to ``settings.page_size``.
+        concurrency: Maximum pages in flight. Defaults to ``settings.page_concurrency``.
+
+    Yields:
+        list[T]: Each non-empty page, in order.
+    """
+    page_size = page_size or settings.page_size
+    concurrency = max(1, concurrency or settings.page_concurrency)
+
+    in_flight: deque[asyncio.Future[list[T]]] = deque()
+    next_offset = 0
+
+    def request_next_page() -> None:
+        nonlocal next_offset
+        in_flight.append(asyncio.ensure_future(fetch_page(next_offset, page_size)))
+        next_offset += page_size
+
+    window = 1
+    request_next_page()
+
+    try:
+        while in_flight:
+            page = await in_flight.popleft()
+            if len(page) < page_size:
+                if page:
+                    yield page
+                return
+            window = min(window * 2, concurrency)
+            while len(in_flight) < window:
+                request_next_page()
+            yield page
+    finally:
+        for request in in_flight:
+            request.cancel()
+        await asyncio.gather(*in_flight, return_exceptions=True)
+
+
+async def _single_page(page: Awaitable[list[T]]) -> AsyncIterator[list[T]]:
+    yield await page
+
+
+def httpx_settings() -> dict:
+    """Connection pool settings for the Prefect API's httpx client."""
+    return {
+        "limits": httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+        # httpx only speaks HTTP/2 with the optional h2 package.
+        "http2": settings.http2 and importlib.util.find_spec("h2") is not None,
+    }
 
 
 class CachingPrefectClient:
-    def __init__(self, db_name: str = "test.db"):
-        self.client = get_client()
+    """The Prefect API behind a SQLite cache, shared by the whole app.
+
+    Open it once with ``open`` so the API client keeps its connections alive
+    between requests, and ``aclose`` it on the way out.
+    """
+
+    def __init__(
+        self,
+        db_name: str = "test.db",
+        policy: CachePolicy | None = None,
+        client: PrefectClient | None = None,
+    ):
+        self.client = client or get_client(httpx_settings=httpx_settings())
+        self._opened = False
         self.cache = SQLiteCache(db_name)
+        self.db = CacheExecutor(self.cache)
+        self.policy = policy or CachePolicy()
+        self._refreshing: dict[tuple[str, str], asyncio.Task] = {}
+        # Concurrent lookups of one object share a request, and lookups of
+        # different objects made together are merged into one listing.
+        self._flights = SingleFlight()
+        self._run_batcher: MicroBatcher[UUID, FlowRun] = MicroBatcher(
+            self._read_runs_by_ids, settings.batch_window, settings.page_size
+        )
+        self._deployment_batcher: MicroBatcher[UUID, DeploymentResponse] = MicroBatcher(
+            self._read_and_cache_deployments,
+            settings.batch_window,
+            settings.page_size,
+        )
+
+    async def open(self) -> None:
+        """Start the API client's connection pool."""
+        if not self._opened and isinstance(self.client, PrefectClient):
+            await self.client.__aenter__()
+            self._opened = True
+
+    async def aclose(self) -> None:
+        """Close the API client's connections, then the cache."""
+        if self._opened:
+            self._opened = False
+            await self.client.__aexit__(None, None, None)
+        self.close()
+
+    def close(self) -> None:
+        """Flush pending cache writes and stop the cache threads."""
+        if self.policy.stats:
+            logging.info("Cache decisions: %s", self.policy.report())
+        self.db.close()
+
+    def _refresh_in_background(
+        self, entity: str, key: object, fetch: Callable[[], Awaitable]
+    ) -> None:
+        """Fetch a stale object again without making the caller wait for it."""
+        task_key = (entity, str(key))
+        if task_key in self._refreshing:
+            return
+
+        def done(task: asyncio.Task) -> None:
+            self._refreshing.pop(task_key, None)
+            if task.cancelled():
+                return
+            error = task.exception()
+            if error is not None and not isinstance(error, ObjectNotFound):
+                logging.warning("Refreshing %s %s failed: %s", entity, key, error)
+
+        task = asyncio.ensure_future(fetch())
+        task.add_done_callback(done)
+        self._refreshing[task_key] = task
 
     async def get_runs(
         self,
         sort: FlowRunSort = FlowRunSort.START_TIME_DESC,
         state_types: list[FlowRunStates] | None = None,
+        full_refresh: bool = False,
+        on_page: OnPage | None = None,
     ) -> list[FlowRun]:
         """Get all flow runs from Prefect.
 
+        The first call for a given set of state types pages through every
+        matching run. Later calls only ask the API for runs that changed since
+        the high-water mark stored for that filter, merge them into the cache
+        and answer from it. Every ``runs_full_sync_interval`` seconds a call
+        pages through every matching run again, which also drops cached runs
+        deleted on the server when no state types are given.
+
         Args:
             sort (FlowRunSort, optional): Sort order. Defaults to FlowRunSort.START_TIME_DESC.
             state_types (list[FlowRunStates] | None, optional): State types to filter by. Defaults to None.
+            full_refresh (bool, optional): Ignore the high-water mark and resync everything. Defaults to False.
+            on_page (OnPage | None, optional): Called with each page of runs once it's cached. Defaults to None.
 
         Returns:
             list[FlowRun]: List of flow runs.
         """
-        try:
-            args = {}
-            args["sort"] = sort
-            args["offset"] = 0
+        flow_runs, full = await self._sync_runs(
+            sort, state_types, full_refresh, on_page
+        )
+        if full:
+            return flow_runs
+        return await self.db.read(
+            lambda cache: cache.runs.read_all(state_types=state_types, sort=sort)
+        )
 
-            if state_types:
-                args["flow_run_filter"] = FlowRunFilter(
-                    state=FlowRunFilterState(
-                        type=FlowRunFilterStateType(any_=state_types)
-                    )
-                )
-            else:
-                args["flow_run_filter"] = None
+    async def sync_runs(
+        self,
+        state_types: list[FlowRunStates] | None = None,
+        full_refresh: bool = False,
+        on_page: OnPage | None = None,
+    ) -> list[FlowRun]:
+        """Bring the cached flow runs up to date with the API.
 
-            all_flow_runs = []
+        Syncs like ``get_runs``, including its periodic full sync, but doesn't
+        read the cache back, so callers that only keep the cache current don't
+        pay for parsing every run.
 
-            while True:
-                flow_runs: list[FlowRun] = await self.client.read_flow_runs(**args)
-                if not flow_runs:
-                    break
+        Returns:
+            list[FlowRun]: The runs fetched.
+        """
+        flow_runs, _ = await self._sync_runs(
+            FlowRunSort.START_TIME_DESC, state_types, full_refresh, on_page
+        )
+        return flow_runs
 
-                self.cache.runs.upsert(flow_runs)
+    async def _sync_runs(
+        self,
+        sort: FlowRunSort,
+        state_types: list[FlowRunStates] | None,
+        full_refresh: bool,
+        on_page: OnPage | None,
+    ) -> tuple[list[FlowRun], bool]:
+        """Fetch and cache changed runs, returning them and whether it was a full sync."""
+        sync_key = self._runs_sync_key(state_types)
+        full_sync_key = f"{sync_key}:full"
+        try:
+            since = None
+            if not full_refresh and not await self._full_sync_due(full_sync_key):
+                since = await self._delta_since(sync_key)
+            if since is None:
+                flow_runs = await self._fetch_all_runs(sort, state_types, on_page)
+                if not state_types:
+                    # Anything the API didn't list was deleted on the server.
+                    ids = [flow_run.id for flow_run in flow_runs]
+                    await self.db.write(lambda cache: cache.runs.retain(ids))
+                await self.db.write(
+                    lambda cache: cache.log_execution(full_sync_key, True)
+                )
+            else:
+                flow_runs = await self.get_runs_changed_since(since, on_page)
 
-                all_flow_runs.extend(flow_runs)
-                args["offset"] += len(flow_runs)
+            updated = [flow_run.updated for flow_run in flow_runs if flow_run.updated]
+            if updated:
+                await self.db.write(
+                    lambda cache: cache.set_high_water_mark(sync_key, max(updated))
+                )
 
-            self.cache.log_execution("get_runs", True)
-            return all_flow_runs
+            await self.db.write(lambda cache: cache.log_execution("get_runs", True))
         except Exception as e:
-            self.cache.log_execution("get_runs", False)
+            await self.db.write(lambda cache: cache.log_execution("get_runs", False))
             raise e
+        return flow_runs, since is None
+
+    @staticmethod
+    def _runs_sync_key(state_types: list[FlowRunStates] | None) -> str:
+        if not state_types:
+            return "get_runs[*]"
+        names = sorted(FlowRunStates(state_type).value for state_type in state_types)
+        return f"get_runs[{','.join(names)}]"
+
+    async def _full_sync_due(self, full_sync_key: str) -> bool:
+        """Whether the last full sync of runs is ``runs_full_sync_interval`` old."""
+        last_full_sync = await self.db.read(
+            lambda cache: cache.get_last_success(full_sync_key)
+        )
+        if last_full_sync is None:
+            return True
+        age = datetime.now() - last_full_sync
+        return age.total_seconds() >= settings.runs_full_sync_interval
+
+    async def _delta_since(
+        self,
+        sync_key: str,
+        is_empty: Callable[["SQLiteCache"], bool] = lambda cache: cache.runs.is_empty(),
+    ) -> datetime | None:
+        """Return where a delta sync should start, or None if a full sync is needed.
+
+        A full sync is needed when there is no high-water mark yet, when the
+        objects it describes are gone from the cache (``is_empty``), or when
+        the cache can't be read at all.
+        """
+
+        def read_mark(cache: SQLiteCache) -> datetime | None:
+            high_water_mark = cache.get_high_water_mark(sync_key)
+            if high_water_mark is None or is_empty(cache):
+                return None
+            return high_water_mark
+
+        try:
+            high_water_mark = await self.db.read(read_mark)
+        except (sqlite3.DatabaseError, ValueError):
+            return None
+        if high_water_mark is None:
+            return None
+        return high_water_mark - DELTA_SYNC_OVERLAP
+
+    async def _fetch_all_runs(
+        self,
+        sort: FlowRunSort,
+        state_types: list[FlowRunStates] | None,
+        on_page: OnPage | None = None,
+    ) -> list[FlowRun]:
+        if state_types:
+            flow_run_filter = FlowRunFilter(
+                state=FlowRunFilterState(type=FlowRunFilterStateType(any_=state_types))
+            )
+        else:
+            flow_run_filter = None
+        return await self._fetch_runs(flow_run_filter, sort, on_page)
+
+    async def get_runs_changed_since(
+        self, since: datetime, on_page: OnPage | None = None
+    ) -> list[FlowRun]:
+        """Fetch and cache runs that may have changed since ``since``.
+
+        The API can't filter on ``updated``, so this asks for runs that started
+        or are expected to start after the mark, plus every run the cache still
+        holds in a non-terminal state or saw change since the mark.
+
+        That misses runs that change long after they finished, such as a
+        failed run retried by hand, and runs deleted on the server. The full
+        sync ``sync_runs`` falls back to every ``runs_full_sync_interval``
+        catches those.
+        """
+
+        def recheck_ids(cache: SQLiteCache) -> list[UUID]:
+            ids = {*cache.runs.open_run_ids(), *cache.runs.ids_updated_since(since)}
+            return sorted(ids)
+
+        run_ids = await self.db.read(recheck_ids)
+        flow_run_filter = FlowRunFilter(
+            operator=Operator.or_,
+            start_time=FlowRunFilterStartTime(after_=since),
+            expected_start_time=FlowRunFilterExpectedStartTime(after_=since),
+            id=FlowRunFilterId(any_=run_ids) if run_ids else None,
+        )
+        return await self._fetch_runs(flow_run_filter, FlowRunSort.ID_DESC, on_page)
+
+    async def _fetch_runs(
+        self,
+        flow_run_filter: FlowRunFilter | None,
+        sort: FlowRunSort,
+        on_page: OnPage | None = None,
+    ) -> list[FlowRun]:
+        """Page through ``read_flow_runs`` and upsert every page into the cache."""
+        all_flow_runs = []
+
+        async for flow_runs in paginate(
+            lambda offset, limit: self.client.read_flow_runs(
+                flow_run_filter=flow_run_filter, sort=sort, offset=offset, limit=limit
+            )
+        ):
+            await self.db.write(lambda cache: cache_runs(cache, flow_runs))
+            all_flow_runs.extend(flow_runs)
+            if on_page is not None:
+                on_page(flow_runs)
+
+        return all_flow_runs
+
+    async def refresh_runs(self, run_ids: Iterable[UUID | str]) -> list[FlowRun]:
+        """Fetch the given runs in one filtered listing and update the cache."""
+        ids = sorted({UUID(str(run_id)) for run_id in run_ids})
+        if not ids:
+            return []
+        return await self._fetch_runs(
+            FlowRunFilter(id=FlowRunFilterId(any_=ids)), FlowRunSort.ID_DESC
+        )
 
     async def get_run(
         self, run_id: UUID | str, force_refresh: bool = False
     ) -> FlowRun | None:
+        """Get a flow run, from the cache when the cache policy allows it.
+
+        Args:
+            run_id: The flow run's ID.
+            force_refresh: Ask the API whatever the cache holds.
+
+        Returns:
+            FlowRun | None: The flow run, or None if it doesn't exist.
+        """
         if isinstance(run_id, str):
             run_id = UUID(run_id)
 
-        try:
-            if force_refresh:
-                flow_run = await self._fetch_and_cache_flow_run(run_id)
-                return flow_run
-
-            cached_run = self.cache.runs.read(run_id)
-            if cached_run and cached_run.state_name in TERMINAL_STATES:
+        if not force_refresh:
+            cached_run, entry = await self.db.read(
+                lambda cache: (
+                    cache.runs.read(run_id),
+                    cache.entries.read("run", run_id),
+                )
+            )
+            decision = self.policy.decide(
+                "run",
+                entry,
+                cached=cached_run is not None,
+                immutable=cached_run is not None and is_terminal(cached_run),
+            )
+            if decision is Decision.NEGATIVE:
+                return None
+            if decision is Decision.STALE:
+                self._refresh_in_background(
+                    "run", run_id, lambda: self._fetch_and_cache_flow_run(run_id)
+                )
+            if decision in (Decision.HIT, Decision.STALE):
                 return cached_run
 
-            flow_run = await self._fetch_and_cache_flow_run(run_id)
-            return flow_run
+        return await self._fetch_and_cache_flow_run(run_id)
 
-        except ObjectNotFound:
-            return None
+    async def warm_run(self, run_id: UUID | str) -> None:
+        """Load what ``RunDetail`` shows for a run into the cache.
+
+        That's the flow run, its deployment and the first page of its logs,
+        each only fetched if the cache can't already answer for it.
+        """
+        flow_run = await self.get_run(run_id)
+        if flow_run is None:
+            return
+
+        async def warm_deployment(deployment_id: UUID) -> None:
+            try:
+                await self.get_deployment_by_id(deployment_id)
+            except ObjectNotFound:
+                pass
+
+        jobs = [self._sync_logs(flow_run.id, None, max_logs=settings.page_size)]
+        if flow_run.deployment_id:
+            jobs.append(warm_deployment(flow_run.deployment_id))
+        await asyncio.gather(*jobs)
+
+    async def last_synced(self) -> datetime | None:
+        """When ``get_runs`` last finished successfully, in local time."""
+        return await self.db.read(lambda cache: cache.get_last_success("get_runs"))
+
+    async def get_cached_run(self, run_id: UUID | str) -> FlowRun | None:
+        """Read a flow run from the cache only, without asking the API."""
+        return await self.db.read(lambda cache: cache.runs.read(run_id))
+
+    async def get_run_row(self, run_id: UUID | str) -> RunRow | None:
+        """Read a flow run's list columns from the cache, without asking the API.
+
+        Cheaper than ``get_cached_run``, for painting a run before its full
+        ``FlowRun`` is loaded.
+        """
+        return await self.db.read(lambda cache: cache.runs.read_row(run_id))
+
+    async def get_run_rows(
+        self,
+        query: str = "",
+        offset: int = 0,
+        limit: int = 100,
+        order_by: str | None = None,
+        descending: bool = False,
+    ) -> list[RunRow]:
+        """Read cached flow runs matching a filter, by position.
+
+        Sorting happens in SQLite, over the column's index; see
+        ``RunsCache.rows``.
+
+        Raises:
+            FilterError: The filter is malformed or names an unknown field
+        """
+        return await self.db.read(
+            lambda cache: cache.runs.rows(query, offset, limit, order_by, descending)
+        )
+
+    async def count_runs(self, query: str = "") -> int:
+        """Count cached flow runs matching a filter.
+
+        Raises:
+            FilterError: The filter is malformed or names an unknown field
+        """
+        return await self.db.read(lambda cache: cache.runs.count(query))
+
+    async def _fetch_and_cache_flow_run(self, run_id: UUID) -> FlowRun | None:
+        return await self._flights.do(
+            ("run", run_id), lambda: self._run_batcher.get(run_id)
+        )
+
+    async def _read_runs_by_ids(self, run_ids: list[UUID]) -> dict[UUID, FlowRun]:
+        """Fetch and cache a batch of runs, recording the ones that don't exist."""
+        if len(run_ids) == 1:
+            try:
+                flow_runs = [await self.client.read_flow_run(run_ids[0])]
+            except ObjectNotFound:
+                flow_runs = []
+            else:
+                await self.db.write(lambda cache: cache_runs(cache, flow_runs))
+        else:
+            flow_runs = await self.refresh_runs(run_ids)
 
-    async def _fetch_and_cache_flow_run(self, run_id: UUID) -> FlowRun:
-        flow_run = await self.client.read_flow_run(run_id)
-        self.cache.runs.upsert([flow_run])
-        return flow_run
+        found = {flow_run.id: flow_run for flow_run in flow_runs}
+        not_found = [run_id for run_id in run_ids if run_id not in found]
+        if not_found:
+            await self.db.write(
+                lambda cache: cache.entries.touch("run", not_found, missing=True)
+            )
+        return found
 
     async def get_logs(
         self, run_id: UUID | str | None = None, task_run_id: UUID | str | None = None
     ) -> str:
+        """Get the logs of a flow run or task run as one string.
+
+        Cached logs are returned as-is, topped up with any logs the API has
+        that are newer than the last cached one. Once a flow run's logs have
+        been fetched after it reached a terminal state, the cache is treated as
+        complete and the API is not asked again.
+        """
         if isinstance(run_id, str):
             run_id = UUID(run_id)
         if isinstance(task_run_id, str):
@@ -113,83 +556,799 @@ class CachingPrefectClient:
         if run_id and task_run_id:
             raise ValueError("Cannot filter by both run_id and task_run_id")
 
+        if not run_id and not task_run_id:
+            logs = await self.client.read_logs(log_filter=LogFilter())
+            return "\n".join([log.message for log in logs])
+
+        await self._sync_logs(run_id, task_run_id)
+
         if run_id:
-            flow_run_filter = LogFilterFlowRunId(any_=[run_id])
+            cached = await self.db.read(lambda cache: cache.logs.flow_run(run_id))
         else:
-            flow_run_filter = None
+            cached = await self.db.read(lambda cache: cache.logs.task_run(task_run_id))
+        return "\n".join([log["message"] for log in cached])
 
-        if task_run_id:
-            task_run_filter = LogFilterTaskRunId(any_=[task_run_id])
-        else:
-            task_run_filter = None
+    async def _sync_logs(
+        self,
+        run_id: UUID | None,
+        task_run_id: UUID | None,
+        max_logs: int | None = None,
+    ) -> list[Log]:
+        """Fetch and cache logs newer than the newest cached one.
+
+        Args:
+            max_logs: Fetch at most one page of this many logs. The rest are
+                fetched by the next sync.
+
+        Returns:
+            list[Log]: The logs that weren't cached before, in timestamp order.
+        """
+        sync_key = f"get_logs[{run_id or task_run_id}]"
 
+        def read_state(cache: SQLiteCache):
+            if cache.is_complete(sync_key):
+                return None
+            # Decide completeness before fetching so logs written while the
+            # run was finishing are still picked up by this fetch.
+            cached_run = cache.runs.read(run_id) if run_id else None
+            run_finished = cached_run is not None and is_terminal(cached_run)
+            since = cache.logs.latest_timestamp(run_id, task_run_id)
+            # The timestamp filter is inclusive, so the newest cached logs
+            # come back again and are filtered out below.
+            already_cached = (
+                cache.logs.ids_at(since, run_id, task_run_id) if since else set()
+            )
+            return run_finished, since, already_cached
+
+        state = await self.db.read(read_state)
+        if state is None:
+            return []
+        run_finished, since, already_cached = state
         log_filter = LogFilter(
-            flow_run_id=flow_run_filter,
-            task_run_id=task_run_filter,
+            flow_run_id=LogFilterFlowRunId(any_=[run_id]) if run_id else None,
+            task_run_id=LogFilterTaskRunId(any_=[task_run_id]) if task_run_id else None,
+            timestamp=LogFilterTimestamp(after_=since) if since else None,
+        )
+
+        def read_page(offset: int, limit: int) -> Awaitable[list[Log]]:
+            return self.client.read_logs(
+                log_filter=log_filter,
+                limit=limit,
+                offset=offset,
+                sort=LogSort.TIMESTAMP_ASC,
+            )
+
+        if max_logs is None:
+            pages = paginate(read_page)
+        else:
+            pages = _single_page(read_page(0, max_logs))
+
+        fetched: list[Log] = []
+        truncated = False
+        async for logs in pages:
+            await self.db.write(lambda cache: cache.logs.upsert(logs))
+            fetched.extend(log for log in logs if str(log.id) not in already_cached)
+            truncated = max_logs is not None and len(logs) >= max_logs
+
+        if run_finished and not truncated:
+            await self.db.write(lambda cache: cache.mark_complete(sync_key))
+        return fetched
+
+    async def sync_logs(self, run_ids: Iterable[UUID | str]) -> int:
+        """Fetch and cache new logs for many flow runs, a few runs at a time.
+
+        Returns:
+            int: How many logs weren't cached before.
+        """
+        limiter = asyncio.Semaphore(settings.page_concurrency)
+
+        async def sync(run_id: UUID) -> int:
+            async with limiter:
+                return len(await self._sync_logs(run_id, None))
+
+        ids = {UUID(str(run_id)) for run_id in run_ids}
+        return sum(await asyncio.gather(*(sync(run_id) for run_id in ids)))
+
+    async def get_cached_logs(
+        self, run_id: UUID | str, after: LogCursor | None = None
+    ) -> list[dict]:
+        """Read a flow run's cached logs, oldest first, without asking the API.
+
+        Args:
+            after: Only read logs after this ``(timestamp, rowid)`` cursor.
+        """
+        return await self.db.read(lambda cache: cache.logs.flow_run(run_id, after))
+
+    async def tail_logs(
+        self,
+        run_id: UUID | str,
+        interval: float | None = None,
+        batch_size: int | None = None,
+        after: LogCursor | None = None,
+    ) -> AsyncIterator[list[str]]:
+        """Follow a flow run's logs until it reaches a terminal state.
+
+        Every ``interval`` seconds the run's state is refreshed, new logs are
+        fetched into the cache, and every cached log after the last one
+        yielded is yielded, in batches of at most ``batch_size``. Reading back
+        from the cache means logs another writer cached first, such as the
+        prefetcher or ``purrr sync``, are yielded too. Iteration ends after the
+        first poll that sees the run finished, which also picks up its final
+        logs.
+
+        Args:
+            run_id: The flow run to follow.
+            interval: Seconds between polls. Defaults to ``settings.log_tail_interval``.
+            batch_size: Most lines per batch. Defaults to ``settings.log_tail_batch_size``.
+            after: The ``(timestamp, rowid)`` of the last log already shown.
+                Defaults to yielding every cached log.
+
+        Yields:
+            list[str]: Messages of new log lines, oldest first.
+        """
+        if isinstance(run_id, str):
+            run_id = UUID(run_id)
+        interval = settings.log_tail_interval if interval is None else interval
+        batch_size = batch_size or settings.log_tail_batch_size
+
+        while True:
+            flow_run = await self.get_run(run_id, force_refresh=True)
+            finished = flow_run is None or is_terminal(flow_run)
+
+            await self._sync_logs(run_id, None)
+            logs = await self.get_cached_logs(run_id, after)
+            if logs:
+                after = (logs[-1]["timestamp"], logs[-1]["rowid"])
+            messages = [log["message"] for log in logs]
+            for start in range(0, len(messages), batch_size):
+                yield messages[start : start + batch_size]
+
+            if finished:
+                return
+            await asyncio.sleep(interval)
+
+    async def get_deployments(
+        self, full_refresh: bool = False
+    ) -> list[DeploymentResponse]:
+        """Sync deployments into the cache and list them from it.
+
+        The first call pages through every deployment and drops cached ones
+        the API no longer has. Later calls read deployments most recently
+        updated first and stop at the high-water mark, so they only fetch
+        what changed since.
+
+        Args:
+            full_refresh (bool, optional): Ignore the high-water mark and resync everything. Defaults to False.
+
+        Returns:
+            list[DeploymentResponse]: Every cached deployment, ordered by name.
+        """
+        await self.sync_deployments(full_refresh)
+        return await self.get_cached_deployments()
+
+    async def sync_deployments(
+        self, full_refresh: bool = False
+    ) -> list[DeploymentResponse]:
+        """Bring the cached deployments up to date with the API.
+
+        Returns:
+            list[DeploymentResponse]: The deployments fetched.
+        """
+        return await self._sync_listing(
+            "get_deployments",
+            lambda sort, offset, limit: self.client.read_deployments(
+                sort=sort, offset=offset, limit=limit
+            ),
+            DeploymentSort.NAME_ASC,
+            DeploymentSort.UPDATED_DESC,
+            is_empty=lambda cache: cache.deployments.is_empty(),
+            store=cache_deployments,
+            retain=lambda cache, ids: cache.deployments.retain(ids),
+            full_refresh=full_refresh,
         )
 
-        logs = await self.client.read_logs(log_filter=log_filter)
-        return "\n".join([log.message for log in logs])
+    async def get_cached_deployment(
+        self, deployment_id: UUID | str
+    ) -> DeploymentResponse | None:
+        """Read a deployment from the cache only, without asking the API."""
+        return await self.db.read(lambda cache: cache.deployments.read(deployment_id))
+
+    async def get_cached_deployments(
+        self, order_by: str | None = None, descending: bool = False
+    ) -> list[DeploymentResponse]:
+        """List cached deployments, by name by default, without asking the API."""
+        return await self.db.read(
+            lambda cache: cache.deployments.read_all(order_by, descending)
+        )
+
+    async def _sync_listing(
+        self,
+        sync_key: str,
+        read_page: Callable[..., Awaitable[list]],
+        full_sort: object,
+        newest_first: object,
+        is_empty: Callable[["SQLiteCache"], bool],
+        store: Callable[["SQLiteCache", list], None],
+        retain: Callable[["SQLiteCache", list[UUID]], object],
+        full_refresh: bool = False,
+    ) -> list:
+        """Sync a listing of objects with an ``updated`` time into the cache.
+
+        Args:
+            sync_key: The metadata row holding the high-water mark.
+            read_page: Reads a page of objects, given a sort, offset and limit.
+            full_sort: The sort for a full sync, which must be stable.
+            newest_first: The sort putting the most recently updated first.
+            is_empty: Whether the cache has none of these objects yet.
+            store: Upserts a page of objects into the cache.
+            retain: Deletes cached objects whose IDs aren't given.
+            full_refresh: Ignore the high-water mark and resync everything.
+
+        Returns:
+            list: The objects fetched.
+        """
+        try:
+            since = None
+            if not full_refresh:
+                since = await self._delta_since(sync_key, is_empty)
+            if since is None:
+                items = await self._fetch_all(
+                    lambda offset, limit: read_page(full_sort, offset, limit),
+                    store,
+                    retain,
+                )
+            else:
+                items = await self._fetch_updated_since(
+                    lambda offset, limit: read_page(newest_first, offset, limit),
+                    since,
+                    store,
+                )
+
+            updated = [item.updated for item in items if item.updated]
+            if updated:
+                await self.db.write(
+                    lambda cache: cache.set_high_water_mark(sync_key, max(updated))
+                )
+            await self.db.write(lambda cache: cache.log_execution(sync_key, True))
+        except Exception as e:
+            await self.db.write(lambda cache: cache.log_execution(sync_key, False))
+            raise e
+        return items
+
+    async def _fetch_all(
+        self,
+        read_page: Callable[[int, int], Awaitable[list[T]]],
+        store: Callable[["SQLiteCache", list[T]], None],
+        retain: Callable[["SQLiteCache", list[UUID]], object],
+    ) -> list[T]:
+        """Fetch and cache every object, then drop cached ones that are gone."""
+        items = []
+        async for page in paginate(read_page):
+            await self.db.write(lambda cache: store(cache, page))
+            items.extend(page)
+
+        ids = [item.id for item in items]
+        await self.db.write(lambda cache: retain(cache, ids))
+        return items
+
+    async def _fetch_updated_since(
+        self,
+        read_page: Callable[[int, int], Awaitable[list[T]]],
+        since: datetime,
+        store: Callable[["SQLiteCache", list[T]], None],
+    ) -> list[T]:
+        """Fetch and cache objects updated since ``since``.
+
+        The API can't filter deployments or flows on ``updated``, but it can
+        sort by it, so this pages newest first and stops at the first older
+        object.
+        """
+        changed = []
+        pages = paginate(read_page)
+        # Closing the pages on the way out cancels requests already sent.
+        async with aclosing(pages):
+            async for page in pages:
+                newer = [i for i in page if i.updated is None or i.updated >= since]
+                if newer:
+                    await self.db.write(lambda cache: store(cache, newer))
+                    changed.extend(newer)
+                if len(newer) < len(page):
+                    break
+        return changed
+
+    async def get_deployments_by_ids(
+        self, deployment_ids: Iterable[UUID | str]
+    ) -> dict[UUID, DeploymentResponse]:
+        """Resolve many deployments at once, answering from the cache first.
+
+        Each cached deployment goes through the cache policy, as in
+        ``get_deployment_by_id``. Deployments that are missing from the cache or
+        expired are fetched with a single filtered ``read_deployments``
+        listing and upserted together. Stale ones are served and refreshed in
+        the background. IDs the API recently reported missing aren't asked for
+        again.
+
+        Args:
+            deployment_ids: Deployment IDs to resolve. Duplicates are fine.
+
+        Returns:
+            dict[UUID, DeploymentResponse]: The deployments that exist, keyed by ID.
+        """
+        wanted = {UUID(str(deployment_id)) for deployment_id in deployment_ids}
+        cached, entries = await self.db.read(
+            lambda cache: (
+                cache.deployments.read_many(wanted),
+                cache.entries.read_many("deployment", wanted),
+            )
+        )
+
+        deployments = {}
+        to_fetch = []
+        for deployment_id in sorted(wanted):
+            decision = self.policy.decide(
+                "deployment",
+                entries.get(str(deployment_id)),
+                cached=deployment_id in cached,
+            )
+            if decision is Decision.STALE:
+                self._refresh_in_background(
+                    "deployment",
+                    deployment_id,
+                    lambda deployment_id=deployment_id: self._fetch_deployment(
+                        deployment_id
+                    ),
+                )
+            if decision in (Decision.HIT, Decision.STALE):
+                deployments[deployment_id] = cached[deployment_id]
+            elif decision is Decision.MISS:
+                to_fetch.append(deployment_id)
+
+        if to_fetch:
+            deployments.update(await self._read_and_cache_deployments(to_fetch))
+
+        return deployments
+
+    async def _read_deployments_by_ids(
+        self, deployment_ids: list[UUID]
+    ) -> list[DeploymentResponse]:
+        """Fetch deployments with one ``any_`` filtered listing per page of IDs."""
+        page_size = settings.page_size
+        limiter = asyncio.Semaphore(settings.page_concurrency)
+
+        async def read_chunk(chunk: list[UUID]) -> list[DeploymentResponse]:
+            async with limiter:
+                return await self.client.read_deployments(
+                    deployment_filter=DeploymentFilter(
+                        id=DeploymentFilterId(any_=chunk)
+                    ),
+                    limit=page_size,
+                )
+
+        chunks = [
+            deployment_ids[i : i + page_size]
+            for i in range(0, len(deployment_ids), page_size)
+        ]
+        pages = await asyncio.gather(*(read_chunk(chunk) for chunk in chunks))
+        return [deployment for page in pages for deployment in page]
+
+    async def get_flows(self, full_refresh: bool = False) -> list[Flow]:
+        """Sync flows into the cache and list them from it.
+
+        Syncs the same way as ``get_deployments``: everything the first time,
+        then only flows updated since the high-water mark.
+
+        Args:
+            full_refresh (bool, optional): Ignore the high-water mark and resync everything. Defaults to False.
+
+        Returns:
+            list[Flow]: Every cached flow, ordered by name.
+        """
+        await self.sync_flows(full_refresh)
+        return await self.db.read(lambda cache: cache.flows.read_all())
+
+    async def sync_flows(self, full_refresh: bool = False) -> list[Flow]:
+        """Bring the cached flows up to date with the API.
+
+        Returns:
+            list[Flow]: The flows fetched.
+        """
+        return await self._sync_listing(
+            "get_flows",
+            lambda sort, offset, limit: self.client.read_flows(
+                sort=sort, offset=offset, limit=limit
+            ),
+            FlowSort.NAME_ASC,
+            FlowSort.UPDATED_DESC,
+            is_empty=lambda cache: cache.flows.is_empty(),
+            store=lambda cache, flows: cache.flows.upsert(flows),
+            retain=lambda cache, ids: cache.flows.retain(ids),
+            full_refresh=full_refresh,
+        )
+
+    async def get_flow(self, flow_id: UUID | str) -> Flow:
+        """Get a flow, from the cache if it's there.
+
+        Flows are kept up to date by ``sync_flows``, so a cached flow is
+        served without asking the API.
+
+        Raises:
+            ObjectNotFound: The flow doesn't exist.
+        """
+        flow_id = UUID(str(flow_id))
+        cached = await self.db.read(lambda cache: cache.flows.read(flow_id))
+        if cached is not None:
+            return cached
+        flow = await self._flights.do(
+            ("flow", flow_id), lambda: self.client.read_flow(flow_id)
+        )
+        await self.db.write(lambda cache: cache.flows.upsert([flow]))
+        return flow
+
+    async def get_flow_summaries(
+        self, order_by: str | None = None, descending: bool = False
+    ) -> list[FlowSummary]:
+        """List cached flows, by name by default, with rollups of their cached runs."""
+        return await self.db.read(
+            lambda cache: cache.flows.summaries(order_by, descending)
+        )
+
+    async def get_flow_summary(self, flow_id: UUID | str) -> FlowSummary | None:
+        """Read a cached flow with rollups of its cached runs, without asking the API."""
+        return await self.db.read(lambda cache: cache.flows.summary(flow_id))
+
+    async def get_cached_flow_names(
+        self, flow_ids: Iterable[UUID | str]
+    ) -> dict[UUID, str]:
+        """Look up the names of cached flows, without asking the API."""
+        ids = {UUID(str(flow_id)) for flow_id in flow_ids if flow_id}
+        return await self.db.read(lambda cache: cache.flows.names(ids))
+
+    async def get_flow_names(self, flow_ids: Iterable[UUID | str]) -> dict[UUID, str]:
+        """Look up the names of many flows, from the cache where possible.
+
+        Flows that aren't cached are fetched with one filtered listing per
+        page of IDs, and cached.
+        """
+        ids = {UUID(str(flow_id)) for flow_id in flow_ids if flow_id}
+        names = await self.db.read(lambda cache: cache.flows.names(ids))
+        missing = sorted(ids - names.keys())
+        if not missing:
+            return names
+
+        page_size = settings.page_size
+        limiter = asyncio.Semaphore(settings.page_concurrency)
+
+        async def read_chunk(chunk: list[UUID]) -> list[Flow]:
+            async with limiter:
+                return await self.client.read_flows(
+                    flow_filter=FlowFilter(id=FlowFilterId(any_=chunk)),
+                    limit=page_size,
+                )
+
+        chunks = [missing[i : i + page_size] for i in range(0, len(missing), page_size)]
+        pages = await asyncio.gather(*(read_chunk(chunk) for chunk in chunks))
+        flows = [flow for page in pages for flow in page]
+        await self.db.write(lambda cache: cache.flows.upsert(flows))
+        names.update((flow.id, flow.name) for flow in flows)
+        return names
 
     async def get_deployment_by_id(
-        self, deployment_id: UUID, force_refresh: bool = True
+        self, deployment_id: UUID, force_refresh: bool = False
     ) -> DeploymentResponse:
+        """Get a deployment, from the cache when the cache policy allows it.
+
+        Args:
+            deployment_id: The deployment's ID.
+            force_refresh: Ask the API whatever the cache holds.
+
+        Raises:
+            ObjectNotFound: The deployment doesn't exist.
+        """
         if not force_refresh:
-            cached_deployment = self.cache.deployments.read(deployment_id)
-            if cached_deployment:
-                return cached_deployment
-        else:
-            cached_deployment = None
+            cached, entry = await self.db.read(
+                lambda cache: (
+                    cache.deployments.read(deployment_id),
+                    cache.entries.read("deployment", deployment_id),
+                )
+            )
+            decision = self.policy.decide(
+                "deployment", entry, cached=cached is not None
+            )
+            if decision is Decision.NEGATIVE:
+                raise ObjectNotFound(
+                    http_exc=Exception(f"Deployment {deployment_id} not found")
+                )
+            if decision is Decision.STALE:
+                self._refresh_in_background(
+                    "deployment",
+                    deployment_id,
+                    lambda: self._fetch_deployment(deployment_id),
+                )
+            if decision in (Decision.HIT, Decision.STALE):
+                return cached
 
-        # If not in cache, fetch from API and cache it
-        deployment = await self.client.read_deployment(deployment_id)
-        self.cache.deployments.upsert([deployment])
+        return await self._fetch_deployment(deployment_id)
 
+    async def _fetch_deployment(self, deployment_id: UUID) -> DeploymentResponse:
+        deployment = await self._flights.do(
+            ("deployment", deployment_id),
+            lambda: self._deployment_batcher.get(deployment_id),
+        )
+        if deployment is None:
+            raise ObjectNotFound(
+                http_exc=Exception(f"Deployment {deployment_id} not found")
+            )
         return deployment
 
+    async def _read_and_cache_deployments(
+        self, deployment_ids: list[UUID]
+    ) -> dict[UUID, DeploymentResponse]:
+        """Fetch and cache a batch of deployments, recording the ones that don't exist."""
+        if len(deployment_ids) == 1:
+            try:
+                fetched = [await self.client.read_deployment(deployment_ids[0])]
+            except ObjectNotFound:
+                fetched = []
+        else:
+            fetched = await self._read_deployments_by_ids(deployment_ids)
+
+        found = {deployment.id: deployment for deployment in fetched}
+        not_found = [d for d in deployment_ids if d not in found]
+
+        def record(cache: SQLiteCache) -> None:
+            cache_deployments(cache, fetched)
+            cache.entries.touch("deployment", not_found, missing=True)
+
+        await self.db.write(record)
+        return found
+
+
+def cache_runs(cache: "SQLiteCache", flow_runs: list[FlowRun]) -> None:
+    """Upsert freshly fetched runs and record when they were fetched."""
+    cache.runs.upsert(flow_runs)
+    cache.entries.touch("run", (flow_run.id for flow_run in flow_runs))
+
+
+def cache_deployments(
+    cache: "SQLiteCache", deployments: list[DeploymentResponse]
+) -> None:
+    """Upsert freshly fetched deployments and record when they were fetched."""
+    cache.deployments.upsert(deployments)
+    cache.entries.touch("deployment", (deployment.id for deployment in deployments))
+
+
+# Columns added to purrr_metadata after its first release, with their types.
+METADATA_COLUMNS = {
+    "high_water_mark": "TEXT",
+    "complete": "BOOLEAN DEFAULT 0",
+    "last_success": "TIMESTAMP",
+}
+
+# Bumped, as PRAGMA user_version, when cached rows must be rewritten.
+# 1: timestamps stored in UTC rather than the offset they arrived with.
+SCHEMA_VERSION = 1
+
+# Timestamp columns that sort and filter as text, by table.
+TIMESTAMP_COLUMNS = {
+    "flow_runs": ("created", "updated"),
+    "flows": ("created", "updated"),
+    "logs": ("timestamp",),
+}
+
+# Stored timestamps with a UTC offset other than +00:00.
+NON_UTC_GLOB = "*[+-][0-9][0-9]:[0-9][0-9]"
+
+# Pragmas applied to every connection. WAL lets readers keep going while a
+# writer commits; with it, NORMAL sync is still crash safe and only risks the
+# last commits on power loss, which a cache can refetch.
+CONNECTION_PRAGMAS = {
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    # Negative sizes are in KiB.
+    "cache_size": -64 * 1024,
+    "temp_store": "MEMORY",
+}
+
 
 class SQLiteCache:
+    """The purrr cache database and its tables.
+
+    A cache file can be shared by several purrr processes at once, such as two
+    TUI windows or a TUI plus a sync job. The contract is one writer and many
+    readers:
+
+    - The file is in WAL mode, so reads never block on a writer and see the
+      last committed state.
+    - Writes take the database lock when their transaction starts (see
+      ``bulk.transaction``). Writers in other processes wait for it for up to
+      ``settings.cache_busy_timeout`` seconds rather than failing with
+      "database is locked".
+    - Within a process, one connection writes. ``CacheExecutor`` gives it to
+      a single writer thread and opens separate connections for readers.
+    """
+
     def __init__(
         self,
         db_path: str = "sqlite.db",
         logs_client_class: type[LogsCache] = LogsCache,
         runs_client_class: type[RunsCache] = RunsCache,
         deployments_client_class: type[DeploymentCache] = DeploymentCache,
+        flows_client_class: type[FlowsCache] = FlowsCache,
+        migrate: bool = True,
     ):
         self.db_path = db_path
+        self._table_classes = (
+            logs_client_class,
+            runs_client_class,
+            deployments_client_class,
+            flows_client_class,
+        )
         self.db = self._get_connection()
-        self.logs = logs_client_class(self.db)
-        self.runs = runs_client_class(self.db)
-        self.deployments = deployments_client_class(self.db)
-
-        # Initialize metadata table with function_name as primary key
-        self.db.execute("""
-            CREATE TABLE IF NOT EXISTS purrr_metadata (
-                function_name TEXT PRIMARY KEY,
-                time_executed TIMESTAMP,
-                success BOOLEAN
-            )
-        """)
-        self.db.commit()
+        if not migrate:
+            self._open_tables(migrate=False)
+            return
+
+        # One write lock around every table's creation and migration, so
+        # processes opening an old cache file at the same time migrate it
+        # once: the others wait, then find nothing left to do.
+        with transaction(self.db):
+            self._open_tables(migrate=True)
+            # Initialize metadata table with function_name as primary key
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS purrr_metadata (
+                    function_name TEXT PRIMARY KEY,
+                    time_executed TIMESTAMP,
+                    success BOOLEAN,
+                    high_water_mark TEXT,
+                    complete BOOLEAN DEFAULT 0,
+                    last_success TIMESTAMP
+                )
+            """)
+            self._migrate_metadata()
+            self._migrate_rows()
+
+    def _open_tables(self, migrate: bool) -> None:
+        logs, runs, deployments, flows = self._table_classes
+        self.logs = logs(self.db, migrate)
+        self.runs = runs(self.db, migrate)
+        self.deployments = deployments(self.db, migrate)
+        self.flows = flows(self.db, migrate)
+        self.entries = CacheEntries(self.db, migrate)
+
+    def _migrate_rows(self) -> None:
+        """Rewrite rows cached by older versions, once per cache file."""
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        if version < 1:
+            self._normalize_timestamps()
+        self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _normalize_timestamps(self) -> None:
+        for table, columns in TIMESTAMP_COLUMNS.items():
+            for column in columns:
+                stored = self.db.execute(
+                    f"SELECT rowid, CAST({column} AS TEXT) FROM {table} "
+                    f"WHERE CAST({column} AS TEXT) GLOB ? "
+                    f"AND CAST({column} AS TEXT) NOT GLOB '*+00:00'",
+                    [NON_UTC_GLOB],
+                ).fetchall()
+                self.db.executemany(
+                    f"UPDATE {table} SET {column} = ? WHERE rowid = ?",
+                    [
+                        (timestamp(datetime.fromisoformat(value)), rowid)
+                        for rowid, value in stored
+                    ],
+                )
+
+    def _migrate_metadata(self) -> None:
+        """Add columns introduced after a cache file was first created."""
+        columns = {
+            row[1] for row in self.db.execute("PRAGMA table_info(purrr_metadata)")
+        }
+        for column, column_type in METADATA_COLUMNS.items():
+            if column not in columns:
+                self.db.execute(
+                    f"ALTER TABLE purrr_metadata ADD COLUMN {column} {column_type}"
+                )
+
+    def reader(self) -> "SQLiteCache":
+        """Open another cache on the same database, with its own connection.
+
+        Readers leave creating and migrating tables to the writer.
+        """
+        return type(self)(self.db_path, *self._table_classes, migrate=False)
 
     def _get_connection(self) -> sqlite3.Connection:
         """Create a new SQLite connection with proper settings."""
         conn = sqlite3.connect(
             self.db_path,
             detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+            # The connection is handed to CacheExecutor's writer thread, which
+            # is the only thread that uses it from then on.
+            check_same_thread=False,
+            timeout=settings.cache_busy_timeout,
         )
         # Make sqlite3 return Row objects that support both index and key-based access
         conn.row_factory = sqlite3.Row
+        if self.db_path != ":memory:":
+            conn.execute("PRAGMA journal_mode = WAL")
+        for pragma, value in CONNECTION_PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
         return conn
 
     def log_execution(self, function_name: str, success: bool) -> None:
         """Log function execution with timestamp and success status.
-        Will update existing record if function has been called before."""
-        self.db.execute(
-            """
-            INSERT OR REPLACE INTO purrr_metadata (function_name, time_executed, success)
-            VALUES (?, ?, ?)
-        """,
-            [function_name, datetime.now(), success],
-        )
-        self.db.commit()
+        Will update existing record if function has been called before.
+        The time of the last successful call is kept through failures."""
+        now = datetime.now()
+        with transaction(self.db):
+            self.db.execute(
+                """
+                INSERT INTO purrr_metadata (function_name, time_executed, success, last_success)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (function_name) DO UPDATE SET
+                    time_executed = excluded.time_executed,
+                    success = excluded.success,
+                    last_success = COALESCE(excluded.last_success, last_success)
+            """,
+                [function_name, now, success, now if success else None],
+            )
+
+    def get_last_success(self, function_name: str) -> datetime | None:
+        """Return when ``function_name`` last succeeded, if it ever has."""
+        result = self.db.execute(
+            "SELECT last_success FROM purrr_metadata WHERE function_name = ?",
+            [function_name],
+        ).fetchone()
+        return result[0] if result else None
+
+    def get_high_water_mark(self, key: str) -> datetime | None:
+        """Return the newest ``updated`` timestamp synced for ``key``, if any."""
+        result = self.db.execute(
+            "SELECT high_water_mark FROM purrr_metadata WHERE function_name = ?",
+            [key],
+        ).fetchone()
+        if result is None or result[0] is None:
+            return None
+        return datetime.fromisoformat(result[0])
+
+    def set_high_water_mark(self, key: str, value: datetime) -> None:
+        """Record the newest ``updated`` timestamp synced for ``key``.
+
+        The mark only moves forward, so a delta that returns older runs can't
+        rewind it.
+        """
+        current = self.get_high_water_mark(key)
+        if current is not None and current >= value:
+            return
+        with transaction(self.db):
+            self.db.execute(
+                """
+                INSERT INTO purrr_metadata (function_name, time_executed, success, high_water_mark)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (function_name) DO UPDATE SET
+                    high_water_mark = excluded.high_water_mark
+            """,
+                [key, datetime.now(), True, value.isoformat()],
+            )
+
+    def is_complete(self, key: str) -> bool:
+        """Whether everything there is to fetch for ``key`` is already cached."""
+        result = self.db.execute(
+            "SELECT complete FROM purrr_metadata WHERE function_name = ?", [key]
+        ).fetchone()
+        return bool(result and result[0])
+
+    def mark_complete(self, key: str) -> None:
+        """Record that nothing more will ever need to be fetched for ``key``."""
+        with transaction(self.db):
+            self.db.execute(
+                """
+                INSERT INTO purrr_metadata (function_name, time_executed, success, complete)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (function_name) DO UPDATE SET
+                    complete = excluded.complete
+            """,
+                [key, datetime.now(), True, True],
+            )
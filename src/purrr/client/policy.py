@@ -0,0 +1,189 @@
+"""When a cached Prefect object can be served instead of asking the API.
+
+Every time an object is fetched, its entity type, key and fetch time are
+recorded in ``cache_entries``, along with whether the API said it doesn't
+exist. ``CachePolicy.decide`` compares an entry's age with its entity's
+``EntityPolicy``:
+
+- Objects that can't change any more, such as flow runs in a terminal state,
+  are served from the cache for as long as they're there.
+- Younger than ``ttl``: served from the cache (a hit).
+- Up to ``stale_ttl`` past that: served from the cache while a refresh runs
+  in the background (stale).
+- Older, or never fetched: fetched before answering (a miss).
+- Not found less than ``negative_ttl`` ago: reported missing again without
+  asking (negative).
+
+Each decision is counted per entity in ``CachePolicy.stats``.
+"""
+
+import enum
+import sqlite3
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Iterable, NamedTuple
+
+from purrr.client.bulk import transaction, write_rows
+from purrr.settings import settings
+
+
+class EntityPolicy(NamedTuple):
+    ttl: float
+    stale_ttl: float
+    negative_ttl: float
+
+
+class Decision(str, enum.Enum):
+    HIT = "hit"
+    STALE = "stale"
+    MISS = "miss"
+    NEGATIVE = "negative"
+
+
+class CacheEntry(NamedTuple):
+    fetched_at: float
+    missing: bool
+
+
+def policies_from_settings() -> dict[str, EntityPolicy]:
+    return {
+        "run": EntityPolicy(
+            settings.run_cache_ttl,
+            settings.cache_stale_ttl,
+            settings.negative_cache_ttl,
+        ),
+        "deployment": EntityPolicy(
+            settings.deployment_cache_ttl,
+            settings.cache_stale_ttl,
+            settings.negative_cache_ttl,
+        ),
+    }
+
+
+class CacheEntries:
+    """When each cached object was last fetched from the API."""
+
+    def __init__(self, db: sqlite3.Connection, migrate: bool = True):
+        self.db = db
+        if not migrate:
+            return
+        with transaction(self.db):
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    entity TEXT,
+                    key TEXT,
+                    fetched_at REAL,
+                    missing BOOLEAN DEFAULT 0,
+                    PRIMARY KEY (entity, key)
+                )
+            """)
+
+    def touch(
+        self,
+        entity: str,
+        keys: Iterable[object],
+        missing: bool = False,
+        now: float | None = None,
+    ) -> None:
+        """Record that ``keys`` were just fetched, or found not to exist."""
+        fetched_at = time.time() if now is None else now
+        write_rows(
+            self.db,
+            "INSERT OR REPLACE INTO cache_entries (entity, key, fetched_at, missing) "
+            "VALUES (?, ?, ?, ?)",
+            [(entity, str(key), fetched_at, missing) for key in keys],
+        )
+
+    def read_many(self, entity: str, keys: Iterable[object]) -> dict[str, CacheEntry]:
+        """Read the entries of many keys at once, keyed by the key as text."""
+        keys = [str(key) for key in keys]
+        if not keys:
+            return {}
+        placeholders = ", ".join("?" for _ in keys)
+        result = self.db.execute(
+            "SELECT key, fetched_at, missing FROM cache_entries "
+            f"WHERE entity = ? AND key IN ({placeholders})",
+            [entity, *keys],
+        ).fetchall()
+        return {row[0]: CacheEntry(row[1], bool(row[2])) for row in result}
+
+    def read(self, entity: str, key: object) -> CacheEntry | None:
+        result = self.db.execute(
+            "SELECT fetched_at, missing FROM cache_entries WHERE entity = ? AND key = ?",
+            [entity, str(key)],
+        ).fetchone()
+        if result is None:
+            return None
+        return CacheEntry(result[0], bool(result[1]))
+
+
+class CachePolicy:
+    """Decides between the cache and the API, per entity type.
+
+    Args:
+        policies: An ``EntityPolicy`` per entity type. Defaults to the TTLs
+            in settings.
+        clock: Returns the current time in seconds since the epoch.
+    """
+
+    def __init__(
+        self,
+        policies: dict[str, EntityPolicy] | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.policies = policies or policies_from_settings()
+        self.clock = clock
+        self.stats: dict[str, Counter[Decision]] = defaultdict(Counter)
+
+    def decide(
+        self,
+        entity: str,
+        entry: CacheEntry | None,
+        cached: bool,
+        immutable: bool = False,
+    ) -> Decision:
+        """Decide how to answer for one object, and count the decision.
+
+        Args:
+            entity: The entity type, a key of ``policies``.
+            entry: The object's ``cache_entries`` row, if it has one.
+            cached: Whether the object itself is in the cache.
+            immutable: Whether the cached object can no longer change.
+        """
+        decision = self._decide(self.policies[entity], entry, cached, immutable)
+        self.stats[entity][decision] += 1
+        return decision
+
+    def _decide(
+        self,
+        policy: EntityPolicy,
+        entry: CacheEntry | None,
+        cached: bool,
+        immutable: bool,
+    ) -> Decision:
+        if entry is not None and entry.missing:
+            age = self.clock() - entry.fetched_at
+            return Decision.NEGATIVE if age < policy.negative_ttl else Decision.MISS
+        if not cached:
+            return Decision.MISS
+        if immutable:
+            return Decision.HIT
+        if entry is None:
+            # Cached before fetch times were recorded, so of unknown age.
+            return Decision.MISS
+        age = self.clock() - entry.fetched_at
+        if age < policy.ttl:
+            return Decision.HIT
+        if age < policy.ttl + policy.stale_ttl:
+            return Decision.STALE
+        return Decision.MISS
+
+    def report(self) -> str:
+        """Summarize the decisions made so far, like ``run: 3 hit, 1 miss``."""
+        return "; ".join(
+            f"{entity}: "
+            + ", ".join(
+                f"{count} {decision.value}" for decision, count in counts.items()
+            )
+            for entity, counts in sorted(self.stats.items())
+        )
@@ -0,0 +1,95 @@
+"""Warm the cache for what the user is likely to open next.
+
+``Prefetcher`` is told which keys matter right now, most likely first, and
+warms them in the background::
+
+    prefetcher = Prefetcher(client.warm_run, concurrency=2, budget=500)
+    prefetcher.schedule([highlighted, below, above])
+
+Each call to ``schedule`` replaces the last: keys no longer wanted are
+cancelled, so moving quickly through a list doesn't queue up work for rows
+already scrolled past.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Generic, Hashable, Sequence, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+
+class Prefetcher(Generic[K]):
+    """Warm keys in the background, dropping ones that stop being wanted.
+
+    Args:
+        warm: Loads everything for one key into the cache.
+        concurrency: Most keys warmed at once. Keys wait their turn in the
+            order they were scheduled.
+        budget: Most keys remembered as warm. Past it, the keys warmed
+            longest ago are forgotten and warmed again when next wanted.
+        ttl: Seconds a key stays warm before it's warmed again.
+        delay: Seconds a key waits before warming, so keys only passed over
+            are cancelled before they cost a request.
+    """
+
+    def __init__(
+        self,
+        warm: Callable[[K], Awaitable[None]],
+        concurrency: int,
+        budget: int,
+        ttl: float = float("inf"),
+        delay: float = 0.0,
+    ):
+        self.warm = warm
+        self.budget = budget
+        self.ttl = ttl
+        self.delay = delay
+        self._limiter = asyncio.Semaphore(max(1, concurrency))
+        self._tasks: dict[K, asyncio.Task] = {}
+        self._warmed: OrderedDict[K, float] = OrderedDict()
+
+    def is_warm(self, key: K) -> bool:
+        warmed_at = self._warmed.get(key)
+        return warmed_at is not None and time.monotonic() - warmed_at < self.ttl
+
+    def schedule(self, keys: Sequence[K]) -> None:
+        """Warm ``keys``, most wanted first, and cancel everything else."""
+        wanted = [key for key in dict.fromkeys(keys) if not self.is_warm(key)]
+        for key, task in list(self._tasks.items()):
+            if key not in wanted:
+                task.cancel()
+                del self._tasks[key]
+        for key in wanted:
+            if key not in self._tasks:
+                self._tasks[key] = asyncio.ensure_future(self._prefetch(key))
+
+    def cancel(self) -> None:
+        """Cancel every prefetch that hasn't finished."""
+        self.schedule([])
+
+    async def wait(self) -> None:
+        """Wait for the prefetches scheduled so far to finish or be cancelled."""
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def _prefetch(self, key: K) -> None:
+        try:
+            await asyncio.sleep(self.delay)
+            async with self._limiter:
+                await self.warm(key)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.debug("Prefetching %s failed: %s", key, e)
+            return
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
+
+        self._warmed[key] = time.monotonic()
+        self._warmed.move_to_end(key)
+        while len(self._warmed) > self.budget:
+            self._warmed.popitem(last=False)
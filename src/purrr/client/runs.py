@@ -1,21 +1,117 @@
-import json
+from datetime import datetime
+from typing import Iterable, NamedTuple
 from uuid import UUID
 import logging
 import sqlite3
-from datetime import datetime
-from prefect.client.schemas.objects import FlowRun
+import time
+from prefect.client.schemas.objects import TERMINAL_STATES, FlowRun, StateType
+from prefect.client.schemas.sorting import FlowRunSort
 from textual.logging import TextualHandler
 
+from purrr.client.bulk import timestamp, transaction, write_rows
+from purrr.client.filters import STATE_TYPE_SQL, compile_filter
+from purrr.settings import settings
+
 logging.basicConfig(
     level="NOTSET",
     handlers=[TextualHandler()],
 )
 
 
+class RunRow(NamedTuple):
+    """The columns of a cached flow run that list views show.
+
+    Rows are read straight from the typed ``flow_runs`` columns, without
+    parsing ``raw_json``. Read the full ``FlowRun`` with ``RunsCache.read``
+    when it's actually needed, such as for a detail view.
+    """
+
+    id: str
+    name: str
+    deployment_id: str | None
+    flow_id: str
+    state_name: str
+    created: str | None
+    updated: str | None
+    work_pool_name: str | None
+
+
+# Timestamps are cast so connections that parse declared types still hand
+# back the stored text, the same on every connection.
+ROW_COLUMNS = ", ".join(
+    f"CAST({field} AS TEXT)" if field in ("created", "updated") else field
+    for field in RunRow._fields
+)
+
+
+# Newest first, with the ID breaking ties so the order is total.
+ROW_ORDER = "created DESC, id DESC"
+
+# Columns list views can sort on. Each has an index, so ORDER BY walks it
+# instead of sorting every match.
+SORTABLE_COLUMNS = {
+    "name",
+    "state_name",
+    "created",
+    "updated",
+    "deployment_id",
+    "flow_id",
+    "work_pool_name",
+}
+
+
+SORT_SQL = {
+    FlowRunSort.ID_DESC: "id DESC",
+    FlowRunSort.START_TIME_ASC: "json_extract(raw_json, '$.start_time') ASC",
+    FlowRunSort.START_TIME_DESC: "json_extract(raw_json, '$.start_time') DESC",
+    FlowRunSort.EXPECTED_START_TIME_ASC: "json_extract(raw_json, '$.expected_start_time') ASC",
+    FlowRunSort.EXPECTED_START_TIME_DESC: "json_extract(raw_json, '$.expected_start_time') DESC",
+    FlowRunSort.NAME_ASC: "name ASC",
+    FlowRunSort.NAME_DESC: "name DESC",
+    FlowRunSort.NEXT_SCHEDULED_START_TIME_ASC: "json_extract(raw_json, '$.next_scheduled_start_time') ASC",
+    FlowRunSort.END_TIME_DESC: "json_extract(raw_json, '$.end_time') DESC",
+}
+
+
+# Columns the runs screen filters and sorts on, each indexed along with the
+# ID so sorts that break ties on it never leave the index.
+INDEXED_COLUMNS = [
+    "name",
+    "state_name",
+    "created",
+    "updated",
+    "deployment_id",
+    "flow_id",
+    "work_pool_name",
+]
+
+
+def order_sql(order_by: str | None, descending: bool = False) -> str:
+    """Build an ``ORDER BY`` list for a sortable column.
+
+    The ID breaks ties in the same direction, so the order is total and
+    windows read at different offsets never overlap.
+    """
+    if order_by is None:
+        return ROW_ORDER
+    if order_by not in SORTABLE_COLUMNS:
+        raise ValueError(f"Can't sort runs by {order_by!r}")
+    direction = "DESC" if descending else "ASC"
+    return f"{order_by} {direction}, id {direction}"
+
+
+def is_terminal(flow_run: FlowRun) -> bool:
+    """Whether a flow run has reached a state it can't leave."""
+    state_type = flow_run.state_type or (flow_run.state and flow_run.state.type)
+    return state_type in TERMINAL_STATES
+
+
 class RunsCache:
-    def __init__(self, db: sqlite3.Connection):
+    def __init__(self, db: sqlite3.Connection, migrate: bool = True):
         self.db = db
-        self._create_table()
+        if migrate:
+            with transaction(self.db):
+                self._create_table()
 
     def _create_table(self):
         self.db.execute("""
@@ -31,30 +127,48 @@ class RunsCache:
                 work_pool_name TEXT
             )
         """)
-        self.db.commit()
+        for column in INDEXED_COLUMNS:
+            self._create_index(f"ix_flow_runs_{column}", f"{column}, id")
+
+    def _create_index(self, name: str, columns: str) -> None:
+        """Create an index, replacing one of the same name on other columns.
+
+        Caches written by older versions have single-column indexes under the
+        same names.
+        """
+        sql = f"CREATE INDEX {name} ON flow_runs ({columns})"
+        existing = self.db.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = ?", [name]
+        ).fetchone()
+        if existing is not None and existing[0] == sql:
+            return
+        if existing is not None:
+            self.db.execute(f"DROP INDEX {name}")
+        self.db.execute(sql)
 
     def upsert(self, flow_runs: list[FlowRun]):
-        for flow_run in flow_runs:
-            flow_run_dict = json.loads(flow_run.model_dump_json())
-            self.db.execute(
-                """
-                INSERT OR REPLACE INTO flow_runs
-                (raw_json, id, name, created, updated, deployment_id, flow_id, state_name, work_pool_name)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        write_rows(
+            self.db,
+            """
+            INSERT OR REPLACE INTO flow_runs
+            (raw_json, id, name, created, updated, deployment_id, flow_id, state_name, work_pool_name)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
-                [
-                    json.dumps(flow_run_dict),
+            [
+                (
+                    flow_run.model_dump_json(),
                     str(flow_run.id),
                     flow_run.name,
-                    datetime.fromisoformat(str(flow_run.created)),
-                    datetime.fromisoformat(str(flow_run.updated)),
+                    timestamp(flow_run.created),
+                    timestamp(flow_run.updated),
                     str(flow_run.deployment_id) if flow_run.deployment_id else None,
                     str(flow_run.flow_id),
                     flow_run.state_name or "Unknown",
                     flow_run.work_pool_name,
-                ],
-            )
-        self.db.commit()
+                )
+                for flow_run in flow_runs
+            ],
+        )
 
     def read(self, run_id: UUID | str) -> FlowRun | None:
         cursor = self.db.cursor()
@@ -65,21 +179,172 @@ class RunsCache:
             return FlowRun.parse_raw(result[0])
         return None
 
-    def filter(self, query: str):
-        """Filter flow runs based on a WHERE clause.
+    def read_row(self, run_id: UUID | str) -> RunRow | None:
+        """Read a cached run's typed columns, without parsing ``raw_json``."""
+        rows = self._read_rows(
+            f"SELECT {ROW_COLUMNS} FROM flow_runs WHERE id = ?", [str(run_id)]
+        )
+        return rows[0] if rows else None
+
+    def read_all(
+        self,
+        state_types: list[StateType] | None = None,
+        sort: FlowRunSort = FlowRunSort.START_TIME_DESC,
+    ) -> list[FlowRun]:
+        """List cached flow runs, optionally limited to some state types.
 
         Args:
-            query: SQL WHERE clause to filter flow runs
+            state_types: State types to include. Defaults to all.
+            sort: Sort order, mirroring the API's ``FlowRunSort``.
 
         Returns:
-            list[FlowRun]: List of matching flow runs
+            list[FlowRun]: Matching flow runs.
         """
-        sql = f"SELECT raw_json FROM flow_runs WHERE {query}"
-        logging.info("Executing query: %s", sql)
+        sql = "SELECT raw_json FROM flow_runs"
+        params: list[str] = []
+        if state_types:
+            placeholders = ", ".join("?" for _ in state_types)
+            sql += f" WHERE {STATE_TYPE_SQL} IN ({placeholders})"
+            params = [StateType(state_type).value for state_type in state_types]
+        sql += f" ORDER BY {SORT_SQL[sort]}"
+        result = self.db.execute(sql, params).fetchall()
+        return [FlowRun.parse_raw(row[0]) for row in result]
+
+    def open_run_ids(self) -> list[UUID]:
+        """Return the IDs of cached runs that are not in a terminal state."""
+        placeholders = ", ".join("?" for _ in TERMINAL_STATES)
+        result = self.db.execute(
+            f"""
+            SELECT id FROM flow_runs
+            WHERE {STATE_TYPE_SQL} IS NULL OR {STATE_TYPE_SQL} NOT IN ({placeholders})
+            """,
+            [state_type.value for state_type in TERMINAL_STATES],
+        ).fetchall()
+        return [UUID(row[0]) for row in result]
+
+    def ids_updated_since(self, since: datetime) -> list[UUID]:
+        """Return the IDs of cached runs updated at or after ``since``."""
+        result = self.db.execute(
+            "SELECT id FROM flow_runs WHERE updated >= ?", [timestamp(since)]
+        ).fetchall()
+        return [UUID(row[0]) for row in result]
+
+    def retain(self, run_ids: Iterable[UUID | str]) -> int:
+        """Delete cached flow runs that aren't in ``run_ids``.
+
+        Returns:
+            int: Number of flow runs deleted
+        """
+        keep = {str(run_id) for run_id in run_ids}
+        cached = [row[0] for row in self.db.execute("SELECT id FROM flow_runs")]
+        return write_rows(
+            self.db,
+            "DELETE FROM flow_runs WHERE id = ?",
+            [(run_id,) for run_id in cached if run_id not in keep],
+        )
+
+    def is_empty(self) -> bool:
+        return self.db.execute("SELECT 1 FROM flow_runs LIMIT 1").fetchone() is None
+
+    def rows(
+        self,
+        query: str = "",
+        offset: int = 0,
+        limit: int = 100,
+        order_by: str | None = None,
+        descending: bool = False,
+    ) -> list[RunRow]:
+        """Return cached flow runs matching a filter by position.
+
+        This can start anywhere, which is what a scrollable view needs when
+        it jumps, at the cost of SQLite stepping over ``offset`` index
+        entries first.
+
+        Args:
+            query: The filter to apply.
+            offset: How many matching runs to skip.
+            limit: The most runs to return.
+            order_by: A column from ``SORTABLE_COLUMNS``. Defaults to newest
+                first.
+            descending: Sort ``order_by`` from high to low.
+
+        Raises:
+            FilterError: The filter is malformed or names an unknown field
+            ValueError: ``order_by`` isn't a sortable column
+        """
+        return self._read_rows(
+            *self.rows_sql(query, offset, limit, order_by, descending)
+        )
+
+    def rows_sql(
+        self,
+        query: str = "",
+        offset: int = 0,
+        limit: int = 100,
+        order_by: str | None = None,
+        descending: bool = False,
+    ) -> tuple[str, list]:
+        """Return the SQL and parameters ``rows`` runs, such as for ``explain``."""
+        where, params = compile_filter(query)
+        sql = (
+            f"SELECT {ROW_COLUMNS} FROM flow_runs WHERE ({where}) "
+            f"ORDER BY {order_sql(order_by, descending)} LIMIT ? OFFSET ?"
+        )
+        return sql, [*params, limit, offset]
+
+    def count(self, query: str = "") -> int:
+        """Count cached flow runs matching a filter.
+
+        Raises:
+            FilterError: The filter is malformed or names an unknown field
+        """
+        where, params = compile_filter(query)
+        sql = f"SELECT COUNT(*) FROM flow_runs WHERE ({where})"
+        try:
+            return self.db.execute(sql, params).fetchone()[0]
+        except sqlite3.Error as e:
+            logging.error("SQLite error: %s", str(e))
+            return 0
+
+    def _read_rows(self, sql: str, params: list) -> list[RunRow]:
+        logging.info("Executing query: %s %s", sql, params)
         try:
+            if settings.explain_queries:
+                for step in self.explain(sql, params):
+                    logging.info("Query plan: %s", step)
+            start = time.perf_counter()
             cursor = self.db.cursor()
-            result = cursor.execute(sql).fetchall()
-            return [FlowRun.parse_raw(row[0]) for row in result]
+            # Plain tuples, not sqlite3.Row, so rows can become RunRows as is.
+            cursor.row_factory = None
+            result = cursor.execute(sql, params).fetchall()
+            queried = time.perf_counter()
         except sqlite3.Error as e:
             logging.error("SQLite error: %s", str(e))
             return []
+
+        rows = list(map(RunRow._make, result))
+        logging.info(
+            "Filter matched %d runs: %.1fms in SQLite, %.1fms building rows",
+            len(rows),
+            (queried - start) * 1000,
+            (time.perf_counter() - queried) * 1000,
+        )
+        return rows
+
+    def explain(self, sql: str, params: list | None = None) -> list[str]:
+        """Return the steps of SQLite's query plan for ``sql``.
+
+        Args:
+            sql: A query against the cache
+            params: Values for the query's placeholders
+
+        Returns:
+            list[str]: One line per plan step, indented by depth
+        """
+        rows = self.db.execute(f"EXPLAIN QUERY PLAN {sql}", params or []).fetchall()
+        depth = {0: 0}
+        steps = []
+        for node_id, parent_id, _, detail in rows:
+            depth[node_id] = depth.get(parent_id, 0) + 1
+            steps.append("  " * (depth[node_id] - 1) + detail)
+        return steps
@@ -1,4 +1,4 @@
-from typing import Type, TYPE_CHECKING
+from typing import Iterable, NamedTuple, Type, TYPE_CHECKING
 
 from textual import on
 from textual.app import ComposeResult
@@ -6,6 +6,9 @@ from textual.screen import Screen
 from textual.widgets import Header, DataTable, Footer, Input
 from textual.message import Message
 
+from purrr.screens.windowed_table import Row, WindowedTable
+from purrr.settings import settings
+
 if TYPE_CHECKING:
     from purrr.tui import PrefectApp
 
@@ -40,9 +43,22 @@ class CustomInput(Input):
         self.post_message(self.ResetFocus())
 
 
+class RowChanges(NamedTuple):
+    added: int
+    removed: int
+    changed: int
+
+
 class BaseTableScreen(Screen):
     detail_screen: Type[BaseDetailView]
     app: "PrefectApp"
+    # Show rows in a WindowedTable that pages them in from the cache, rather
+    # than a DataTable holding every row.
+    windowed: bool = False
+    # Rows come from the cache already in the order of the sorted column, so
+    # sorting re-reads them with load_cached rather than comparing the
+    # rendered strings in the DataTable.
+    sorted_by_cache: bool = False
 
     BINDINGS = [
         ("R", "refresh_data()", "Refresh"),
@@ -59,15 +75,22 @@ class BaseTableScreen(Screen):
     def compose(self) -> ComposeResult:
         yield Header()
         yield CustomInput(
-            placeholder="Enter clause like `state_name ='Scheduled'`",
+            placeholder="Filter like `state = Failed and created > -2h`",
             id="filterInput",
             classes="hidden",
         )
-        yield DataTable()
+        if self.windowed:
+            yield WindowedTable(prefetch=settings.table_prefetch_rows)
+        else:
+            yield DataTable()
         yield Footer()
 
+    @property
+    def table(self) -> DataTable | WindowedTable:
+        return self.query_one(WindowedTable if self.windowed else DataTable)
+
     async def on_mount(self) -> None:
-        table = self.query_one(DataTable)
+        table = self.table
         self.add_columns(table)
         await self.load_data(table)
         table.focus()
@@ -78,10 +101,61 @@ class BaseTableScreen(Screen):
     async def load_data(self, table: DataTable) -> None:
         raise NotImplementedError
 
+    async def load_cached(self, table: DataTable) -> None:
+        """Show the rows the cache holds, in the order of the sorted column."""
+        raise NotImplementedError
+
     async def action_refresh_data(self):
-        table = self.query_one(DataTable)
+        # load_data diffs its rows against the table, so there's no clear()
+        # here: the cursor and scroll position survive a refresh.
+        await self.load_data(self.table)
+
+    def apply_rows(self, table: DataTable, rows: Iterable[Row]) -> RowChanges:
+        """Make ``table`` hold exactly ``rows``, touching only what differs.
+
+        Rows are matched on their key. New keys are added, keys that are gone
+        are removed, and only the cells whose values changed are updated.
+        """
+        rows = list(rows)
+        column_keys = list(table.columns)
+        added = changed = 0
+        seen = set()
+        for row in rows:
+            seen.add(row.key)
+            if row.key not in table.rows:
+                table.add_row(*row.cells, key=row.key)
+                added += 1
+                continue
+            current = table.get_row(row.key)
+            if current == list(row.cells):
+                continue
+            for column_key, old, new in zip(column_keys, current, row.cells):
+                if old != new:
+                    table.update_cell(row.key, column_key, new)
+            changed += 1
+
+        gone = [key for key in table.rows if key.value not in seen]
+        for key in gone:
+            table.remove_row(key)
+
+        if self.sorted_by_cache:
+            self._match_order(table, rows)
+        elif self._sorted_col is not None and added:
+            table.sort(self._sorted_col, reverse=self._reverse_sort)
+        return RowChanges(added, len(gone), changed)
+
+    def _match_order(self, table: DataTable, rows: list[Row]) -> None:
+        """Re-add the rows if the table shows them in a different order."""
+        if [row.key.value for row in table.ordered_rows] == [row.key for row in rows]:
+            return
+        cursor_key = None
+        if table.row_count:
+            cursor_key = table.coordinate_to_cell_key(table.cursor_coordinate).row_key
         table.clear()
-        await self.load_data(table)
+        for row in rows:
+            table.add_row(*row.cells, key=row.key)
+        if cursor_key is not None and cursor_key in table.rows:
+            table.move_cursor(row=table.get_row_index(cursor_key))
 
     async def action_filter_table(self):
         filter_input = self.query_one("#filterInput")
@@ -90,19 +164,31 @@ class BaseTableScreen(Screen):
             filter_input.focus()
 
     async def action_sort_by_column(self):
-        my_table = self.query_one(DataTable)
-        _, col_key = my_table.coordinate_to_cell_key(my_table.cursor_coordinate)
+        table = self.table
+        if self.windowed:
+            col_key = table.columns[table.cursor_column].key
+        else:
+            _, col_key = table.coordinate_to_cell_key(table.cursor_coordinate)
+            col_key = col_key.value
 
         if self._sorted_col == col_key:
-            my_table.sort(col_key, reverse=not self._reverse_sort)
             self._reverse_sort = not self._reverse_sort
         else:
             self._sorted_col = col_key
-            my_table.sort(col_key)
+            self._reverse_sort = False
+
+        if self.windowed:
+            # The source reads _sorted_col, so this re-reads just the rows on
+            # screen in the new order.
+            await table.reload(recount=False)
+        elif self.sorted_by_cache:
+            await self.load_cached(table)
+        else:
+            table.sort(col_key, reverse=self._reverse_sort)
 
     async def get_value(self, row_key: str, column_key: str) -> str:
         raise NotImplementedError
 
     @on(CustomInput.ResetFocus)
     def reset_focus(self):
-        self.query_one(DataTable).focus()
+        self.table.focus()
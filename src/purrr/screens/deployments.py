@@ -1,26 +1,12 @@
-from typing import Generator
 from uuid import UUID
 
 from prefect.client.schemas.responses import DeploymentResponse
+from prefect.exceptions import ObjectNotFound
 from textual.app import ComposeResult
 from textual.widgets import Label, Footer, DataTable
 
-from purrr.client import CachingPrefectClient
 from purrr.screens.base import BaseDetailView, BaseTableScreen
-
-
-async def get_deployment(
-    prefect_client: CachingPrefectClient, deployment_id: UUID
-) -> DeploymentResponse:
-    return await prefect_client.get_deployment_by_id(deployment_id)
-
-
-async def get_deployments(
-    prefect_client: CachingPrefectClient,
-) -> Generator[DeploymentResponse, None, None]:
-    deployments = await prefect_client.get_deployments()
-    for deployment in deployments:
-        yield deployment
+from purrr.screens.windowed_table import Row
 
 
 class DeploymentDetail(BaseDetailView):
@@ -28,28 +14,91 @@ class DeploymentDetail(BaseDetailView):
         yield Label("")
         yield Footer()
 
+    async def on_mount(self) -> None:
+        await self.load_data()
+
     async def load_data(self) -> None:
-        client = CachingPrefectClient()
-        deployment = await get_deployment(client, self.lookup_value)
+        # Paint the cached deployment, then let the cache policy decide
+        # whether it needs fetching again.
+        cached = await self.app._client.get_cached_deployment(self.lookup_value)
+        if cached is not None:
+            self.query_one(Label).update(cached.name)
+        self.run_worker(self._hydrate(), group="hydrate_deployment", exclusive=True)
+
+    async def _hydrate(self) -> None:
+        try:
+            deployment = await self.app._client.get_deployment_by_id(
+                UUID(str(self.lookup_value))
+            )
+        except ObjectNotFound:
+            self.query_one(Label).update("Deployment not found")
+            return
         self.query_one(Label).update(deployment.name)
 
 
 class DeploymentsScreen(BaseTableScreen):
+    sorted_by_cache = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._flow_names: dict[UUID, str] = {}
+
     def add_columns(self, table: DataTable) -> None:
-        table.add_column("Name", width=30)
-        table.add_column("Flow Name", width=30)
-        table.add_column("Status", width=20)
-        table.add_column("Schedule", width=20)
-        table.add_column("Tags", width=20)
+        # Keys are the cache's sortable columns, which sorting passes through.
+        table.add_column("Name", width=30, key="name")
+        table.add_column("Flow Name", width=30, key="flow_name")
+        table.add_column("Status", width=20, key="status")
+        table.add_column("Schedule", width=20, key="schedule")
+        table.add_column("Tags", width=20, key="tags")
 
     async def load_data(self, table: DataTable) -> None:
-        table.clear()
-        client = CachingPrefectClient()
-        async for deployment in get_deployments(client):
-            table.add_row(
-                deployment.name,
-                deployment.flow_id,
-                str(deployment.status),
-                str(deployment.schedules),
-                ", ".join(deployment.tags) if deployment.tags else "N/A",
-            )
+        # Show the cached deployments straight away, then sync in the
+        # background and apply what changed.
+        await self.load_cached(table)
+        self.run_worker(self._sync(table), group="sync_deployments", exclusive=True)
+
+    async def load_cached(self, table: DataTable) -> None:
+        # Flows are named from the cache too, so names show before any sync.
+        client = self.app._client
+        deployments = await client.get_cached_deployments(
+            self._sorted_col, self._reverse_sort
+        )
+        unnamed = {d.flow_id for d in deployments} - self._flow_names.keys()
+        if unnamed:
+            self._flow_names.update(await client.get_cached_flow_names(unnamed))
+        self._show_deployments(table, deployments)
+
+    async def _sync(self, table: DataTable) -> None:
+        client = self.app._client
+        try:
+            changed = await client.sync_deployments()
+        except Exception as e:
+            self.notify(str(e), title="Couldn't sync deployments", severity="warning")
+            return
+        # Only the synced deployments can name flows that aren't cached yet.
+        unnamed = {d.flow_id for d in changed} - self._flow_names.keys()
+        if unnamed:
+            self._flow_names.update(await client.get_flow_names(unnamed))
+        await self.load_cached(table)
+
+    def _show_deployments(
+        self, table: DataTable, deployments: list[DeploymentResponse]
+    ) -> None:
+        self.apply_rows(
+            table,
+            [
+                Row(
+                    str(deployment.id),
+                    (
+                        deployment.name,
+                        self._flow_names.get(
+                            deployment.flow_id, str(deployment.flow_id)
+                        ),
+                        str(deployment.status),
+                        str(deployment.schedules),
+                        ", ".join(deployment.tags) if deployment.tags else "N/A",
+                    ),
+                )
+                for deployment in deployments
+            ],
+        )
@@ -1,24 +1,12 @@
 from __future__ import annotations
 
-from typing import Generator
-
-from prefect import get_client
-from prefect.client.orchestration import PrefectClient
-from prefect.client.schemas import FlowRun
-from prefect.client.schemas.objects import Flow
+from prefect.exceptions import ObjectNotFound
 from textual.app import ComposeResult
 from textual.widgets import DataTable, Label, Footer
 
+from purrr.client.flows import FlowSummary
 from purrr.screens.base import BaseTableScreen, BaseDetailView
-
-
-async def get_flows(
-    prefect_client: PrefectClient,
-) -> Generator[Flow, None, None]:
-    flows = await prefect_client.read_flows()
-
-    for flow in flows:
-        yield flow
+from purrr.screens.windowed_table import Row
 
 
 class FlowDetail(BaseDetailView):
@@ -27,33 +15,83 @@ class FlowDetail(BaseDetailView):
         yield Footer()
 
     async def on_mount(self) -> None:
-        label = self.query_one(Label)
-        row = await self.load_data()
-        label.update(f"Flow Name: {row.name}")
+        await self.load_data()
+
+    async def load_data(self) -> None:
+        # Paint what the cache has, then make sure the flow itself is loaded.
+        summary = await self.app._client.get_flow_summary(self.lookup_value)
+        if summary is not None:
+            self._show_flow(summary.name, summary)
+        self.run_worker(self._hydrate(summary), group="hydrate_flow", exclusive=True)
 
-    async def load_data(self) -> FlowRun:
-        async with get_client() as client:
-            return await client.read_flow_run(self.lookup_value)
+    async def _hydrate(self, summary: FlowSummary | None) -> None:
+        try:
+            flow = await self.app._client.get_flow(self.lookup_value)
+        except ObjectNotFound:
+            self.query_one(Label).update("Flow not found")
+            return
+        self._show_flow(flow.name, summary)
+
+    def _show_flow(self, name: str, summary: FlowSummary | None) -> None:
+        text = f"Flow Name: {name}"
+        if summary is not None and summary.run_count:
+            text += f"\nRuns: {summary.run_count} · Last run: {summary.last_run_state}"
+        self.query_one(Label).update(text)
 
 
 class FlowsScreen(BaseTableScreen):
     detail_screen = FlowDetail
+    sorted_by_cache = True
 
     def add_columns(self, table: DataTable) -> None:
-        table.add_column("Flow ID", width=36)
-        table.add_column("Name", width=30)
-        table.add_column("Created", width=20)
-        table.add_column("Tags", width=20)
+        # Keys are the cache's sortable columns, which sorting passes through.
+        table.add_column("Flow ID", width=36, key="id")
+        table.add_column("Name", width=30, key="name")
+        table.add_column("Created", width=20, key="created")
+        table.add_column("Tags", width=20, key="tags")
+        table.add_column("Runs", width=6, key="run_count")
+        table.add_column("Last Run", width=12, key="last_run_state")
 
     async def get_value(self, selected: DataTable.CellSelected) -> str:
         table = self.query_one(DataTable)
         return table.get_cell(selected.cell_key.row_key, selected.cell_key.column_key)
 
     async def load_data(self, table: DataTable) -> None:
-        async for flow in get_flows(get_client()):
-            table.add_row(
-                str(flow.id),
-                flow.name,
-                str(flow.created),
-                ", ".join(flow.tags) if flow.tags else "N/A",
-            )
+        # Show the cached flows straight away, then sync in the background
+        # and apply what changed.
+        await self.load_cached(table)
+        self.run_worker(self._sync(table), group="sync_flows", exclusive=True)
+
+    async def load_cached(self, table: DataTable) -> None:
+        flows = await self.app._client.get_flow_summaries(
+            self._sorted_col, self._reverse_sort
+        )
+        self._show_flows(table, flows)
+
+    async def _sync(self, table: DataTable) -> None:
+        client = self.app._client
+        try:
+            await client.sync_flows()
+        except Exception as e:
+            self.notify(str(e), title="Couldn't sync flows", severity="warning")
+            return
+        await self.load_cached(table)
+
+    def _show_flows(self, table: DataTable, flows: list[FlowSummary]) -> None:
+        self.apply_rows(
+            table,
+            [
+                Row(
+                    flow.id,
+                    (
+                        flow.id,
+                        flow.name,
+                        flow.created or "",
+                        ", ".join(flow.tags) if flow.tags else "N/A",
+                        str(flow.run_count),
+                        flow.last_run_state or "",
+                    ),
+                )
+                for flow in flows
+            ],
+        )
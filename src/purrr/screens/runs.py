@@ -1,17 +1,40 @@
 from __future__ import annotations
 
 import enum
-from typing import Any
+from datetime import datetime
+from uuid import UUID
 
-from prefect import get_client
 from prefect.client.schemas.objects import FlowRun
+from prefect.exceptions import ObjectNotFound
 from textual import on
 from textual.app import ComposeResult
 from textual.containers import Horizontal, Vertical
-from textual.widgets import DataTable, Label, Footer, Log, Header, Static, Input
+from textual.widgets import Label, Footer, Log, Header, Static, Input
 
+from purrr.client.filters import FilterError, compile_filter
+from purrr.client.logs import LogCursor
+from purrr.client.prefetch import Prefetcher
+from purrr.client.runs import RunRow, is_terminal
 from purrr.screens.base import BaseTableScreen, BaseDetailView
 from purrr.screens.deployments import DeploymentDetail
+from purrr.screens.windowed_table import Row, WindowedTable
+from purrr.settings import settings
+
+
+# Seconds between updates of the "updated 5m ago" freshness label.
+FRESHNESS_INTERVAL = 30
+
+
+def describe_age(when: datetime, now: datetime | None = None) -> str:
+    """Describe how long ago ``when`` was, like ``5m ago``."""
+    seconds = int(((now or datetime.now()) - when).total_seconds())
+    if seconds < 60:
+        return "just now"
+    if seconds < 3600:
+        return f"{seconds // 60}m ago"
+    if seconds < 86400:
+        return f"{seconds // 3600}h ago"
+    return f"{seconds // 86400}d ago"
 
 
 class RunsColumnKeys(str, enum.Enum):
@@ -46,133 +69,240 @@ class RunDetail(BaseDetailView):
         yield Footer()
 
     async def on_mount(self) -> None:
-        label = self.query_one("#flowNameVal")
-        row = await self.load_data()
-        label = self.query_one("#flowNameVal", expect_type=Static)
-        label.update(row.name)
-        label = self.query_one("#flowIdVal", expect_type=Static)
-        label.update(str(row.id))
-        label = self.query_one("#flowStateVal", expect_type=Static)
-        label.update(row.state_name or "Unknown")
-
-        if row.deployment_id:
-            try:
-                deployment = await self.app._client.get_deployment_by_id(
-                    row.deployment_id
-                )
-                label = self.query_one("#flowDeploymentVal", expect_type=Static)
-                label.update(deployment.name)
-            except ValueError as ve:
-                if "Invalid deployment ID" in str(ve):
-                    label = self.query_one("#flowDeploymentVal", expect_type=Static)
-                    label.update("No Deployment")
-                else:
-                    raise ve
-        else:
-            label = self.query_one("#flowDeploymentVal", expect_type=Static)
+        await self.load_data()
+
+    async def load_data(self) -> None:
+        # Paint the header from the cache's typed columns straight away, then
+        # load the full run, its deployment and its logs in parallel.
+        client = self.app._client
+        row = await client.get_run_row(self.lookup_value)
+        if row is not None:
+            self._show_header(row.name, row.id, row.state_name)
+            self._load_deployment(row.deployment_id)
+        self.run_worker(self._hydrate(row), group="hydrate_run", exclusive=True)
+        self.run_worker(self._load_logs(), group="load_logs", exclusive=True)
+
+    async def _hydrate(self, row: RunRow | None) -> None:
+        flow_run = await self.app._client.get_run(self.lookup_value)
+        if flow_run is None:
+            self.query_one("#flowNameVal", expect_type=Static).update("Run not found")
+            return
+        self._show_header(flow_run.name, flow_run.id, flow_run.state_name)
+        if row is None:
+            self._load_deployment(flow_run.deployment_id)
+
+    def _show_header(self, name: str, run_id: object, state_name: str | None) -> None:
+        self.query_one("#flowNameVal", expect_type=Static).update(name)
+        self.query_one("#flowIdVal", expect_type=Static).update(str(run_id))
+        self.query_one("#flowStateVal", expect_type=Static).update(
+            state_name or "Unknown"
+        )
+
+    def _load_deployment(self, deployment_id: object | None) -> None:
+        label = self.query_one("#flowDeploymentVal", expect_type=Static)
+        if not deployment_id:
             label.update("No Deployment")
+            return
+        label.update(str(deployment_id))
+        self.run_worker(
+            self._show_deployment(UUID(str(deployment_id))),
+            group="load_deployment",
+            exclusive=True,
+        )
+
+    async def _show_deployment(self, deployment_id: UUID) -> None:
+        label = self.query_one("#flowDeploymentVal", expect_type=Static)
+        try:
+            deployment = await self.app._client.get_deployment_by_id(deployment_id)
+        except ObjectNotFound:
+            label.update("Deployment not found")
+            return
+        label.update(deployment.name)
+
+    async def _load_logs(self) -> None:
+        client = self.app._client
+        log_widget = self.query_one("#flowLog", expect_type=Log)
+        await client.sync_logs([self.lookup_value])
+        logs = await client.get_cached_logs(self.lookup_value)
+        log_widget.clear()
+        log_widget.write_lines([log["message"] for log in logs])
+        # The tail picks up after the last line shown, not the last one
+        # cached, since other writers share the cache.
+        shown = (logs[-1]["timestamp"], logs[-1]["rowid"]) if logs else None
 
-        logs = await self.app._client.get_logs(self.lookup_value)
-        log_widget: Log = self.query_one("#flowLog", expect_type=Log)
-        log_widget.write_line(logs)
+        flow_run = await client.get_cached_run(self.lookup_value)
+        if flow_run is None or not is_terminal(flow_run):
+            await self.tail_logs(shown)
 
-    async def load_data(self) -> FlowRun:
-        async with get_client() as client:
-            return await client.read_flow_run(self.lookup_value)
+    async def tail_logs(self, after: LogCursor | None = None) -> None:
+        """Append log lines after ``after`` as they arrive until the run finishes."""
+        log_widget = self.query_one("#flowLog", expect_type=Log)
+        async for lines in self.app._client.tail_logs(self.lookup_value, after=after):
+            log_widget.write_lines(lines)
+
+        flow_run = await self.app._client.get_cached_run(self.lookup_value)
+        if flow_run:
+            label = self.query_one("#flowStateVal", expect_type=Static)
+            label.update(flow_run.state_name or "Unknown")
 
 
 class RunsScreen(BaseTableScreen):
     detail_screen = RunDetail
+    windowed = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._filter_query = ""
+        self._synced_at: datetime | None = None
+        self._syncing = False
+        self._sync_failed = False
+        self.prefetcher: Prefetcher[str] = Prefetcher(
+            lambda run_id: self.app._client.warm_run(run_id),
+            concurrency=settings.prefetch_concurrency,
+            budget=settings.prefetch_budget,
+            # As long as the cache policy serves a warmed run without asking.
+            ttl=settings.run_cache_ttl + settings.cache_stale_ttl,
+            delay=settings.prefetch_delay,
+        )
 
     def compose(self) -> ComposeResult:
         yield from super().compose()
 
+    def on_unmount(self) -> None:
+        self.prefetcher.cancel()
+
+    @on(WindowedTable.RowHighlighted)
+    def prefetch_around(self, highlighted: WindowedTable.RowHighlighted) -> None:
+        """Warm the cache for the highlighted run, then its neighbours."""
+        if not settings.pre_fetch_logs:
+            return
+        reach = settings.prefetch_neighbours
+        nearest_first = sorted(range(-reach, reach + 1), key=abs)
+        rows = (
+            highlighted.table.get_row(highlighted.cursor_row + offset)
+            for offset in nearest_first
+        )
+        self.prefetcher.schedule([row.key for row in rows if row is not None])
+
     async def on_input_submitted(self, event: Input.Submitted) -> None:
         if event.input.id == "filterInput" and event.input.value:
             self.app.log("filterInput", event.value)
             await self.action_filter_data(event.value)
         elif event.input.id == "filterInput" and not event.input.value:
-            await self.action_refresh_data()
+            await self.action_filter_data("")
 
     async def action_filter_data(self, filter_query: str) -> None:
-        table = self.query_one(DataTable)
-        table.clear()
         self.app.log("filter_query", filter_query)
+        await self._show_runs(self.query_one(WindowedTable), filter_query)
 
-        data = self.app._client.cache.runs.filter(filter_query)
-        self.app.log(data)
-        for run in data:
-            deployment = self._get_deployment_for_run(run)
-            self._add_run_to_table(table, run, deployment)
+    async def _show_runs(self, table: WindowedTable, query: str) -> None:
+        """Point the table at the cached runs matching ``query``."""
+        try:
+            compile_filter(query)
+        except FilterError as e:
+            self.notify(str(e), title="Invalid filter", severity="error")
+            return
 
-    def add_columns(self, table: DataTable) -> None:
-        table.add_column(RunsColumnKeys.NAME, width=30, key=RunsColumnKeys.NAME)
-        table.add_column(
-            RunsColumnKeys.DEPLOYMENT_ID, width=36, key=RunsColumnKeys.DEPLOYMENT_ID
-        )
-        table.add_column(RunsColumnKeys.FLOW_ID, width=36, key=RunsColumnKeys.FLOW_ID)
-        table.add_column(RunsColumnKeys.STATE, width=20, key=RunsColumnKeys.STATE)
-        table.add_column(RunsColumnKeys.CREATED, width=20, key=RunsColumnKeys.CREATED)
-        table.add_column(RunsColumnKeys.UPDATED, width=20, key=RunsColumnKeys.UPDATED)
-        table.add_column(
-            RunsColumnKeys.WORK_POOL, width=20, key=RunsColumnKeys.WORK_POOL
-        )
+        self._filter_query = query
+        client = self.app._client
 
-    async def get_value(self, row_key: str, column_key: str) -> str:
-        table = self.query_one(DataTable)
+        async def fetch(offset: int, limit: int) -> list[Row]:
+            runs = await client.get_run_rows(
+                query, offset, limit, self._sorted_col, self._reverse_sort
+            )
+            return [Row(run.id, self._row_values(run)) for run in runs]
+
+        await table.load(fetch, lambda: client.count_runs(query))
+
+    def add_columns(self, table: WindowedTable) -> None:
+        widths = {
+            RunsColumnKeys.NAME: 30,
+            RunsColumnKeys.DEPLOYMENT_ID: 36,
+            RunsColumnKeys.FLOW_ID: 36,
+            RunsColumnKeys.STATE: 20,
+            RunsColumnKeys.CREATED: 20,
+            RunsColumnKeys.UPDATED: 20,
+            RunsColumnKeys.WORK_POOL: 20,
+        }
+        # Keys are the cache's column names, which sorting passes through.
+        for column, width in widths.items():
+            table.add_column(column.value, width=width, key=column.value)
+
+    async def get_value(self, row_key: str, column_key: str) -> str | None:
+        table = self.query_one(WindowedTable)
         return table.get_cell(row_key, column_key)
 
-    @on(DataTable.CellSelected)
-    async def cell_selected(self, selected: DataTable.CellSelected) -> None:
-        if selected.cell_key.row_key is None:
-            return
-        if selected.cell_key.column_key in (RunsColumnKeys.ID, RunsColumnKeys.NAME):
-            screen_to_push = RunDetail
-        elif (
-            selected.value != "-"
-            and selected.cell_key.column_key == RunsColumnKeys.DEPLOYMENT_ID
+    @on(WindowedTable.CellSelected)
+    async def cell_selected(self, selected: WindowedTable.CellSelected) -> None:
+        # Rows are keyed on their run's ID.
+        if (
+            selected.column_key == RunsColumnKeys.DEPLOYMENT_ID
+            and selected.value != "-"
         ):
-            screen_to_push = DeploymentDetail
+            await self.app.push_screen(DeploymentDetail(selected.value))
         else:
-            screen_to_push = RunDetail
+            await self.app.push_screen(RunDetail(selected.row_key))
 
-        if (
-            selected.cell_key.column_key != RunsColumnKeys.ID
-            and selected.cell_key.row_key
-        ):
-            lookup_value = await self.get_value(
-                str(selected.cell_key.row_key.value), RunsColumnKeys.ID
-            )
+    async def load_data(self, table: WindowedTable) -> None:
+        # Stale-while-revalidate: show what the cache has straight away, then
+        # sync with the API in the background and merge changes in.
+        if not table.has_source:
+            self._synced_at = await self.app._client.last_synced()
+            await self._show_runs(table, self._filter_query)
+            self.set_interval(FRESHNESS_INTERVAL, self._show_freshness)
+        if not self._syncing:
+            self.run_worker(self._revalidate(table), group="sync_runs")
+
+    async def _revalidate(self, table: WindowedTable) -> None:
+        client = self.app._client
+        self._syncing = True
+        self._show_freshness()
+        try:
+            await client.sync_runs(on_page=self.update_runs)
+        except Exception as e:
+            self._sync_failed = True
+            self.notify(str(e), title="Couldn't sync runs", severity="warning")
         else:
-            lookup_value = selected.value
-
-        await self.app.push_screen(screen_to_push(lookup_value))
-
-    async def _get_deployment_for_run(self, run) -> Any | None:
-        """Helper method to fetch deployment information for a run."""
-        if run.deployment_id:
-            try:
-                return await self.app._client.get_deployment_by_id(run.deployment_id)
-            except ValueError:
-                return None
-        return None
-
-    async def load_data(self, table: DataTable) -> None:
-        runs = await self.app._client.get_runs()
-        if runs:
-            for run in runs:
-                deployment = await self._get_deployment_for_run(run)
-                self._add_run_to_table(table, run, deployment)
-
-    def _add_run_to_table(self, table: DataTable, run, deployment=None) -> None:
-        """Helper method to add a run to the data table with consistent formatting."""
-        table.add_row(
+            self._sync_failed = False
+            self._synced_at = await client.last_synced()
+        finally:
+            self._syncing = False
+        # Re-read only the window on screen, keeping the cursor.
+        await table.reload()
+        self._show_freshness()
+
+    def _show_freshness(self) -> None:
+        """Say in the header how current the listed runs are."""
+        if self._synced_at is None:
+            age = "never synced"
+        else:
+            age = f"updated {describe_age(self._synced_at)}"
+        if self._syncing:
+            self.sub_title = f"Syncing… · {age}"
+        elif self._sync_failed:
+            self.sub_title = f"Sync failed · {age}"
+        else:
+            self.sub_title = f"Up to date · {age}"
+
+    def _row_values(self, run: FlowRun | RunRow) -> tuple[str, ...]:
+        """Cell values for a run, in column order."""
+        return (
             run.name,
             str(run.deployment_id) if run.deployment_id else "-",
             str(run.flow_id),
-            run.state_name if hasattr(run, "state_name") else run.state.type.value,
+            run.state_name or "-",
             str(run.created) if run.created else "-",
             str(run.updated) if run.updated else "-",
             run.work_pool_name or "-",
-            key=str(run.id),
         )
+
+    def update_runs(self, runs: list[FlowRun]) -> None:
+        """Apply changed runs to the table, updating loaded rows in place."""
+        table = self.query_one(WindowedTable)
+        updated = [
+            table.update_row(Row(str(run.id), self._row_values(run))) for run in runs
+        ]
+        # Under a filter or sort, a changed run may have left the filter or
+        # moved, which patching its row can't show: re-read the window.
+        if self._filter_query or self._sorted_col is not None or not all(updated):
+            self.run_worker(table.reload(), group="reload_runs", exclusive=True)
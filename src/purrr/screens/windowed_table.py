@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+from typing import Awaitable, Callable, NamedTuple
+
+from rich.segment import Segment
+from rich.style import Style
+from textual import events
+from textual.binding import Binding
+from textual.geometry import Size
+from textual.message import Message
+from textual.reactive import reactive
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+
+
+class Column(NamedTuple):
+    label: str
+    width: int
+    key: str
+
+
+class Row(NamedTuple):
+    key: str
+    cells: tuple[str, ...]
+
+
+FetchRows = Callable[[int, int], Awaitable[list[Row]]]
+CountRows = Callable[[], Awaitable[int]]
+
+# Blank columns either side of every cell, as DataTable draws them.
+CELL_PADDING = 1
+
+
+class WindowedTable(ScrollView, can_focus=True):
+    """A table that only holds the rows around what's on screen.
+
+    Rows come from ``fetch(offset, limit)`` and the row count from
+    ``count()``, both usually backed by the cache. The table keeps a window
+    of the visible rows plus ``prefetch`` rows either side; scrolling out of
+    it fetches a new window and drops the old one, so memory and first paint
+    don't grow with the number of rows. The scrollbar is sized from
+    ``count()``, so it reflects every row, loaded or not.
+    """
+
+    DEFAULT_CSS = """
+    WindowedTable {
+        height: 1fr;
+    }
+    WindowedTable > .windowed-table--header {
+        text-style: bold;
+        background: $primary;
+        color: $text;
+    }
+    WindowedTable > .windowed-table--cursor {
+        background: $secondary;
+        color: $text;
+    }
+    WindowedTable > .windowed-table--placeholder {
+        color: $text-muted;
+    }
+    """
+
+    COMPONENT_CLASSES = {
+        "windowed-table--header",
+        "windowed-table--cursor",
+        "windowed-table--placeholder",
+    }
+
+    BINDINGS = [
+        Binding("enter", "select_cursor", "Select", show=False),
+        Binding("up", "cursor_up", "Cursor up", show=False),
+        Binding("down", "cursor_down", "Cursor down", show=False),
+        Binding("left", "cursor_left", "Cursor left", show=False),
+        Binding("right", "cursor_right", "Cursor right", show=False),
+        Binding("pageup", "page_up", "Page up", show=False),
+        Binding("pagedown", "page_down", "Page down", show=False),
+        Binding("home", "cursor_home", "First row", show=False),
+        Binding("end", "cursor_end", "Last row", show=False),
+    ]
+
+    cursor_row: reactive[int] = reactive(0)
+    cursor_column: reactive[int] = reactive(0)
+
+    class CellSelected(Message):
+        """Posted when the cell under the cursor is selected."""
+
+        def __init__(
+            self, table: WindowedTable, row_key: str, column_key: str, value: str
+        ) -> None:
+            self.table = table
+            self.row_key = row_key
+            self.column_key = column_key
+            self.value = value
+            super().__init__()
+
+        @property
+        def control(self) -> WindowedTable:
+            return self.table
+
+    class RowHighlighted(Message):
+        """Posted when the cursor moves to another row."""
+
+        def __init__(self, table: WindowedTable, cursor_row: int) -> None:
+            self.table = table
+            self.cursor_row = cursor_row
+            super().__init__()
+
+        @property
+        def control(self) -> WindowedTable:
+            return self.table
+
+    def __init__(self, *, prefetch: int = 100, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.prefetch = prefetch
+        self.columns: list[Column] = []
+        self.row_count = 0
+
+        self._fetch: FetchRows | None = None
+        self._count: CountRows | None = None
+        self._window_start = 0
+        self._window: list[Row] = []
+        self._requested: tuple[int, int] | None = None
+
+    def add_column(self, label: str, width: int, key: str) -> None:
+        self.columns.append(Column(label, width, key))
+        self._update_virtual_size()
+
+    async def load(self, fetch: FetchRows, count: CountRows) -> None:
+        """Show rows from a new source, starting from the top.
+
+        The first window is fetched and painted before the rows are counted,
+        so the table shows up as fast as one page can be read.
+        """
+        self._fetch, self._count = fetch, count
+        self._requested = None
+        limit = self._window_size()
+        self._window_start = 0
+        self._window = await fetch(0, limit)
+        # Until the count is in, assume a full window means there's more.
+        self.row_count = len(self._window) + (len(self._window) == limit)
+        self.cursor_row = 0
+        self.scroll_to(y=0, animate=False)
+        self._update_virtual_size()
+        self.refresh()
+
+        self.row_count = await count()
+        self.cursor_row = min(self.cursor_row, max(self.row_count - 1, 0))
+        self._update_virtual_size()
+        self.refresh()
+
+    @property
+    def has_source(self) -> bool:
+        """Whether rows have been loaded from a source that can be reloaded."""
+        return self._fetch is not None
+
+    async def reload(self, recount: bool = True) -> None:
+        """Fetch the current window and row count again, keeping the cursor.
+
+        Only the window is read, and the table is only repainted if a row in
+        it or the row count changed. Pass ``recount=False`` when only the
+        order of the rows has changed.
+        """
+        if self._fetch is None or self._count is None:
+            return
+        row_count = await self._count() if recount else self.row_count
+        if row_count != self.row_count:
+            self.row_count = row_count
+            self.cursor_row = min(self.cursor_row, max(self.row_count - 1, 0))
+            self._update_virtual_size()
+            self.refresh()
+        await self._load_window(self._window_start, self._window_size())
+
+    def clear(self) -> None:
+        self._fetch = self._count = None
+        self._window_start = 0
+        self._window = []
+        self._requested = None
+        self.row_count = 0
+        self.cursor_row = 0
+        self._update_virtual_size()
+        self.refresh()
+
+    @property
+    def loaded_rows(self) -> int:
+        """How many rows are held in memory right now."""
+        return len(self._window)
+
+    def get_row(self, index: int) -> Row | None:
+        """Return the row at ``index`` if it's in the loaded window."""
+        position = index - self._window_start
+        if 0 <= position < len(self._window):
+            return self._window[position]
+        return None
+
+    def get_cell(self, row_key: str, column_key: str) -> str | None:
+        """Return a cell of a loaded row, or None if the row isn't loaded."""
+        column = self._column_index(column_key)
+        for row in self._window:
+            if row.key == row_key:
+                return row.cells[column]
+        return None
+
+    def update_row(self, row: Row) -> bool:
+        """Replace a loaded row in place.
+
+        Returns:
+            bool: Whether the row was loaded. Rows outside the window are
+            read fresh from the source when they scroll into view.
+        """
+        for position, loaded in enumerate(self._window):
+            if loaded.key == row.key:
+                self._window[position] = row
+                self.refresh()
+                return True
+        return False
+
+    def render_line(self, y: int) -> Strip:
+        scroll_x, scroll_y = self.scroll_offset
+        width = self.size.width
+        if y == 0:
+            cells = [column.label for column in self.columns]
+            style = self.get_component_rich_style("windowed-table--header")
+            return self._render_cells(cells, style, None, None).crop(
+                scroll_x, scroll_x + width
+            )
+
+        index = scroll_y + y - 1
+        if index >= self.row_count:
+            return Strip.blank(width, self.rich_style)
+
+        row = self.get_row(index)
+        if row is None:
+            style = self.get_component_rich_style("windowed-table--placeholder")
+            cells = ["…"] * len(self.columns)
+        else:
+            style = self.rich_style
+            cells = list(row.cells)
+
+        cursor_column = self.cursor_column if index == self.cursor_row else None
+        cursor_style = self.get_component_rich_style("windowed-table--cursor")
+        return self._render_cells(cells, style, cursor_column, cursor_style).crop(
+            scroll_x, scroll_x + width
+        )
+
+    def _render_cells(
+        self,
+        cells: list[str],
+        style: Style,
+        cursor_column: int | None,
+        cursor_style: Style | None,
+    ) -> Strip:
+        segments = []
+        pad = " " * CELL_PADDING
+        for position, (column, text) in enumerate(zip(self.columns, cells)):
+            text = text[: column.width].ljust(column.width)
+            cell_style = cursor_style if position == cursor_column else style
+            segments.append(Segment(f"{pad}{text}{pad}", cell_style))
+        return Strip(segments, self._line_width())
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        super().watch_scroll_y(old_value, new_value)
+        self._ensure_window()
+
+    def on_resize(self, event: events.Resize) -> None:
+        self._ensure_window()
+
+    def watch_cursor_row(self, old_row: int, new_row: int) -> None:
+        visible = max(self.size.height - 1, 1)
+        if new_row < self.scroll_y:
+            self.scroll_to(y=new_row, animate=False)
+        elif new_row >= self.scroll_y + visible:
+            self.scroll_to(y=new_row - visible + 1, animate=False)
+        self.refresh()
+        self.post_message(self.RowHighlighted(self, new_row))
+
+    def watch_cursor_column(self) -> None:
+        self.refresh()
+
+    def action_cursor_up(self) -> None:
+        self.cursor_row = max(self.cursor_row - 1, 0)
+
+    def action_cursor_down(self) -> None:
+        self.cursor_row = min(self.cursor_row + 1, max(self.row_count - 1, 0))
+
+    def action_cursor_left(self) -> None:
+        self.cursor_column = max(self.cursor_column - 1, 0)
+
+    def action_cursor_right(self) -> None:
+        self.cursor_column = min(self.cursor_column + 1, max(len(self.columns) - 1, 0))
+
+    def action_page_up(self) -> None:
+        self.cursor_row = max(self.cursor_row - (self.size.height - 1), 0)
+
+    def action_page_down(self) -> None:
+        self.cursor_row = min(
+            self.cursor_row + (self.size.height - 1), max(self.row_count - 1, 0)
+        )
+
+    def action_cursor_home(self) -> None:
+        self.cursor_row = 0
+
+    def action_cursor_end(self) -> None:
+        self.cursor_row = max(self.row_count - 1, 0)
+
+    def action_select_cursor(self) -> None:
+        row = self.get_row(self.cursor_row)
+        if row is None or not self.columns:
+            return
+        column = self.columns[self.cursor_column]
+        self.post_message(
+            self.CellSelected(self, row.key, column.key, row.cells[self.cursor_column])
+        )
+
+    def on_click(self, event: events.Click) -> None:
+        offset = event.get_content_offset(self)
+        if offset is None or offset.y == 0:
+            return
+        index = self.scroll_offset.y + offset.y - 1
+        if index >= self.row_count:
+            return
+        x = self.scroll_offset.x + offset.x
+        for position, column in enumerate(self.columns):
+            x -= column.width + 2 * CELL_PADDING
+            if x < 0:
+                self.cursor_column = position
+                break
+        self.cursor_row = index
+        self.action_select_cursor()
+
+    def _column_index(self, column_key: str) -> int:
+        for position, column in enumerate(self.columns):
+            if column.key == column_key:
+                return position
+        raise KeyError(column_key)
+
+    def _line_width(self) -> int:
+        return sum(column.width + 2 * CELL_PADDING for column in self.columns)
+
+    def _update_virtual_size(self) -> None:
+        self.virtual_size = Size(self._line_width(), self.row_count + 1)
+
+    def _window_size(self) -> int:
+        return max(self.size.height, 1) + 2 * self.prefetch
+
+    def _ensure_window(self) -> None:
+        """Fetch a new window if the visible rows have left the loaded one."""
+        if self._fetch is None or not self.row_count:
+            return
+        first = int(self.scroll_y)
+        last = min(first + max(self.size.height - 1, 1), self.row_count)
+        window_end = self._window_start + len(self._window)
+        if self._window_start <= first and last <= window_end:
+            return
+
+        start = max(first - self.prefetch, 0)
+        limit = self._window_size()
+        if self._requested == (start, limit):
+            return
+        self._requested = (start, limit)
+        self.run_worker(self._load_window(start, limit), group="window", exclusive=True)
+
+    async def _load_window(self, start: int, limit: int) -> None:
+        if self._fetch is None:
+            return
+        rows = await self._fetch(start, limit)
+        changed = (start, rows) != (self._window_start, self._window)
+        self._window_start, self._window = start, rows
+        self._requested = None
+        if changed:
+            self.refresh()
+        # The view may have moved on while this window was loading.
+        self.call_later(self._ensure_window)
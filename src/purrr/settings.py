@@ -6,7 +6,69 @@ from pydantic_settings import BaseSettings
 class PurrrSettings(BaseSettings):
     """Settings for the Purrr application."""
 
+    # Warm the cache for the run under the cursor on the runs screen, and its
+    # neighbours, so opening one doesn't wait on the API.
     pre_fetch_logs: bool = True
+    # Rows either side of the cursor warmed along with it.
+    prefetch_neighbours: int = 2
+    # Most runs warmed at once.
+    prefetch_concurrency: int = 2
+    # Most runs remembered as warm, so they aren't warmed again.
+    prefetch_budget: int = 500
+    # Seconds the cursor must rest on a row before it's warmed.
+    prefetch_delay: float = 0.15
+    # Page size for list calls against the Prefect API. The server caps this
+    # at PREFECT_API_DEFAULT_LIMIT, which is 200 unless changed.
+    page_size: int = 200
+    # How many pages of a listing may be in flight at once.
+    page_concurrency: int = 4
+    # Seconds between polls for new log lines while tailing a running flow run.
+    log_tail_interval: float = 2.0
+    # Most log lines appended to the log view in one write while tailing.
+    log_tail_batch_size: int = 500
+    # Keep the runs cache current from the Prefect event stream while the TUI
+    # is open.
+    subscribe_events: bool = False
+    # Read connections kept open for cache queries, each on its own thread.
+    cache_readers: int = 2
+    # Most queued cache writes applied together in one transaction.
+    cache_write_batch: int = 64
+    # Seconds a cache write waits for another purrr process to finish writing
+    # before giving up with "database is locked".
+    cache_busy_timeout: float = 30.0
+    # Rows kept loaded above and below the visible part of windowed tables.
+    table_prefetch_rows: int = 100
+    # Log SQLite's query plan for every filter typed into the runs screen.
+    explain_queries: bool = False
+    # Seconds a cached flow run is served before it's fetched again. Runs in a
+    # terminal state can't change, so they're served for as long as they're
+    # cached.
+    run_cache_ttl: float = 5.0
+    # Seconds a cached deployment is served before it's fetched again.
+    deployment_cache_ttl: float = 300.0
+    # Seconds past its TTL a cached object is still served while it's fetched
+    # again in the background.
+    cache_stale_ttl: float = 60.0
+    # Seconds an object the API reported missing is remembered as missing.
+    negative_cache_ttl: float = 30.0
+    # Seconds single-object lookups wait for others to share one listing call.
+    batch_window: float = 0.005
+    # Connection pool of the Prefect API client that every screen shares.
+    http_max_connections: int = 16
+    http_max_keepalive_connections: int = 8
+    # Seconds an idle connection is kept open for the next request.
+    http_keepalive_expiry: float = 30.0
+    # Talk HTTP/2 to the API when the h2 package is installed.
+    http2: bool = True
+
+    # Seconds between full syncs of the cached runs. Delta syncs miss runs
+    # that change long after they finished, such as a failed run retried by
+    # hand, and keep runs deleted on the server. A full sync catches both.
+    runs_full_sync_interval: float = 3600.0
+    # Seconds between syncs run by `purrr sync`.
+    sync_interval: float = 60.0
+    # Most changed runs `purrr sync` fetches logs for in one sync, newest first.
+    sync_log_runs: int = 200
 
     @classmethod
     def load(cls, config_path: Path | None = None) -> "PurrrSettings":
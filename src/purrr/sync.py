@@ -0,0 +1,316 @@
+"""``purrr sync``: keep the cache warm without the TUI open.
+
+Every ``settings.sync_interval`` seconds the syncer brings runs, deployments,
+flows and the logs of recently changed runs up to date in the cache, the same
+way the TUI's screens do. A TUI opened on the same cache then paints from
+fresh data and its own syncs are small deltas. Runs are synced in full every
+``settings.runs_full_sync_interval`` seconds, which picks up finished runs
+changed since and drops runs deleted on the server.
+
+Only one syncer runs per cache file; a second one exits straight away. Each
+step prints one JSON object per line to stdout, such as::
+
+    {"event": "synced", "step": "runs", "count": 12, "seconds": 0.41, ...}
+
+SIGINT or SIGTERM stops the syncer after the step it's running. A second
+signal stops it straight away.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import fcntl
+import heapq
+import json
+import os
+import signal
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, TextIO
+from uuid import UUID
+
+from prefect.client.schemas.objects import FlowRun
+
+from purrr.client import CachingPrefectClient
+from purrr.settings import settings
+
+Emit = Callable[[dict], None]
+
+# Sorts runs without a created time before every other run.
+NEVER = datetime.min.replace(tzinfo=timezone.utc)
+
+
+class SyncLockHeld(RuntimeError):
+    """Another process is already syncing the cache."""
+
+
+class SyncLock:
+    """An exclusive lock on syncing one cache file, held until released.
+
+    The lock is an ``flock`` on a file next to the cache, so it's released by
+    the OS if the process dies. The file holds the syncer's PID.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._file: TextIO | None = None
+
+    @classmethod
+    def for_cache(cls, db_path: str) -> SyncLock:
+        return cls(f"{db_path}.sync.lock")
+
+    def acquire(self) -> None:
+        """Take the lock.
+
+        Raises:
+            SyncLockHeld: Another process holds it.
+        """
+        file = open(self.path, "a+")
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            file.seek(0)
+            holder = file.read().strip() or "unknown"
+            file.close()
+            raise SyncLockHeld(
+                f"Another purrr sync (pid {holder}) is already syncing; "
+                f"lock file {self.path}"
+            ) from None
+        file.seek(0)
+        file.truncate()
+        file.write(str(os.getpid()))
+        file.flush()
+        self._file = file
+
+    def release(self) -> None:
+        if self._file is None:
+            return
+        self._file.truncate(0)
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self) -> SyncLock:
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+def print_event(event: dict, stream: TextIO | None = None) -> None:
+    """Write an event as one line of JSON."""
+    stream = stream or sys.stdout
+    stream.write(json.dumps(event, default=str) + "\n")
+    stream.flush()
+
+
+class Syncer:
+    """Sync the cache from the API on a schedule.
+
+    Args:
+        client: The caching client to sync through.
+        interval: Seconds from the end of one sync to the start of the next.
+        emit: Called with every progress event. Defaults to printing JSON lines.
+    """
+
+    def __init__(
+        self,
+        client: CachingPrefectClient,
+        interval: float | None = None,
+        emit: Emit | None = None,
+    ):
+        self.client = client
+        self.interval = settings.sync_interval if interval is None else interval
+        self.emit = emit or print_event
+        self.cycles = 0
+        self._stop = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def stop(self) -> None:
+        """Stop after the current step, or straight away if already stopping."""
+        if self._stop.is_set() and self._task is not None:
+            self._task.cancel()
+        self._stop.set()
+
+    @property
+    def stopping(self) -> bool:
+        return self._stop.is_set()
+
+    async def run(self, once: bool = False) -> None:
+        """Sync until stopped, or just once.
+
+        Stops on SIGINT and SIGTERM when run on the main thread.
+        """
+        self._task = asyncio.current_task()
+        loop = asyncio.get_running_loop()
+        signals = (signal.SIGINT, signal.SIGTERM)
+        for signum in signals:
+            with contextlib.suppress(NotImplementedError, RuntimeError):
+                loop.add_signal_handler(signum, self.stop)
+
+        self.emit(self._event("started", interval=self.interval))
+        try:
+            while not self.stopping:
+                await self.sync_once()
+                if once:
+                    break
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._stop.wait(), self.interval)
+        except asyncio.CancelledError:
+            self.emit(self._event("cancelled"))
+            raise
+        finally:
+            for signum in signals:
+                with contextlib.suppress(NotImplementedError, RuntimeError):
+                    loop.remove_signal_handler(signum)
+        self.emit(self._event("stopped", cycles=self.cycles))
+
+    async def sync_once(self) -> None:
+        """Run every sync step once. A failed step doesn't stop the others."""
+        self.cycles += 1
+        started = time.perf_counter()
+        # The newest changed runs, oldest at the top of the heap, so a sync
+        # that changes many runs holds only the ones whose logs get synced.
+        newest: list[tuple[datetime, UUID]] = []
+        changed = 0
+
+        def keep_newest(runs: list[FlowRun]) -> None:
+            nonlocal changed
+            changed += len(runs)
+            for run in runs:
+                item = (run.created or NEVER, run.id)
+                if len(newest) < settings.sync_log_runs:
+                    heapq.heappush(newest, item)
+                else:
+                    heapq.heappushpop(newest, item)
+
+        async def sync_runs() -> int:
+            await self.client.sync_runs(on_page=keep_newest)
+            return changed
+
+        async def sync_logs() -> int:
+            # Newest first, so the runs most likely to be opened are warm.
+            run_ids = [run_id for _, run_id in sorted(newest, reverse=True)]
+            return await self.client.sync_logs(run_ids)
+
+        steps: list[tuple[str, Callable[[], Awaitable[int]]]] = [
+            ("runs", sync_runs),
+            ("deployments", self._count(self.client.sync_deployments)),
+            ("flows", self._count(self.client.sync_flows)),
+            ("logs", sync_logs),
+        ]
+        failed = 0
+        for step, sync in steps:
+            if self.stopping:
+                break
+            failed += not await self._step(step, sync)
+
+        self.emit(
+            self._event(
+                "cycle",
+                cycle=self.cycles,
+                failed=failed,
+                seconds=round(time.perf_counter() - started, 3),
+            )
+        )
+
+    @staticmethod
+    def _count(sync: Callable[[], Awaitable[list]]) -> Callable[[], Awaitable[int]]:
+        async def count() -> int:
+            return len(await sync())
+
+        return count
+
+    async def _step(self, step: str, sync: Callable[[], Awaitable[int]]) -> bool:
+        started = time.perf_counter()
+        try:
+            count = await sync()
+        except Exception as e:
+            self.emit(
+                self._event(
+                    "failed",
+                    step=step,
+                    error=f"{type(e).__name__}: {e}",
+                    seconds=round(time.perf_counter() - started, 3),
+                )
+            )
+            return False
+        self.emit(
+            self._event(
+                "synced",
+                step=step,
+                count=count,
+                seconds=round(time.perf_counter() - started, 3),
+            )
+        )
+        return True
+
+    def _event(self, event: str, **fields) -> dict:
+        return {
+            "event": event,
+            "time": datetime.now(timezone.utc).isoformat(),
+            **fields,
+        }
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="purrr sync",
+        description="Keep the purrr cache in sync with the Prefect API.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=settings.sync_interval,
+        help="Seconds between syncs (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--once", action="store_true", help="Sync once and exit instead of looping"
+    )
+    parser.add_argument(
+        "--db", help="Cache file to sync into (default: the one the TUI opens)"
+    )
+    return parser.parse_args(argv)
+
+
+async def run_syncer(
+    client: CachingPrefectClient,
+    interval: float | None = None,
+    once: bool = False,
+    emit: Emit | None = None,
+) -> int:
+    """Hold the cache's sync lock and sync through ``client`` until stopped.
+
+    Returns:
+        int: The exit status: 0 when stopped, 1 if another syncer is running.
+    """
+    emit = emit or print_event
+    lock = SyncLock.for_cache(client.cache.db_path)
+    try:
+        lock.acquire()
+    except SyncLockHeld as e:
+        emit({"event": "locked", "error": str(e)})
+        return 1
+
+    try:
+        await client.open()
+        await Syncer(client, interval, emit).run(once=once)
+    finally:
+        await client.aclose()
+        lock.release()
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    client = CachingPrefectClient(args.db) if args.db else CachingPrefectClient()
+    try:
+        return asyncio.run(run_syncer(client, args.interval, args.once))
+    except asyncio.CancelledError:
+        # Stopped straight away by a second signal.
+        return 130
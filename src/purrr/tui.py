@@ -1,11 +1,16 @@
 import enum
+import sys
 
+from prefect.client.schemas.objects import FlowRun
 from textual.app import App
 
 from purrr.client import CachingPrefectClient
+from purrr.client.events import RunEventsListener
 from purrr.screens.deployments import DeploymentsScreen
 from purrr.screens.flows import FlowsScreen
 from purrr.screens.runs import RunsScreen
+from purrr.settings import settings
+from purrr import sync
 from textual.command import Hit, Provider
 
 
@@ -53,8 +58,23 @@ class PrefectApp(App):
         super().__init__()
         self._client = client or CachingPrefectClient()
 
-    def on_mount(self) -> None:
+    async def on_mount(self) -> None:
+        # One client, connection pool and cache for every screen.
+        await self._client.open()
         self.push_screen(Screens.RUNS)
+        if settings.subscribe_events:
+            listener = RunEventsListener(
+                self._client, on_runs_updated=self.push_run_updates
+            )
+            self.run_worker(listener.run(), group="events", exclusive=True)
+
+    async def on_unmount(self) -> None:
+        await self._client.aclose()
+
+    def push_run_updates(self, runs: list[FlowRun]) -> None:
+        """Show runs changed by events on the runs screen, if it's open."""
+        if isinstance(self.screen, RunsScreen):
+            self.screen.update_runs(runs)
 
     def switch_workspace(self) -> None:
         self.push_screen(Screens.RUNS)
@@ -70,6 +90,9 @@ class PrefectApp(App):
 
 
 def entrypoint():
+    if sys.argv[1:2] == ["sync"]:
+        sys.exit(sync.main(sys.argv[2:]))
+
     app = PrefectApp()
     app.run()
 
@@ -1,7 +1,21 @@
 # Lets write a pytest test that starts the app and makes sure it runs w/o returning a 1
 
+import asyncio
+import uuid
+
+import pendulum
 import pytest
+from prefect.client.schemas.objects import Flow, FlowRun, StateType
+from textual.app import App
+from prefect.client.schemas.responses import DeploymentResponse
+from textual.widgets import DataTable, Label
 
+from purrr.screens.base import BaseTableScreen, RowChanges
+from purrr.screens.deployments import DeploymentDetail
+from purrr.screens.flows import FlowDetail
+from purrr.screens.runs import RunDetail, RunsScreen
+from purrr.screens.windowed_table import Row, WindowedTable
+from purrr.settings import settings
 from purrr.tui import PrefectApp, CachingPrefectClient
 
 
@@ -10,3 +24,453 @@ async def test_app_starts(db):
     app = PrefectApp(client=CachingPrefectClient(db_name=":memory:"))
     async with app.run_test() as pilot:
         await pilot.press("q")
+
+
+@pytest.mark.asyncio
+async def test_runs_table_holds_a_window(fake_prefect, monkeypatch):
+    monkeypatch.setattr(settings, "table_prefetch_rows", 5)
+    now = pendulum.now("UTC")
+    fake_prefect.flow_runs = [
+        FlowRun(
+            id=uuid.uuid4(),
+            name=f"run-{i}",
+            flow_id=uuid.uuid4(),
+            created=now.subtract(minutes=i),  # type: ignore
+            state_type=StateType.FAILED if i % 2 else StateType.COMPLETED,
+            state_name="Failed" if i % 2 else "Completed",
+        )
+        for i in range(100)
+    ]
+    client = CachingPrefectClient(db_name=":memory:")
+    client.client = fake_prefect
+    app = PrefectApp(client=client)
+
+    async with app.run_test() as pilot:
+        await pilot.pause()
+        await app.workers.wait_for_complete()
+        table = app.screen.query_one(WindowedTable)
+        # Every run counts towards the scrollbar, but only a window is loaded.
+        assert table.row_count == 100
+        assert table.loaded_rows < 100
+        assert table.get_row(0).cells[0] == "run-0"
+
+        await app.screen.action_filter_data("state = Failed")
+        assert table.row_count == 50
+        assert table.get_row(0).cells[0] == "run-1"
+
+        table.focus()
+        await pilot.press("end")
+        await pilot.pause()
+        await app.workers.wait_for_complete()
+        await pilot.pause()
+        assert table.get_row(49).cells[0] == "run-99"
+        assert table.get_row(0) is None
+
+        await app.screen.action_filter_data("nonsense = 1")
+        assert table.row_count == 50
+
+        # Sorting re-reads the window on screen, ordered by SQLite.
+        table.cursor_column = 0
+        await app.screen.action_sort_by_column()
+        assert table.get_row(49).cells[0] == "run-99"
+        await app.screen.action_sort_by_column()
+        assert table.get_row(49).cells[0] == "run-1"
+        assert table.row_count == 50
+
+
+@pytest.mark.asyncio
+async def test_runs_paint_from_cache_before_sync(fake_prefect):
+    now = pendulum.now("UTC")
+    cached = [
+        FlowRun(
+            id=uuid.uuid4(),
+            name=f"cached-{i}",
+            flow_id=uuid.uuid4(),
+            created=now.subtract(minutes=i),  # type: ignore
+            state_name="Completed",
+        )
+        for i in range(10)
+    ]
+    answer = asyncio.Event()
+    read_flow_runs = fake_prefect.read_flow_runs
+
+    async def slow_read_flow_runs(*args, **kwargs):
+        await answer.wait()
+        return await read_flow_runs(*args, **kwargs)
+
+    fake_prefect.read_flow_runs = slow_read_flow_runs
+    fake_prefect.flow_runs = [
+        cached[0].model_copy(update={"state_name": "Failed"}),
+        *cached[1:],
+        FlowRun(
+            id=uuid.uuid4(),
+            name="new",
+            flow_id=uuid.uuid4(),
+            created=now.add(minutes=1),  # type: ignore
+        ),
+    ]
+    client = CachingPrefectClient(db_name=":memory:")
+    client.client = fake_prefect
+    await client.db.write(lambda cache: cache.runs.upsert(cached))
+    await client.db.write(lambda cache: cache.log_execution("get_runs", True))
+    app = PrefectApp(client=client)
+
+    async with app.run_test() as pilot:
+        await pilot.pause()
+        screen = app.screen
+        table = screen.query_one(WindowedTable)
+        # Painted from the cache while the API hasn't answered yet.
+        assert table.row_count == 10
+        assert screen.sub_title.startswith("Syncing")
+        assert "updated just now" in screen.sub_title
+
+        answer.set()
+        await app.workers.wait_for_complete()
+        await pilot.pause()
+
+        assert table.row_count == 11
+        assert table.get_row(0).cells[0] == "new"
+        assert table.get_row(1).cells[3] == "Failed"
+        assert screen.sub_title.startswith("Up to date")
+
+
+@pytest.mark.asyncio
+async def test_screens_share_the_app_client(fake_prefect, monkeypatch):
+    fake_prefect.flows = [Flow(id=uuid.uuid4(), name="flow")]
+    client = CachingPrefectClient(db_name=":memory:", client=fake_prefect)
+    app = PrefectApp(client=client)
+    opened = []
+    monkeypatch.setattr(
+        CachingPrefectClient, "__init__", lambda *args: opened.append(args)
+    )
+
+    async with app.run_test() as pilot:
+        for key in ["d", "f", "r", "d"]:
+            await pilot.press(key)
+            await pilot.pause()
+            await app.workers.wait_for_complete()
+
+    called = {name for name, _ in fake_prefect.calls}
+    assert {"read_flow_runs", "read_deployments", "read_flows"} <= called
+    assert opened == []
+
+
+@pytest.mark.asyncio
+async def test_finished_run_detail_opens_from_cache(fake_prefect):
+    now = pendulum.now("UTC")
+    deployment = DeploymentResponse(
+        id=uuid.uuid4(),
+        name="nightly",
+        flow_id=uuid.uuid4(),
+        work_queue_id=uuid.uuid4(),
+        created=now,  # type: ignore
+        updated=now,  # type: ignore
+    )
+    run = FlowRun(
+        id=uuid.uuid4(),
+        name="finished",
+        flow_id=deployment.flow_id,
+        deployment_id=deployment.id,
+        created=now,  # type: ignore
+        state_type=StateType.COMPLETED,
+        state_name="Completed",
+    )
+    fake_prefect.flow_runs = [run]
+    fake_prefect.deployments = [deployment]
+    client = CachingPrefectClient(db_name=":memory:", client=fake_prefect)
+    app = PrefectApp(client=client)
+
+    async with app.run_test() as pilot:
+        await pilot.pause()
+        await app.workers.wait_for_complete()
+        for opened in range(2):
+            fake_prefect.calls.clear()
+            await app.push_screen(RunDetail(str(run.id)))
+            # The header is painted before any worker has run.
+            assert str(app.screen.query_one("#flowNameVal").render()) == "finished"
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            deployment_label = app.screen.query_one("#flowDeploymentVal")
+            assert str(deployment_label.render()) == "nightly"
+            await app.pop_screen()
+
+        # The second time, everything came from the cache.
+        assert fake_prefect.calls == []
+
+
+@pytest.mark.asyncio
+async def test_highlighted_runs_are_prefetched(fake_prefect, monkeypatch):
+    monkeypatch.setattr(settings, "prefetch_delay", 0)
+    now = pendulum.now("UTC")
+    fake_prefect.flow_runs = [
+        FlowRun(
+            id=uuid.uuid4(),
+            name=f"run-{i}",
+            flow_id=uuid.uuid4(),
+            created=now.subtract(minutes=i),  # type: ignore
+            state_type=StateType.COMPLETED,
+            state_name="Completed",
+        )
+        for i in range(10)
+    ]
+    client = CachingPrefectClient(db_name=":memory:", client=fake_prefect)
+    app = PrefectApp(client=client)
+
+    async with app.run_test() as pilot:
+        await pilot.pause()
+        await app.workers.wait_for_complete()
+        screen = app.screen
+        table = screen.query_one(WindowedTable)
+        table.focus()
+        fake_prefect.calls.clear()
+        await pilot.press("down", "down")
+        await pilot.pause()
+        await screen.prefetcher.wait()
+
+        # The highlighted run and its neighbours had their logs fetched.
+        warmed = {
+            call["log_filter"].flow_run_id.any_[0]
+            for name, call in fake_prefect.calls
+            if name == "read_logs"
+        }
+        assert {run.id for run in fake_prefect.flow_runs[:5]} <= warmed
+
+        fake_prefect.calls.clear()
+        await pilot.press("enter")
+        await pilot.pause()
+        await app.workers.wait_for_complete()
+        assert isinstance(app.screen, RunDetail)
+        assert fake_prefect.calls == []
+
+
+@pytest.mark.asyncio
+async def test_deployment_detail_paints_on_open(fake_prefect):
+    now = pendulum.now("UTC")
+    deployment = DeploymentResponse(
+        id=uuid.uuid4(),
+        name="nightly",
+        flow_id=uuid.uuid4(),
+        work_queue_id=uuid.uuid4(),
+        created=now,  # type: ignore
+        updated=now,  # type: ignore
+    )
+    answer = asyncio.Event()
+
+    async def slow_read_deployment(deployment_id):
+        await answer.wait()
+        return deployment.model_copy(update={"name": "renamed"})
+
+    fake_prefect.read_deployment = slow_read_deployment
+    client = CachingPrefectClient(db_name=":memory:", client=fake_prefect)
+    # Cached, but too long ago to be served without asking the API.
+    client.cache.deployments.upsert([deployment])
+    app = PrefectApp(client=client)
+
+    async with app.run_test() as pilot:
+        await app.push_screen(DeploymentDetail(str(deployment.id)))
+        await pilot.pause()
+        # Painted from the cache while the API hasn't answered yet.
+        assert str(app.screen.query_one(Label).render()) == "nightly"
+
+        answer.set()
+        await app.workers.wait_for_complete()
+        await pilot.pause()
+        assert str(app.screen.query_one(Label).render()) == "renamed"
+
+
+@pytest.mark.asyncio
+async def test_deployments_name_flows_from_the_cache(fake_prefect):
+    flow = Flow(id=uuid.uuid4(), name="etl")
+    deployment = DeploymentResponse(
+        id=uuid.uuid4(),
+        name="nightly",
+        flow_id=flow.id,
+        work_queue_id=uuid.uuid4(),
+    )
+
+    async def offline(*args, **kwargs):
+        await asyncio.Event().wait()
+
+    fake_prefect.read_deployments = offline
+    fake_prefect.read_flows = offline
+    client = CachingPrefectClient(db_name=":memory:", client=fake_prefect)
+    client.cache.deployments.upsert([deployment])
+    client.cache.flows.upsert([flow])
+    app = PrefectApp(client=client)
+
+    async with app.run_test() as pilot:
+        app.action_show_deployments()
+        await pilot.pause()
+        table = app.screen.query_one(DataTable)
+        assert table.get_row(str(deployment.id))[:2] == ["nightly", "etl"]
+
+
+@pytest.mark.asyncio
+async def test_flows_sort_in_the_cache(fake_prefect):
+    busy, quiet = (
+        Flow(id=uuid.uuid4(), name="busy"),
+        Flow(id=uuid.uuid4(), name="quiet"),
+    )
+    fake_prefect.flows = [busy, quiet]
+    client = CachingPrefectClient(db_name=":memory:", client=fake_prefect)
+    client.cache.flows.upsert([busy, quiet])
+    fake_prefect.flow_runs = [
+        FlowRun(id=uuid.uuid4(), name=f"{flow.name}-{i}", flow_id=flow.id)
+        for flow, count in [(busy, 10), (quiet, 9)]
+        for i in range(count)
+    ]
+    client.cache.runs.upsert(fake_prefect.flow_runs)
+    app = PrefectApp(client=client)
+
+    async with app.run_test() as pilot:
+        app.action_show_flows()
+        await app.workers.wait_for_complete()
+        await pilot.pause()
+        screen = app.screen
+        table = screen.query_one(DataTable)
+        table.move_cursor(row=1, column=4)
+
+        await screen.action_sort_by_column()
+
+        # 9 runs before 10, which comparing the rendered counts gets wrong.
+        assert [row.key.value for row in table.ordered_rows] == [
+            str(quiet.id),
+            str(busy.id),
+        ]
+        # The cursor stays on the row it was on.
+        assert table.coordinate_to_cell_key(table.cursor_coordinate).row_key == str(
+            quiet.id
+        )
+
+
+@pytest.mark.asyncio
+async def test_flow_detail_shows_the_flow(fake_prefect):
+    flow = Flow(id=uuid.uuid4(), name="etl")
+    fake_prefect.flows = [flow]
+    client = CachingPrefectClient(db_name=":memory:", client=fake_prefect)
+    app = PrefectApp(client=client)
+
+    async with app.run_test() as pilot:
+        await app.push_screen(FlowDetail(str(flow.id)))
+        await app.workers.wait_for_complete()
+        await pilot.pause()
+        assert "Flow Name: etl" in str(app.screen.query_one(Label).render())
+
+
+class RowsScreen(BaseTableScreen):
+    def __init__(self, rows: list[Row]):
+        super().__init__()
+        self.rows = rows
+        self.changes: list[RowChanges] = []
+
+    def add_columns(self, table: DataTable) -> None:
+        table.add_column("Name", key="name")
+        table.add_column("State", key="state")
+
+    async def load_data(self, table: DataTable) -> None:
+        self.changes.append(self.apply_rows(table, self.rows))
+
+
+@pytest.mark.asyncio
+async def test_refresh_only_touches_changed_rows():
+    rows = [Row(f"run-{i}", (f"run-{i}", "Running")) for i in range(20_000)]
+    screen = RowsScreen(rows)
+    app = App()
+
+    async with app.run_test() as pilot:
+        await app.push_screen(screen)
+        await pilot.pause()
+        table = screen.query_one(DataTable)
+        table.move_cursor(row=500)
+
+        screen.rows = list(rows)
+        for i in range(5):
+            screen.rows[i * 1000] = Row(f"run-{i * 1000}", (f"run-{i * 1000}", "Done"))
+        screen.rows.pop()
+        screen.rows.append(Row("run-new", ("run-new", "Pending")))
+        await screen.action_refresh_data()
+
+        assert screen.changes[-1] == RowChanges(added=1, removed=1, changed=5)
+        assert table.row_count == 20_000
+        assert table.get_cell("run-3000", "state") == "Done"
+        assert table.cursor_row == 500
+
+
+def test_run_without_a_state_shows_a_dash():
+    run = FlowRun(id=uuid.uuid4(), name="run", flow_id=uuid.uuid4())
+
+    assert RunsScreen()._row_values(run)[3] == "-"
+
+
+@pytest.mark.asyncio
+async def test_pushed_runs_that_leave_the_filter_are_dropped(fake_prefect):
+    now = pendulum.now("UTC")
+    runs = [
+        FlowRun(
+            id=uuid.uuid4(),
+            name=f"run-{i}",
+            flow_id=uuid.uuid4(),
+            created=now.subtract(minutes=i),  # type: ignore
+            state_type=StateType.RUNNING,
+            state_name="Running",
+        )
+        for i in range(3)
+    ]
+    fake_prefect.flow_runs = runs
+    client = CachingPrefectClient(db_name=":memory:", client=fake_prefect)
+    app = PrefectApp(client=client)
+
+    async with app.run_test() as pilot:
+        await pilot.pause()
+        await app.workers.wait_for_complete()
+        screen = app.screen
+        table = screen.query_one(WindowedTable)
+        await screen.action_filter_data("state = Running")
+        assert table.row_count == 3
+
+        finished = runs[0].model_copy(
+            update={"state_type": StateType.COMPLETED, "state_name": "Completed"}
+        )
+        await client.db.write(lambda cache: cache.runs.upsert([finished]))
+        screen.update_runs([finished])
+        await app.workers.wait_for_complete()
+        await pilot.pause()
+
+        assert table.row_count == 2
+        assert table.get_row(0).cells[0] == "run-1"
+
+
+@pytest.mark.asyncio
+async def test_deployments_sync_reads_the_cache_once(fake_prefect, monkeypatch):
+    flow = Flow(id=uuid.uuid4(), name="etl")
+    fake_prefect.flows = [flow]
+    fake_prefect.deployments = [
+        DeploymentResponse(
+            id=uuid.uuid4(),
+            name="nightly",
+            flow_id=flow.id,
+            work_queue_id=uuid.uuid4(),
+        )
+    ]
+    client = CachingPrefectClient(db_name=":memory:", client=fake_prefect)
+    reads = []
+    read_cached = CachingPrefectClient.get_cached_deployments
+
+    async def get_cached_deployments(self, *args, **kwargs):
+        reads.append(args)
+        return await read_cached(self, *args, **kwargs)
+
+    monkeypatch.setattr(
+        CachingPrefectClient, "get_cached_deployments", get_cached_deployments
+    )
+    app = PrefectApp(client=client)
+
+    async with app.run_test() as pilot:
+        app.action_show_deployments()
+        await app.workers.wait_for_complete()
+        await pilot.pause()
+        table = app.screen.query_one(DataTable)
+        deployment = fake_prefect.deployments[0]
+        # Once to paint from the cache, once after the sync.
+        assert len(reads) == 2
+        assert table.get_row(str(deployment.id))[:2] == ["nightly", "etl"]
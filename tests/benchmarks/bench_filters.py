@@ -0,0 +1,91 @@
+"""Measure how long runs screen filters take against a large cache.
+
+Run with ``python tests/benchmarks/bench_filters.py``. Rows are written
+straight into ``flow_runs`` with a small ``raw_json`` so a million of them
+load quickly. Each filter is compiled from the runs screen's filter language
+and timed the way the screen reads it: one window of rows through
+``RunsCache.rows`` and the match count through ``RunsCache.count``. The
+query plan printed is the one for that ordered, limited window.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from purrr.client.bulk import timestamp, transaction
+from purrr.client.main import SQLiteCache
+
+STATES = ["Completed", "Failed", "Running", "Scheduled", "Cancelled", "Crashed"]
+POOLS = [f"pool-{i}" for i in range(10)]
+WINDOW = 250
+
+FILTERS = [
+    "state = Crashed",
+    "work_pool = pool-3 and state = Failed",
+    "created > -2h",
+    "state = Failed and created > -1d",
+    "flow = {flow_id}",
+]
+
+
+def fill(cache: SQLiteCache, count: int) -> str:
+    """Write ``count`` runs created over the last 30 days and return a flow ID."""
+    now = datetime.now(timezone.utc)
+    flow_ids = [str(uuid.uuid4()) for _ in range(1_000)]
+    with transaction(cache.db):
+        for offset in range(0, count, 10_000):
+            batch = []
+            for i in range(offset, min(offset + 10_000, count)):
+                created = now - timedelta(seconds=random.randrange(30 * 86_400))
+                batch.append(
+                    (
+                        "{}",
+                        str(uuid.uuid4()),
+                        f"run-{i}",
+                        timestamp(created),
+                        timestamp(created + timedelta(minutes=random.randrange(60))),
+                        None,
+                        random.choice(flow_ids),
+                        random.choice(STATES),
+                        random.choice(POOLS),
+                    )
+                )
+            cache.db.executemany(
+                "INSERT INTO flow_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", batch
+            )
+    return flow_ids[0]
+
+
+def timed(call) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = call()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SQLiteCache(str(Path(tmp) / "filters.db"))
+        flow_id = fill(cache, args.rows)
+        cache.db.execute("ANALYZE")
+
+        print(f"{'filter':<55} {'matches':>8} {'rows ms':>8} {'count ms':>9}")
+        for template in FILTERS:
+            query = template.format(flow_id=flow_id)
+            rows_ms, _ = timed(lambda: cache.runs.rows(query, limit=WINDOW))
+            count_ms, matches = timed(lambda: cache.runs.count(query))
+            print(f"{query[:55]:<55} {matches:>8} {rows_ms:>8.1f} {count_ms:>9.1f}")
+            for step in cache.runs.explain(*cache.runs.rows_sql(query, limit=WINDOW)):
+                print(f"    {step}")
+        cache.db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Compare listing runs as RunRow projections with hydrating full FlowRuns.
+
+Run with ``python tests/benchmarks/bench_rows.py``. Both sides read the same
+cached runs; the projection reads the typed columns, hydration parses every
+``raw_json`` blob. Reports time per row and memory held by the result.
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from prefect.client.schemas.objects import FlowRun
+
+from bench_upserts import make_flow_runs
+from purrr.client.main import SQLiteCache
+
+
+def measure(read) -> tuple[float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = read()
+    elapsed = time.perf_counter() - start
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / len(result), held
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SQLiteCache(str(Path(tmp) / "rows.db"))
+        flow_runs = make_flow_runs(args.rows)
+        for offset in range(0, len(flow_runs), 1_000):
+            cache.runs.upsert(flow_runs[offset : offset + 1_000])
+        del flow_runs
+
+        def hydrate() -> list[FlowRun]:
+            rows = cache.db.execute("SELECT raw_json FROM flow_runs").fetchall()
+            return [FlowRun.parse_raw(row[0]) for row in rows]
+
+        print(f"{'read':<12} {'us/row':>8} {'MiB held':>10}")
+        for name, read in [
+            ("projection", lambda: cache.runs.rows(limit=cache.runs.count())),
+            ("hydrate", hydrate),
+        ]:
+            per_row, held = measure(read)
+            print(f"{name:<12} {per_row * 1e6:>8.1f} {held / 2**20:>10.1f}")
+        cache.db.close()
+
+
+if __name__ == "__main__":
+    main()
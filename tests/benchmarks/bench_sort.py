@@ -0,0 +1,88 @@
+"""Time sorting the runs window in SQLite against sorting rows in Python.
+
+Run with ``python tests/benchmarks/bench_sort.py``. Rows are written straight
+into ``flow_runs`` so a million of them load in seconds. Each sortable
+column is read one window deep from the top and from the middle, the way
+the runs screen reads it; the Python column sorts every row, as
+``DataTable.sort`` did.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from purrr.client.bulk import timestamp, transaction
+from purrr.client.main import SQLiteCache
+from purrr.client.runs import SORTABLE_COLUMNS
+
+STATES = ["Completed", "Failed", "Running", "Scheduled", "Crashed"]
+WINDOW = 250
+
+
+def fill(cache: SQLiteCache, rows: int) -> None:
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    deployments = [str(uuid.uuid4()) for _ in range(50)]
+    with transaction(cache.db):
+        for offset in range(0, rows, 10_000):
+            batch = []
+            for i in range(offset, min(offset + 10_000, rows)):
+                created = start + timedelta(seconds=random.randrange(10**8))
+                batch.append(
+                    (
+                        "{}",
+                        str(uuid.uuid4()),
+                        f"run-{i}",
+                        timestamp(created),
+                        timestamp(created + timedelta(minutes=random.randrange(600))),
+                        random.choice(deployments),
+                        str(uuid.uuid4()),
+                        random.choice(STATES),
+                        random.choice(["default", "gpu", None]),
+                    )
+                )
+            cache.db.executemany(
+                "INSERT INTO flow_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", batch
+            )
+
+
+def timed(call) -> float:
+    start = time.perf_counter()
+    call()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SQLiteCache(str(Path(tmp) / "sort.db"))
+        fill(cache, args.rows)
+        cache.db.execute("ANALYZE")
+        middle = args.rows // 2
+
+        print(f"{'column':<16} {'top ms':>8} {'middle ms':>10} {'python ms':>10}")
+        for column in sorted(SORTABLE_COLUMNS):
+            top = timed(lambda: cache.runs.rows("", 0, WINDOW, column, True))
+            mid = timed(lambda: cache.runs.rows("", middle, WINDOW, column, True))
+            values = [
+                row[0]
+                for row in cache.db.execute(
+                    f"SELECT CAST({column} AS TEXT) FROM flow_runs"
+                )
+            ]
+            python = timed(lambda: sorted(values, key=str, reverse=True))
+            print(
+                f"{column:<16} {top * 1e3:>8.1f} {mid * 1e3:>10.1f} "
+                f"{python * 1e3:>10.1f}"
+            )
+        cache.db.close()
+
+
+if __name__ == "__main__":
+    main()
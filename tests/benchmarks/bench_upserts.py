@@ -0,0 +1,106 @@
+"""Measure cache upsert throughput in rows per second.
+
+Run with ``python tests/benchmarks/bench_upserts.py``. Each cache is written
+to a fresh on-disk SQLite file in pages of ``--page-size`` rows, the way a
+sync writes them.
+"""
+
+import argparse
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import pendulum
+from prefect.client.schemas.objects import FlowRun, Log, State, StateType
+from prefect.client.schemas.responses import DeploymentResponse
+
+from purrr.client.main import SQLiteCache
+
+
+def make_flow_runs(count: int) -> list[FlowRun]:
+    now = pendulum.now("UTC")
+    return [
+        FlowRun(
+            id=uuid.uuid4(),
+            name=f"bench-run-{i}",
+            flow_id=uuid.uuid4(),
+            created=now,  # type: ignore
+            updated=now,  # type: ignore
+            deployment_id=uuid.uuid4(),
+            work_pool_name="bench-pool",
+            state=State(type=StateType.COMPLETED, name="Completed"),
+            state_name="Completed",
+        )
+        for i in range(count)
+    ]
+
+
+def make_deployments(count: int) -> list[DeploymentResponse]:
+    now = pendulum.now("UTC")
+    return [
+        DeploymentResponse(
+            id=uuid.uuid4(),
+            created=now,  # type: ignore
+            updated=now,  # type: ignore
+            name=f"bench-deployment-{i}",
+            flow_id=uuid.uuid4(),
+            work_queue_id=uuid.uuid4(),
+        )
+        for i in range(count)
+    ]
+
+
+def make_logs(count: int) -> list[Log]:
+    now = pendulum.now("UTC")
+    flow_run_id = uuid.uuid4()
+    return [
+        Log(
+            id=uuid.uuid4(),
+            name="bench",
+            level=20,
+            message=f"log line {i}",
+            timestamp=now.add(microseconds=i),  # type: ignore
+            flow_run_id=flow_run_id,
+        )
+        for i in range(count)
+    ]
+
+
+def bench(table: str, rows: list, page_size: int, workdir: Path) -> float:
+    cache = SQLiteCache(str(workdir / f"{table}-{len(rows)}.db"))
+    upsert = getattr(cache, table).upsert
+
+    start = time.perf_counter()
+    for offset in range(0, len(rows), page_size):
+        upsert(rows[offset : offset + page_size])
+    elapsed = time.perf_counter() - start
+
+    cache.db.close()
+    return len(rows) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument("--page-size", type=int, default=200)
+    args = parser.parse_args()
+
+    factories = {
+        "runs": make_flow_runs,
+        "deployments": make_deployments,
+        "logs": make_logs,
+    }
+
+    print(f"{'table':<12} {'rows':>8} {'rows/s':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for table, factory in factories.items():
+            for size in args.sizes:
+                rate = bench(table, factory(size), args.page_size, Path(tmp))
+                print(f"{table:<12} {size:>8} {rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
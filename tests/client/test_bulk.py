@@ -0,0 +1,54 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from purrr.client.bulk import timestamp, transaction, write_rows
+
+
+@pytest.fixture
+def table(db):
+    db.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    db.commit()
+    return db
+
+
+def test_write_rows_inserts_batch(table):
+    written = write_rows(
+        table, "INSERT INTO items VALUES (?, ?)", ((i, f"item-{i}") for i in range(5))
+    )
+
+    assert written == 5
+    assert table.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 5
+    assert not table.in_transaction
+
+
+def test_write_rows_empty_batch(table):
+    assert write_rows(table, "INSERT INTO items VALUES (?, ?)", []) == 0
+
+
+def test_write_rows_rolls_back_whole_batch(table):
+    rows = [(1, "a"), (2, "b"), (1, "duplicate")]
+
+    with pytest.raises(Exception):
+        write_rows(table, "INSERT INTO items VALUES (?, ?)", rows)
+
+    assert table.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 0
+    assert not table.in_transaction
+
+
+def test_nested_transaction_commits_once(table):
+    with transaction(table):
+        write_rows(table, "INSERT INTO items VALUES (?, ?)", [(1, "a")])
+        # The inner write joined the outer transaction instead of committing.
+        assert table.in_transaction
+        write_rows(table, "INSERT INTO items VALUES (?, ?)", [(2, "b")])
+
+    assert not table.in_transaction
+    assert table.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 2
+
+
+def test_timestamp_matches_default_adapter():
+    value = datetime(2024, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+
+    assert timestamp(value) == "2024-01-01 12:00:00.123456+00:00"
+    assert timestamp(None) is None
@@ -0,0 +1,484 @@
+import asyncio
+import importlib.util
+import time
+import uuid
+
+import pytest
+from pendulum import DateTime
+from prefect.client.schemas.objects import Flow, Log, StateType
+from prefect.client.schemas.responses import DeploymentResponse
+from prefect.client.schemas.sorting import DeploymentSort, FlowSort
+
+from prefect.client.orchestration import PrefectClient
+from prefect.exceptions import ObjectNotFound
+
+from conftest import make_run
+from purrr.client.main import (
+    CachingPrefectClient,
+    cache_deployments,
+    httpx_settings,
+)
+from purrr.client.policy import Decision, EntityPolicy
+from purrr.settings import settings
+
+
+def make_deployment(name: str) -> DeploymentResponse:
+    return DeploymentResponse(
+        id=uuid.uuid4(),
+        created=DateTime.now(),  # type: ignore
+        updated=DateTime.now(),  # type: ignore
+        name=name,
+        flow_id=uuid.uuid4(),
+        work_queue_id=uuid.uuid4(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_deployments_by_ids_fetches_misses_in_one_call(client, fake_prefect):
+    fake_prefect.deployments = [make_deployment(f"dep-{i}") for i in range(5)]
+    ids = [d.id for d in fake_prefect.deployments]
+
+    # Every id repeated, as if many runs shared each deployment.
+    result = await client.get_deployments_by_ids(ids * 100)
+
+    assert set(result) == set(ids)
+    assert [name for name, _ in fake_prefect.calls] == ["read_deployments"]
+    assert set(fake_prefect.calls[0][1]["deployment_filter"].id.any_) == set(ids)
+    assert client.cache.deployments.read_many(ids).keys() == set(ids)
+
+
+@pytest.mark.asyncio
+async def test_get_deployments_by_ids_answers_from_cache(client, fake_prefect):
+    cached, missing = make_deployment("cached"), make_deployment("missing")
+    cache_deployments(client.cache, [cached])
+    fake_prefect.deployments = [cached, missing]
+
+    result = await client.get_deployments_by_ids([cached.id, missing.id])
+
+    assert set(result) == {cached.id, missing.id}
+    assert fake_prefect.calls == [("read_deployment", {"deployment_id": missing.id})]
+
+
+@pytest.mark.asyncio
+async def test_get_deployments_by_ids_all_cached(client, fake_prefect):
+    cached = make_deployment("cached")
+    cache_deployments(client.cache, [cached])
+
+    result = await client.get_deployments_by_ids([cached.id])
+
+    assert list(result) == [cached.id]
+    assert fake_prefect.calls == []
+
+
+@pytest.mark.asyncio
+async def test_get_deployments_by_ids_refetches_expired(client, fake_prefect):
+    fresh, expired = make_deployment("fresh"), make_deployment("expired")
+    cache_deployments(client.cache, [fresh])
+    client.cache.entries.touch("deployment", [expired.id], now=time.time() - 3600)
+    client.cache.deployments.upsert([expired])
+    renamed = expired.model_copy(update={"name": "renamed"})
+    fake_prefect.deployments = [fresh, renamed]
+
+    result = await client.get_deployments_by_ids([fresh.id, expired.id])
+
+    assert result[expired.id].name == "renamed"
+    assert result[fresh.id].name == "fresh"
+    assert fake_prefect.calls == [("read_deployment", {"deployment_id": expired.id})]
+
+
+@pytest.mark.asyncio
+async def test_get_deployments_by_ids_skips_unknown(client, fake_prefect):
+    result = await client.get_deployments_by_ids([uuid.uuid4()])
+
+    assert result == {}
+
+
+@pytest.mark.asyncio
+async def test_get_run_serves_terminal_runs_from_cache(client, fake_prefect):
+    flow_run = make_run(state_type=StateType.COMPLETED)
+    fake_prefect.flow_runs = [flow_run]
+
+    await client.get_run(flow_run.id)
+    await client.get_run(flow_run.id)
+
+    assert [name for name, _ in fake_prefect.calls] == ["read_flow_run"]
+    assert client.policy.stats["run"] == {Decision.MISS: 1, Decision.HIT: 1}
+
+
+@pytest.mark.asyncio
+async def test_get_run_refetches_open_runs_after_ttl(client, fake_prefect):
+    flow_run = make_run(state_type=StateType.RUNNING)
+    fake_prefect.flow_runs = [flow_run]
+    client.policy.policies["run"] = EntityPolicy(ttl=60, stale_ttl=60, negative_ttl=60)
+    await client.get_run(flow_run.id)
+
+    # Within the TTL the cache answers.
+    assert await client.get_run(flow_run.id) is not None
+    assert len(fake_prefect.calls) == 1
+
+    # Past it, the cached run is served while a refresh runs behind it.
+    client.policy.clock = lambda: time.time() + 90
+    assert await client.get_run(flow_run.id) is not None
+    await asyncio.gather(*client._refreshing.values())
+    assert len(fake_prefect.calls) == 2
+
+    # Past the stale window, the caller waits for the API.
+    client.policy.clock = lambda: time.time() + 150
+    await client.get_run(flow_run.id)
+    assert len(fake_prefect.calls) == 3
+    assert client.policy.stats["run"] == {
+        Decision.MISS: 2,
+        Decision.HIT: 1,
+        Decision.STALE: 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_missing_objects_are_negatively_cached(client, fake_prefect):
+    run_id, deployment_id = uuid.uuid4(), uuid.uuid4()
+
+    for _ in range(3):
+        assert await client.get_run(run_id) is None
+        with pytest.raises(ObjectNotFound):
+            await client.get_deployment_by_id(deployment_id)
+        assert await client.get_deployments_by_ids([deployment_id]) == {}
+
+    assert [name for name, _ in fake_prefect.calls] == [
+        "read_flow_run",
+        "read_deployment",
+    ]
+    assert client.policy.stats["run"][Decision.NEGATIVE] == 2
+
+
+@pytest.mark.asyncio
+async def test_get_deployment_by_id_uses_cache_within_ttl(client, fake_prefect):
+    deployment = make_deployment("dep")
+    fake_prefect.deployments = [deployment]
+
+    first = await client.get_deployment_by_id(deployment.id)
+    second = await client.get_deployment_by_id(deployment.id)
+    refreshed = await client.get_deployment_by_id(deployment.id, force_refresh=True)
+
+    assert first.id == second.id == refreshed.id
+    assert [name for name, _ in fake_prefect.calls] == [
+        "read_deployment",
+        "read_deployment",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_requests(client, fake_prefect):
+    fake_prefect.deployments = [make_deployment(f"dep-{i}") for i in range(5)]
+    flow_run = make_run(state_type=StateType.RUNNING)
+    fake_prefect.flow_runs = [flow_run]
+    # Wide enough that a loaded machine still gets every lookup into one batch.
+    client._deployment_batcher.window = client._run_batcher.window = 0.5
+
+    # A burst of lookups, as when many rows resolve their deployment at once.
+    deployments = await asyncio.gather(
+        *(
+            client.get_deployment_by_id(deployment.id)
+            for deployment in fake_prefect.deployments * 20
+        )
+    )
+    runs = await asyncio.gather(*(client.get_run(flow_run.id) for _ in range(20)))
+
+    assert {d.id for d in deployments} == {d.id for d in fake_prefect.deployments}
+    assert all(run.id == flow_run.id for run in runs)
+    assert [name for name, _ in fake_prefect.calls] == [
+        "read_deployments",
+        "read_flow_run",
+    ]
+
+
+def test_httpx_settings_pool_connections():
+    http = httpx_settings()
+
+    assert http["limits"].max_connections == settings.http_max_connections
+    assert http["limits"].keepalive_expiry == settings.http_keepalive_expiry
+    # HTTP/2 only when httpx can actually speak it.
+    assert http["http2"] == (importlib.util.find_spec("h2") is not None)
+
+
+@pytest.mark.asyncio
+async def test_open_starts_one_pool_for_the_app():
+    prefect = PrefectClient("http://127.0.0.1:9/api", httpx_settings=httpx_settings())
+    client = CachingPrefectClient(db_name=":memory:", client=prefect)
+
+    await client.open()
+    await client.open()
+    assert prefect._started and not prefect._closed
+
+    await client.aclose()
+    assert prefect._closed
+
+
+@pytest.mark.asyncio
+async def test_get_deployments_syncs_only_changes(client, fake_prefect, monkeypatch):
+    monkeypatch.setattr(settings, "page_size", 5)
+    now = DateTime.now("UTC")
+    fake_prefect.deployments = [
+        make_deployment(f"dep-{i:02}").model_copy(
+            update={"updated": now.subtract(hours=i + 2)}
+        )
+        for i in range(30)
+    ]
+
+    first = await client.get_deployments()
+    assert [d.name for d in first] == sorted(d.name for d in fake_prefect.deployments)
+
+    fake_prefect.calls.clear()
+    fake_prefect.deployments[10] = fake_prefect.deployments[10].model_copy(
+        update={"name": "renamed", "updated": now}
+    )
+    fake_prefect.deployments.append(make_deployment("added"))
+    second = await client.get_deployments()
+
+    names = {d.name for d in second}
+    assert {"renamed", "added"} <= names and "dep-10" not in names
+    assert len(second) == 31
+    # Newest first, stopping well short of the 31 deployments.
+    assert {call["sort"] for _, call in fake_prefect.calls} == {
+        DeploymentSort.UPDATED_DESC
+    }
+    assert max(call["offset"] for _, call in fake_prefect.calls) < 15
+
+
+@pytest.mark.asyncio
+async def test_full_deployment_sync_drops_deleted(client, fake_prefect):
+    fake_prefect.deployments = [make_deployment(f"dep-{i}") for i in range(3)]
+    await client.get_deployments()
+
+    del fake_prefect.deployments[1]
+    deployments = await client.get_deployments(full_refresh=True)
+
+    assert [d.name for d in deployments] == ["dep-0", "dep-2"]
+
+
+@pytest.mark.asyncio
+async def test_get_flow_names_in_one_call(client, fake_prefect):
+    fake_prefect.flows = [Flow(id=uuid.uuid4(), name=f"flow-{i}") for i in range(4)]
+    ids = [flow.id for flow in fake_prefect.flows]
+
+    names = await client.get_flow_names(ids * 10 + [None])
+
+    assert names == {flow.id: flow.name for flow in fake_prefect.flows}
+    assert [name for name, _ in fake_prefect.calls] == ["read_flows"]
+
+
+@pytest.mark.asyncio
+async def test_get_flows_syncs_only_changes(client, fake_prefect, monkeypatch):
+    monkeypatch.setattr(settings, "page_size", 5)
+    now = DateTime.now("UTC")
+    fake_prefect.flows = [
+        Flow(id=uuid.uuid4(), name=f"flow-{i:02}", updated=now.subtract(hours=i + 2))
+        for i in range(30)
+    ]
+
+    first = await client.get_flows()
+    assert [f.name for f in first] == sorted(f.name for f in fake_prefect.flows)
+
+    fake_prefect.calls.clear()
+    fake_prefect.flows.append(Flow(id=uuid.uuid4(), name="added", updated=now))
+    second = await client.get_flows()
+
+    assert len(second) == 31
+    assert {call["sort"] for _, call in fake_prefect.calls} == {FlowSort.UPDATED_DESC}
+    assert max(call["offset"] for _, call in fake_prefect.calls) < 15
+
+
+@pytest.mark.asyncio
+async def test_get_flow_names_from_cache(client, fake_prefect):
+    fake_prefect.flows = [Flow(id=uuid.uuid4(), name=f"flow-{i}") for i in range(2)]
+    await client.get_flows()
+    fake_prefect.calls.clear()
+
+    names = await client.get_flow_names([flow.id for flow in fake_prefect.flows])
+
+    assert names == {flow.id: flow.name for flow in fake_prefect.flows}
+    assert fake_prefect.calls == []
+
+
+def make_logs(flow_run_id, start: int, count: int, base: DateTime) -> list[Log]:
+    return [
+        Log(
+            name="flow",
+            level=20,
+            message=f"line {i}",
+            timestamp=base.add(seconds=i),  # type: ignore
+            flow_run_id=flow_run_id,
+        )
+        for i in range(start, start + count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_logs_pages_through_everything(client, fake_prefect):
+    run = make_run(state_type=StateType.RUNNING)
+    fake_prefect.logs = make_logs(run.id, 0, 450, DateTime.now())
+
+    logs = await client.get_logs(run.id)
+
+    assert logs.splitlines() == [f"line {i}" for i in range(450)]
+    assert len(client.cache.logs.flow_run(run.id)) == 450
+
+
+@pytest.mark.asyncio
+async def test_get_logs_only_fetches_newer_logs(client, fake_prefect):
+    run = make_run(state_type=StateType.RUNNING)
+    base = DateTime.now()
+    fake_prefect.logs = make_logs(run.id, 0, 10, base)
+    await client.get_logs(run.id)
+    fake_prefect.calls.clear()
+
+    fake_prefect.logs += make_logs(run.id, 10, 5, base)
+    logs = await client.get_logs(run.id)
+
+    assert logs.splitlines() == [f"line {i}" for i in range(15)]
+    log_filter = fake_prefect.calls[0][1]["log_filter"]
+    assert log_filter.timestamp.after_ == base.add(seconds=9)
+
+
+@pytest.mark.asyncio
+async def test_get_logs_of_finished_run_is_served_from_cache(client, fake_prefect):
+    run = make_run(state_type=StateType.COMPLETED)
+    client.cache.runs.upsert([run])
+    fake_prefect.logs = make_logs(run.id, 0, 3, DateTime.now())
+    await client.get_logs(run.id)
+    fake_prefect.calls.clear()
+
+    logs = await client.get_logs(str(run.id))
+
+    assert logs.splitlines() == ["line 0", "line 1", "line 2"]
+    assert fake_prefect.calls == []
+
+
+@pytest.mark.asyncio
+async def test_get_logs_of_running_run_keeps_checking(client, fake_prefect):
+    run = make_run(state_type=StateType.RUNNING)
+    client.cache.runs.upsert([run])
+    await client.get_logs(run.id)
+    fake_prefect.calls.clear()
+
+    await client.get_logs(run.id)
+
+    assert [name for name, _ in fake_prefect.calls] == ["read_logs"]
+
+
+@pytest.mark.asyncio
+async def test_get_logs_rejects_both_ids(client):
+    with pytest.raises(ValueError):
+        await client.get_logs(uuid.uuid4(), uuid.uuid4())
+
+
+@pytest.mark.asyncio
+async def test_tail_logs_follows_run_until_it_finishes(client, fake_prefect):
+    run = make_run(state_type=StateType.RUNNING)
+    base = DateTime.now()
+    fake_prefect.flow_runs = [run]
+    fake_prefect.logs = make_logs(run.id, 0, 3, base)
+    await client.get_logs(run.id)
+    shown = client.cache.logs.flow_run(run.id)[-1]
+
+    polls = 0
+    read_flow_run = fake_prefect.read_flow_run
+
+    async def advancing_read_flow_run(flow_run_id):
+        # Each poll the run writes two more lines; on the third it finishes.
+        nonlocal polls
+        polls += 1
+        fake_prefect.logs += make_logs(run.id, 1 + polls * 2, 2, base)
+        if polls == 3:
+            fake_prefect.flow_runs = [
+                run.model_copy(update={"state_type": StateType.COMPLETED})
+            ]
+        return await read_flow_run(flow_run_id)
+
+    fake_prefect.read_flow_run = advancing_read_flow_run
+
+    batches = [
+        batch
+        async for batch in client.tail_logs(
+            run.id, interval=0, batch_size=3, after=(shown["timestamp"], shown["rowid"])
+        )
+    ]
+
+    assert polls == 3
+    assert [line for batch in batches for line in batch] == [
+        f"line {i}" for i in range(3, 9)
+    ]
+    assert all(len(batch) <= 3 for batch in batches)
+    assert client.cache.is_complete(f"get_logs[{run.id}]")
+
+
+@pytest.mark.asyncio
+async def test_tail_logs_splits_backlog_into_batches(client, fake_prefect):
+    run = make_run(state_type=StateType.COMPLETED)
+    fake_prefect.flow_runs = [run]
+    fake_prefect.logs = make_logs(run.id, 0, 7, DateTime.now())
+
+    batches = [
+        batch async for batch in client.tail_logs(run.id, interval=0, batch_size=3)
+    ]
+
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+
+
+@pytest.mark.asyncio
+async def test_tail_logs_yields_lines_another_writer_cached(client, fake_prefect):
+    run = make_run(state_type=StateType.COMPLETED)
+    fake_prefect.flow_runs = [run]
+    fake_prefect.logs = make_logs(run.id, 0, 3, DateTime.now())
+    # Line 0 is on screen; another process then cached line 1.
+    client.cache.logs.upsert(fake_prefect.logs[:2])
+    shown = client.cache.logs.flow_run(run.id)[0]
+
+    batches = [
+        batch
+        async for batch in client.tail_logs(
+            run.id, interval=0, after=(shown["timestamp"], shown["rowid"])
+        )
+    ]
+
+    assert [line for batch in batches for line in batch] == ["line 1", "line 2"]
+
+
+@pytest.mark.asyncio
+async def test_tail_logs_stops_for_missing_run(client, fake_prefect):
+    batches = [batch async for batch in client.tail_logs(uuid.uuid4(), interval=0)]
+
+    assert batches == []
+
+
+@pytest.mark.asyncio
+async def test_warm_run_makes_the_detail_view_local(client, fake_prefect):
+    deployment = make_deployment("nightly")
+    run = make_run(state_type=StateType.COMPLETED).model_copy(
+        update={"deployment_id": deployment.id}
+    )
+    fake_prefect.flow_runs = [run]
+    fake_prefect.deployments = [deployment]
+    fake_prefect.logs = make_logs(run.id, 0, 5, DateTime.now())
+
+    await client.warm_run(str(run.id))
+    fake_prefect.calls.clear()
+
+    assert (await client.get_run(run.id)).id == run.id
+    assert (await client.get_deployment_by_id(deployment.id)).name == "nightly"
+    assert len((await client.get_logs(run.id)).splitlines()) == 5
+    assert fake_prefect.calls == []
+
+
+@pytest.mark.asyncio
+async def test_warm_run_fetches_one_page_of_logs(client, fake_prefect, monkeypatch):
+    monkeypatch.setattr(settings, "page_size", 10)
+    run = make_run(state_type=StateType.COMPLETED)
+    fake_prefect.flow_runs = [run]
+    fake_prefect.logs = make_logs(run.id, 0, 25, DateTime.now())
+
+    await client.warm_run(run.id)
+
+    assert [name for name, _ in fake_prefect.calls].count("read_logs") == 1
+    assert len(client.cache.logs.flow_run(run.id)) == 10
+    # The rest are fetched when the logs are actually read.
+    assert len((await client.get_logs(run.id)).splitlines()) == 25
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from purrr.client.coalesce import MicroBatcher, SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_one_call():
+    calls = 0
+    release = asyncio.Event()
+
+    async def call() -> int:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return 42
+
+    flights = SingleFlight()
+    waiting = [asyncio.ensure_future(flights.do("key", call)) for _ in range(10)]
+    await asyncio.sleep(0)
+    assert flights.in_flight("key")
+
+    release.set()
+    assert await asyncio.gather(*waiting) == [42] * 10
+    assert calls == 1
+    assert not flights.in_flight("key")
+
+
+@pytest.mark.asyncio
+async def test_single_flight_survives_a_cancelled_caller():
+    release = asyncio.Event()
+
+    async def call() -> str:
+        await release.wait()
+        return "done"
+
+    flights = SingleFlight()
+    first = asyncio.ensure_future(flights.do("key", call))
+    second = asyncio.ensure_future(flights.do("key", call))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == "done"
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_merges_lookups():
+    batches = []
+
+    async def fetch_many(keys: list[int]) -> dict[int, str]:
+        batches.append(sorted(keys))
+        return {key: f"value-{key}" for key in keys if key != 3}
+
+    batcher = MicroBatcher(fetch_many, window=0.01, max_batch=4)
+    results = await asyncio.gather(*(batcher.get(key) for key in [1, 2, 2, 3, 4, 5]))
+
+    assert results == ["value-1", "value-2", "value-2", None, "value-4", "value-5"]
+    # A full batch goes at once, the rest when the window ends.
+    assert batches == [[1, 2, 3, 4], [5]]
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_fails_the_whole_batch():
+    async def fetch_many(keys: list[int]) -> dict[int, str]:
+        raise RuntimeError("down")
+
+    batcher = MicroBatcher(fetch_many, window=0.01, max_batch=10)
+    results = await asyncio.gather(
+        batcher.get(1), batcher.get(2), return_exceptions=True
+    )
+
+    assert [str(result) for result in results] == ["down", "down"]
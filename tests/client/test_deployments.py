@@ -3,6 +3,8 @@ import uuid
 import pytest
 
 from purrr.client.deployments import DeploymentCache
+from purrr.client.main import SQLiteCache
+from prefect.client.schemas.objects import Flow
 from prefect.client.schemas.responses import DeploymentResponse
 from pendulum import DateTime
 
@@ -102,3 +104,41 @@ def test_upsert_updates_existing_deployment(deployment_cache, sample_deployment)
     assert result.name == "updated-name"
     assert result.paused is True
     assert result.work_pool_name == "new-pool"
+
+
+def test_read_many_returns_only_cached(deployment_cache, sample_deployment):
+    deployment_cache.upsert([sample_deployment])
+    missing_id = uuid.uuid4()
+
+    result = deployment_cache.read_many(
+        [sample_deployment.id, str(sample_deployment.id), missing_id]
+    )
+
+    assert list(result) == [sample_deployment.id]
+    assert result[sample_deployment.id].name == sample_deployment.name
+
+
+def test_read_many_empty(deployment_cache):
+    assert deployment_cache.read_many([]) == {}
+
+
+def test_read_all_sorts_in_the_cache(sample_deployment):
+    cache = SQLiteCache(":memory:")
+    zeta, alpha = Flow(id=uuid.uuid4(), name="zeta"), Flow(id=uuid.uuid4(), name="a")
+    cache.flows.upsert([zeta, alpha])
+    cache.deployments.upsert(
+        [
+            sample_deployment.model_copy(
+                update={"id": uuid.uuid4(), "name": "b", "flow_id": alpha.id}
+            ),
+            sample_deployment.model_copy(
+                update={"id": uuid.uuid4(), "name": "a", "flow_id": zeta.id}
+            ),
+        ]
+    )
+
+    assert [d.name for d in cache.deployments.read_all()] == ["a", "b"]
+    assert [d.name for d in cache.deployments.read_all("flow_name")] == ["b", "a"]
+    assert [d.name for d in cache.deployments.read_all("name", True)] == ["b", "a"]
+    with pytest.raises(ValueError, match="Can't sort"):
+        cache.deployments.read_all("data")
@@ -0,0 +1,177 @@
+import asyncio
+import json
+import uuid
+from datetime import timedelta
+
+import pendulum
+import pytest
+import pytest_asyncio
+from prefect.client.schemas.objects import FlowRun, StateType
+from prefect.events.schemas.events import Event, Resource
+from websockets.asyncio.server import serve
+
+from conftest import make_run
+from purrr.client.events import RunEventsListener, flow_run_id
+
+
+class EventsStandIn:
+    """A local websocket server speaking Prefect's ``/events/out`` protocol."""
+
+    def __init__(self):
+        self.events: asyncio.Queue[Event | None] = asyncio.Queue()
+        self.connections = 0
+        self.filters: list[dict] = []
+
+    async def handler(self, websocket) -> None:
+        self.connections += 1
+        auth = json.loads(await websocket.recv())
+        assert auth["type"] == "auth"
+        await websocket.send(json.dumps({"type": "auth_success"}))
+        self.filters.append(json.loads(await websocket.recv())["filter"])
+
+        closed = asyncio.ensure_future(websocket.wait_closed())
+        while True:
+            next_event = asyncio.ensure_future(self.events.get())
+            await asyncio.wait(
+                [next_event, closed], return_when=asyncio.FIRST_COMPLETED
+            )
+            if not next_event.done():
+                # The server is shutting down; don't hold it open.
+                next_event.cancel()
+                return
+            event = next_event.result()
+            if event is None:
+                # Drop the connection, as a load balancer would.
+                await websocket.close(code=1011)
+                return
+            await websocket.send(
+                json.dumps({"type": "event", "event": event.model_dump(mode="json")})
+            )
+
+
+@pytest_asyncio.fixture
+async def events_server():
+    stand_in = EventsStandIn()
+    async with serve(stand_in.handler, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        stand_in.api_url = f"http://127.0.0.1:{port}/api"
+        yield stand_in
+
+
+def state_event(run: FlowRun, state: str) -> Event:
+    return Event(
+        occurred=pendulum.now("UTC"),
+        event=f"prefect.flow-run.{state}",
+        resource=Resource({"prefect.resource.id": f"prefect.flow-run.{run.id}"}),
+        id=uuid.uuid4(),
+    )
+
+
+async def wait_for(predicate, timeout: float = 5.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not predicate():
+            await asyncio.sleep(0.01)
+
+
+def test_flow_run_id():
+    run_id = uuid.uuid4()
+    event = Event(
+        occurred=pendulum.now("UTC"),
+        event="prefect.flow-run.Running",
+        resource=Resource({"prefect.resource.id": f"prefect.flow-run.{run_id}"}),
+        id=uuid.uuid4(),
+    )
+    assert flow_run_id(event) == run_id
+
+    event.resource = Resource({"prefect.resource.id": "prefect.deployment.x"})
+    assert flow_run_id(event) is None
+
+
+@pytest.mark.asyncio
+async def test_state_events_update_cache_and_notify(
+    client, fake_prefect, events_server
+):
+    running = make_run(state_type=StateType.RUNNING)
+    client.cache.runs.upsert([running])
+    finished = running.model_copy(
+        update={"state_type": StateType.COMPLETED, "state_name": "Completed"}
+    )
+    fake_prefect.flow_runs = [finished]
+
+    updates: list[list[FlowRun]] = []
+    listener = RunEventsListener(
+        client,
+        on_runs_updated=updates.append,
+        api_url=events_server.api_url,
+        debounce=0.05,
+    )
+    task = asyncio.create_task(listener.run())
+    try:
+        await wait_for(listener.connected.is_set)
+        for state in ["Completing", "Completed"]:
+            await events_server.events.put(state_event(running, state))
+
+        await wait_for(lambda: updates)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    assert [run.id for run in updates[0]] == [running.id]
+    assert client.cache.runs.read(running.id).state_name == "Completed"
+    # Both events landed in one debounce window, so the run was fetched once.
+    assert [name for name, _ in fake_prefect.calls] == ["read_flow_runs"]
+    assert events_server.filters[0]["event"]["prefix"] == ["prefect.flow-run."]
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_is_retried(client, fake_prefect):
+    running = make_run(state_type=StateType.RUNNING)
+    fake_prefect.flow_runs = [running]
+    read_flow_runs = fake_prefect.read_flow_runs
+    failures = [RuntimeError("API down")]
+
+    async def flaky_read_flow_runs(*args, **kwargs):
+        if failures:
+            raise failures.pop()
+        return await read_flow_runs(*args, **kwargs)
+
+    fake_prefect.read_flow_runs = flaky_read_flow_runs
+    updates: list[list[FlowRun]] = []
+    listener = RunEventsListener(client, on_runs_updated=updates.append, debounce=0.01)
+
+    listener._queue(running.id)
+    await wait_for(lambda: updates)
+
+    assert [run.id for run in updates[0]] == [running.id]
+    assert client.cache.runs.read(running.id) is not None
+
+
+@pytest.mark.asyncio
+async def test_reconnects_and_backfills_after_gap(client, fake_prefect, events_server):
+    running = make_run(state_type=StateType.RUNNING)
+    client.cache.runs.upsert([running])
+    fake_prefect.flow_runs = [
+        running.model_copy(update={"state_type": StateType.FAILED})
+    ]
+
+    updates: list[list[FlowRun]] = []
+    listener = RunEventsListener(
+        client,
+        on_runs_updated=updates.append,
+        api_url=events_server.api_url,
+        replay_window=timedelta(0),
+    )
+    task = asyncio.create_task(listener.run())
+    try:
+        await wait_for(listener.connected.is_set)
+        await events_server.events.put(None)
+
+        await wait_for(lambda: events_server.connections == 2 and updates)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    # The backfill asked for the runs the cache still had open.
+    backfill_filter = fake_prefect.calls[0][1]["flow_run_filter"]
+    assert backfill_filter.id.any_ == [running.id]
+    assert client.cache.runs.read(running.id).state_type == StateType.FAILED
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import time
+import uuid
+
+import pytest
+
+from conftest import make_run
+from purrr.client.executor import CacheExecutor
+from purrr.client.main import SQLiteCache
+
+# One frame at 60 FPS.
+FRAME_BUDGET = 0.016
+
+
+@pytest.fixture
+def executor(tmp_path):
+    executor = CacheExecutor(SQLiteCache(str(tmp_path / "cache.db")), readers=2)
+    yield executor
+    executor.close()
+
+
+def hold_writer(executor: CacheExecutor) -> threading.Event:
+    """Park the writer thread until the returned event is set."""
+    release = threading.Event()
+    asyncio.ensure_future(executor.write(lambda cache: release.wait()))
+    return release
+
+
+@pytest.mark.asyncio
+async def test_reads_see_writes_from_another_connection(executor):
+    run = make_run()
+
+    await executor.write(lambda cache: cache.runs.upsert([run]))
+    read = await executor.read(
+        lambda cache: (cache.runs.read(run.id), threading.current_thread().name)
+    )
+
+    cached, thread_name = read
+    assert cached.id == run.id
+    assert thread_name.startswith("purrr-cache-reader")
+
+
+@pytest.mark.asyncio
+async def test_in_memory_reads_share_the_writer():
+    executor = CacheExecutor(SQLiteCache(":memory:"))
+    run = make_run()
+
+    await executor.write(lambda cache: cache.runs.upsert([run]))
+    thread_name = await executor.read(lambda cache: threading.current_thread().name)
+
+    assert executor.shares_connection
+    assert thread_name == "purrr-cache-writer"
+    executor.close()
+
+
+@pytest.mark.asyncio
+async def test_queued_writes_share_a_transaction(executor):
+    release = hold_writer(executor)
+    await asyncio.sleep(0.05)
+    runs = [make_run(f"run-{i}") for i in range(10)]
+    writes = [
+        asyncio.ensure_future(
+            executor.write(lambda cache, run=run: cache.runs.upsert([run]))
+        )
+        for run in runs
+    ]
+    # Writes queued behind the held one are applied inside a single open
+    # transaction, not committed one by one.
+    totals = [
+        asyncio.ensure_future(executor.write(lambda cache: cache.db.in_transaction))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0.05)
+    release.set()
+
+    await asyncio.gather(*writes)
+    assert await asyncio.gather(*totals) == [True, True, True]
+    cached = await executor.read(lambda cache: cache.runs.read_all())
+    assert {run.id for run in cached} == {run.id for run in runs}
+
+
+@pytest.mark.asyncio
+async def test_failing_write_does_not_roll_back_its_batch(executor):
+    kept, broken = make_run("kept"), make_run("broken")
+
+    def fail(cache):
+        cache.runs.upsert([broken])
+        raise RuntimeError("boom")
+
+    release = hold_writer(executor)
+    await asyncio.sleep(0.05)
+    first = asyncio.ensure_future(
+        executor.write(lambda cache: cache.runs.upsert([kept]))
+    )
+    second = asyncio.ensure_future(executor.write(fail))
+    await asyncio.sleep(0.05)
+    release.set()
+
+    await first
+    with pytest.raises(RuntimeError, match="boom"):
+        await second
+    assert await executor.read(lambda cache: cache.runs.read(kept.id)) is not None
+    assert await executor.read(lambda cache: cache.runs.read(broken.id)) is None
+
+
+@pytest.mark.asyncio
+async def test_event_loop_keeps_frame_rate_during_large_sync(executor):
+    """A 100k-row sync must not stall the event loop for longer than a frame."""
+    template = make_run()
+    pages, page_size = 50, 2_000
+
+    # Built before the sync starts: the API client builds runs on the event
+    # loop, so only the writes to the cache are under test here.
+    pages_of_runs = [
+        [template.model_copy(update={"id": uuid.uuid4()}) for _ in range(page_size)]
+        for _ in range(pages)
+    ]
+
+    def write_page(cache: SQLiteCache) -> None:
+        cache.runs.upsert(pages_of_runs.pop())
+
+    stalls = []
+    syncing = True
+
+    async def heartbeat() -> None:
+        last = time.perf_counter()
+        while syncing:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stalls.append(now - last - 0.001)
+            last = now
+
+    ticker = asyncio.ensure_future(heartbeat())
+    await asyncio.gather(*(executor.write(write_page) for _ in range(pages)))
+    syncing = False
+    await ticker
+
+    count = await executor.read(
+        lambda cache: cache.db.execute("SELECT COUNT(*) FROM flow_runs").fetchone()[0]
+    )
+    assert count == pages * page_size
+    assert max(stalls) < FRAME_BUDGET
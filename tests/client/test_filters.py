@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from prefect.client.schemas.objects import StateType
+
+from conftest import make_run
+from purrr.client.filters import FilterError, compile_filter
+from purrr.client.runs import RunsCache
+
+NOW = datetime(2024, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def runs_cache(db):
+    cache = RunsCache(db)
+    cache.upsert(
+        [
+            make_run(
+                "nightly-etl", StateType.FAILED, NOW - timedelta(hours=1), tags=["prod"]
+            ),
+            make_run(
+                "nightly-report",
+                StateType.COMPLETED,
+                NOW - timedelta(hours=3),
+                tags=["prod"],
+            ),
+            make_run(
+                "adhoc", StateType.FAILED, NOW - timedelta(hours=30), tags=["dev"]
+            ),
+            make_run(
+                "backfill",
+                StateType.RUNNING,
+                NOW - timedelta(hours=1),
+                work_pool_name="gpu",
+            ),
+        ]
+    )
+    return cache
+
+
+def names(runs_cache: RunsCache, query: str) -> set[str]:
+    where, params = compile_filter(query, now=NOW)
+    rows = runs_cache.db.execute(
+        f"SELECT name FROM flow_runs WHERE {where}", params
+    ).fetchall()
+    return {row[0] for row in rows}
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("state = Failed", {"nightly-etl", "adhoc"}),
+        ("state_type = failed", {"nightly-etl", "adhoc"}),
+        ("created > -2h", {"nightly-etl", "backfill"}),
+        ("state = Failed and created > -2h", {"nightly-etl"}),
+        ("work_pool in (gpu, other)", {"backfill"}),
+        ("state not in (Failed, Running)", {"nightly-report"}),
+        ("name ~ nightly", {"nightly-etl", "nightly-report"}),
+        ("created between -4h and -2h", {"nightly-report"}),
+        ("created < 2024-06-01", {"adhoc"}),
+        ("tag = prod", {"nightly-etl", "nightly-report"}),
+        ("tag != prod", {"adhoc", "backfill"}),
+        ("tag not in (prod, dev)", {"backfill"}),
+        ("state = Running or (tag = dev and state = Failed)", {"backfill", "adhoc"}),
+        ("NAME = 'adhoc' OR name = \"backfill\"", {"adhoc", "backfill"}),
+        ("", {"nightly-etl", "nightly-report", "adhoc", "backfill"}),
+    ],
+)
+def test_filters_match(runs_cache, query, expected):
+    assert names(runs_cache, query) == expected
+
+
+def test_values_are_parameters():
+    where, params = compile_filter('name = "x\' OR 1=1 --"')
+
+    assert where == "name = ?"
+    assert params == ["x' OR 1=1 --"]
+
+
+def test_like_wildcards_are_literal(runs_cache):
+    assert names(runs_cache, "name ~ '%'") == set()
+
+
+@pytest.mark.parametrize(
+    "query, message",
+    [
+        ("raw_json = x", "Unknown field 'raw_json'"),
+        ("state = Failed; DROP TABLE flow_runs", "Unexpected 'DROP'"),
+        ("state =", "Expected a value at the end"),
+        ("state Failed", "Expected a comparison but found 'Failed'"),
+        ("(state = Failed", r"Expected '\)' at the end"),
+        ("created > yesterday", "'yesterday' isn't a time"),
+        ("tag > prod", "Tags can only be compared"),
+        ("name = 'open", "Unexpected character"),
+        ("state = Failed state = Running", "Unexpected 'state'"),
+    ],
+)
+def test_rejects_bad_filters(query, message):
+    with pytest.raises(FilterError, match=message):
+        compile_filter(query)
@@ -0,0 +1,103 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from prefect.client.schemas.objects import Flow, FlowRun
+
+from conftest import make_run
+from purrr.client.main import SQLiteCache
+
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def cache():
+    return SQLiteCache(":memory:")
+
+
+def make_flow(name: str, tags: list[str] | None = None) -> Flow:
+    return Flow(id=uuid.uuid4(), name=name, tags=tags or [], created=NOW, updated=NOW)
+
+
+def run_of(flow: Flow, minutes: int, state: str) -> FlowRun:
+    return make_run(
+        f"{flow.name}-{minutes}",
+        created=NOW + timedelta(minutes=minutes),
+        flow_id=flow.id,
+        state_name=state,
+    )
+
+
+def test_upsert_and_read(cache):
+    flow = make_flow("etl", ["prod"])
+    cache.flows.upsert([flow])
+
+    assert cache.flows.read(flow.id) == flow
+    assert cache.flows.read(uuid.uuid4()) is None
+    assert not cache.flows.is_empty()
+
+
+def test_summaries_roll_up_cached_runs(cache):
+    etl, report, idle = make_flow("etl", ["prod"]), make_flow("report"), make_flow("a")
+    cache.flows.upsert([etl, report, idle])
+    cache.runs.upsert(
+        [
+            run_of(etl, 1, "Completed"),
+            run_of(etl, 3, "Failed"),
+            run_of(etl, 2, "Completed"),
+            run_of(report, 5, "Running"),
+        ]
+    )
+
+    summaries = {summary.name: summary for summary in cache.flows.summaries()}
+
+    assert [s.name for s in cache.flows.summaries()] == ["a", "etl", "report"]
+    assert summaries["etl"].run_count == 3
+    assert summaries["etl"].last_run_state == "Failed"
+    assert summaries["etl"].tags == ["prod"]
+    assert summaries["report"].run_count == 1
+    assert summaries["report"].last_run_state == "Running"
+    assert summaries["a"].run_count == 0
+    assert summaries["a"].last_run_state is None
+
+
+def test_names_and_retain(cache):
+    flows = [make_flow(f"flow-{i}") for i in range(3)]
+    cache.flows.upsert(flows)
+
+    assert cache.flows.names([flows[0].id, uuid.uuid4()]) == {flows[0].id: "flow-0"}
+    assert cache.flows.retain([flows[0].id, flows[2].id]) == 1
+    assert [flow.name for flow in cache.flows.read_all()] == ["flow-0", "flow-2"]
+
+
+def test_summary_of_one_flow(cache):
+    etl, other = make_flow("etl"), make_flow("other")
+    cache.flows.upsert([etl, other])
+    cache.runs.upsert([run_of(etl, 1, "Completed"), run_of(other, 2, "Failed")])
+
+    summary = cache.flows.summary(etl.id)
+
+    assert (summary.name, summary.run_count, summary.last_run_state) == (
+        "etl",
+        1,
+        "Completed",
+    )
+    assert cache.flows.summary(uuid.uuid4()) is None
+
+
+def test_summaries_sort_in_the_cache(cache):
+    busy, quiet = make_flow("busy"), make_flow("quiet")
+    cache.flows.upsert([busy, quiet])
+    cache.runs.upsert([run_of(busy, i, "Completed") for i in range(10)])
+    cache.runs.upsert([run_of(quiet, i, "Failed") for i in range(9)])
+
+    by_runs = cache.flows.summaries("run_count", descending=True)
+
+    # Compared as numbers, so 10 sorts above 9.
+    assert [s.name for s in by_runs] == ["busy", "quiet"]
+    assert [s.name for s in cache.flows.summaries("last_run_state")] == [
+        "busy",
+        "quiet",
+    ]
+    with pytest.raises(ValueError, match="Can't sort"):
+        cache.flows.summaries("data")
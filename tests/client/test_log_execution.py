@@ -1,4 +1,5 @@
-from datetime import datetime
+from datetime import datetime, timezone
+import sqlite3
 import pytest
 from freezegun import freeze_time
 from purrr.client.main import SQLiteCache
@@ -107,3 +108,76 @@ def test_log_execution_exact_timestamp(db_cache):
     ).fetchone()
 
     assert result["time_executed"] == datetime(2024, 1, 1, 12, 0, 0)
+
+
+def test_high_water_mark_round_trip(db_cache):
+    """Test that a stored high-water mark reads back as the same datetime."""
+    assert db_cache.get_high_water_mark("get_runs[*]") is None
+
+    mark = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    db_cache.set_high_water_mark("get_runs[*]", mark)
+
+    assert db_cache.get_high_water_mark("get_runs[*]") == mark
+
+
+def test_high_water_mark_only_moves_forward(db_cache):
+    """Test that an older mark doesn't rewind the stored one."""
+    newer = datetime(2024, 1, 2, tzinfo=timezone.utc)
+    db_cache.set_high_water_mark("get_runs[*]", newer)
+    db_cache.set_high_water_mark(
+        "get_runs[*]", datetime(2024, 1, 1, tzinfo=timezone.utc)
+    )
+
+    assert db_cache.get_high_water_mark("get_runs[*]") == newer
+
+
+def test_log_execution_keeps_high_water_mark(db_cache):
+    """Test that logging an execution doesn't wipe a mark stored on the same key."""
+    mark = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    db_cache.set_high_water_mark("get_runs", mark)
+    db_cache.log_execution("get_runs", True)
+
+    assert db_cache.get_high_water_mark("get_runs") == mark
+
+
+def test_metadata_migrates_old_schema(tmp_path):
+    """Test that a cache file created before high-water marks gains the column."""
+    db_path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """
+        CREATE TABLE purrr_metadata (
+            function_name TEXT PRIMARY KEY,
+            time_executed TIMESTAMP,
+            success BOOLEAN
+        )
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    cache = SQLiteCache(db_path)
+    cache.set_high_water_mark("get_runs[*]", datetime(2024, 1, 1, tzinfo=timezone.utc))
+
+    assert cache.get_high_water_mark("get_runs[*]") is not None
+
+
+def test_mark_complete(db_cache):
+    """Test that a key stays incomplete until marked, and logging keeps the flag."""
+    assert not db_cache.is_complete("get_logs[run]")
+
+    db_cache.mark_complete("get_logs[run]")
+    db_cache.log_execution("get_logs[run]", True)
+
+    assert db_cache.is_complete("get_logs[run]")
+
+
+def test_last_success_survives_failures(db_cache):
+    assert db_cache.get_last_success("get_runs") is None
+
+    with freeze_time("2024-01-01 12:00:00"):
+        db_cache.log_execution("get_runs", True)
+    with freeze_time("2024-01-01 12:05:00"):
+        db_cache.log_execution("get_runs", False)
+
+    assert db_cache.get_last_success("get_runs") == datetime(2024, 1, 1, 12, 0, 0)
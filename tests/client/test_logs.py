@@ -1,9 +1,11 @@
+import pendulum
 import pytest
 from prefect.client.schemas.objects import Log
 from uuid import UUID
 from pendulum import DateTime
 
 from purrr.client.logs import LogsCache
+from purrr.client.main import SQLiteCache
 
 
 @pytest.fixture
@@ -38,31 +40,20 @@ def test_upsert_new_log(logs_cache):
 
 
 def test_upsert_duplicate_log(logs_cache):
-    """Test that upserting a log with the same timestamp and run IDs replaces the existing log"""
+    """Test that upserting a log that's already cached leaves a single copy"""
     timestamp = DateTime.now()
     flow_run_id = UUID("12345678-1234-5678-1234-567812345678")
 
-    # Insert initial log
-    initial_log = Log(
+    log = Log(
         name="test_flow",
         level=20,
         message="Initial message",
         timestamp=timestamp,  # type: ignore
         flow_run_id=flow_run_id,
     )
-    logs_cache.upsert([initial_log])
-
-    # Insert updated log with same timestamp and flow_run_id
-    updated_log = Log(
-        name="test_flow",
-        level=30,  # WARNING level
-        message="Updated message",
-        timestamp=timestamp,  # type: ignore
-        flow_run_id=flow_run_id,
-    )
-    logs_cache.upsert([updated_log])
+    logs_cache.upsert([log])
+    logs_cache.upsert([log, log])
 
-    # Check that only one log exists and it's the updated one
     results = logs_cache.db.execute(
         """
         SELECT COUNT(*) as count,
@@ -75,8 +66,32 @@ def test_upsert_duplicate_log(logs_cache):
     ).fetchone()
 
     assert results[0] == 1  # Only one log should exist
-    assert results[1] == "Updated message"
-    assert results[2] == 30
+    assert results[1] == "Initial message"
+    assert results[2] == 20
+
+
+def test_upsert_distinct_logs_with_same_timestamp(logs_cache):
+    """Test that distinct log lines sharing a timestamp are all kept"""
+    timestamp = DateTime.now()
+    flow_run_id = UUID("12345678-1234-5678-1234-567812345678")
+
+    logs = [
+        Log(
+            name="test_flow",
+            level=20,
+            message=f"Message {i}",
+            timestamp=timestamp,  # type: ignore
+            flow_run_id=flow_run_id,
+        )
+        for i in range(3)
+    ]
+    logs_cache.upsert(logs)
+
+    assert [row["message"] for row in logs_cache.flow_run(flow_run_id)] == [
+        "Message 0",
+        "Message 1",
+        "Message 2",
+    ]
 
 
 def test_upsert_multiple_logs(logs_cache):
@@ -127,3 +142,135 @@ def test_upsert_log_without_run_ids(logs_cache):
     # Convert DuckDB datetime to pendulum datetime for comparison
     assert result[4] is None  # flow_run_id
     assert result[5] is None  # task_run_id
+
+
+def test_flow_run_returns_logs_in_order(logs_cache):
+    """Test reading a flow run's logs back in timestamp order"""
+    base_timestamp = DateTime.now()
+    flow_run_id = UUID("12345678-1234-5678-1234-567812345678")
+    logs = [
+        Log(
+            name="test_flow",
+            level=20,
+            message=f"Message {i}",
+            timestamp=base_timestamp.add(seconds=i),  # type: ignore
+            flow_run_id=flow_run_id,
+        )
+        for i in reversed(range(3))
+    ]
+    logs_cache.upsert(logs)
+
+    result = logs_cache.flow_run(flow_run_id)
+
+    assert [row["message"] for row in result] == [
+        "Message 0",
+        "Message 1",
+        "Message 2",
+    ]
+    assert result[0]["id"] == str(logs[-1].id)
+
+
+def test_task_run_returns_only_that_task(logs_cache):
+    """Test reading logs by task run ID"""
+    task_run_id = UUID("87654321-4321-8765-4321-876543210987")
+    logs = [
+        Log(
+            name="test_task",
+            level=20,
+            message="Task message",
+            timestamp=DateTime.now(),  # type: ignore
+            task_run_id=task_run_id,
+        ),
+        Log(
+            name="test_flow",
+            level=20,
+            message="Flow message",
+            timestamp=DateTime.now(),  # type: ignore
+        ),
+    ]
+    logs_cache.upsert(logs)
+
+    assert [row["message"] for row in logs_cache.task_run(task_run_id)] == [
+        "Task message"
+    ]
+
+
+@pytest.mark.parametrize("column", ["flow_run_id", "task_run_id"])
+def test_reads_use_index(logs_cache, column):
+    """Test that reading a run's logs is an index range scan, not a table scan"""
+    plan = logs_cache.db.execute(
+        f"EXPLAIN QUERY PLAN SELECT * FROM logs WHERE {column} = ? ORDER BY timestamp",
+        ["x"],
+    ).fetchall()
+    detail = " ".join(row[3] for row in plan)
+
+    assert f"USING INDEX ix_logs_{column}_timestamp" in detail
+    assert "TEMP B-TREE" not in detail
+
+
+def test_migrates_unkeyed_table(db):
+    """Test that a logs table from before logs had IDs is rebuilt"""
+    db.execute("""
+        CREATE TABLE logs (
+            name TEXT,
+            level INTEGER,
+            message TEXT,
+            timestamp TIMESTAMP,
+            flow_run_id TEXT DEFAULT NULL,
+            task_run_id TEXT DEFAULT NULL,
+            worker_id TEXT DEFAULT NULL
+        )
+    """)
+    db.execute("INSERT INTO logs (name, message) VALUES ('old', 'old')")
+    db.commit()
+
+    logs_cache = LogsCache(db)
+
+    columns = {row[1] for row in db.execute("PRAGMA table_info(logs)")}
+    assert "id" in columns
+    assert logs_cache.db.execute("SELECT COUNT(*) FROM logs").fetchone()[0] == 0
+
+
+def test_flow_run_reads_whole_second_timestamps_on_a_typed_connection():
+    # SQLiteCache parses declared types, and sqlite3's TIMESTAMP converter
+    # can't parse a whole second with an offset.
+    cache = SQLiteCache(":memory:")
+    flow_run_id = UUID("12345678-1234-5678-1234-567812345678")
+    cache.logs.upsert(
+        [
+            Log(
+                name="test_flow",
+                level=20,
+                message="on the second",
+                timestamp=pendulum.datetime(2024, 1, 1, 12, tz="UTC"),
+                flow_run_id=flow_run_id,
+            )
+        ]
+    )
+
+    (log,) = cache.logs.flow_run(flow_run_id)
+
+    assert log["message"] == "on the second"
+    assert log["timestamp"] == "2024-01-01 12:00:00+00:00"
+
+
+def test_flow_run_reads_on_after_a_cursor(logs_cache):
+    timestamp = DateTime.now()
+    flow_run_id = UUID("12345678-1234-5678-1234-567812345678")
+    logs_cache.upsert(
+        [
+            Log(
+                name="test_flow",
+                level=20,
+                message=f"Message {i}",
+                timestamp=timestamp,  # type: ignore
+                flow_run_id=flow_run_id,
+            )
+            for i in range(3)
+        ]
+    )
+    first = logs_cache.flow_run(flow_run_id)[0]
+
+    rest = logs_cache.flow_run(flow_run_id, (first["timestamp"], first["rowid"]))
+
+    assert [row["message"] for row in rest] == ["Message 1", "Message 2"]
@@ -0,0 +1,103 @@
+import asyncio
+import random
+
+import pytest
+
+from purrr.client.main import paginate
+
+
+class SlowEndpoint:
+    """An offset-paginated endpoint whose pages finish in random order."""
+
+    def __init__(self, total: int):
+        self.items = list(range(total))
+        self.offsets: list[int] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, offset: int, limit: int) -> list[int]:
+        self.offsets.append(offset)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(random.uniform(0, 0.01))
+            return self.items[offset : offset + limit]
+        finally:
+            self.in_flight -= 1
+
+
+async def collect(pages) -> list:
+    return [page async for page in pages]
+
+
+@pytest.mark.asyncio
+async def test_pages_are_yielded_in_order():
+    endpoint = SlowEndpoint(1050)
+
+    pages = await collect(paginate(endpoint, page_size=100, concurrency=4))
+
+    assert [item for page in pages for item in page] == endpoint.items
+    assert [len(page) for page in pages] == [100] * 10 + [50]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    endpoint = SlowEndpoint(2000)
+
+    await collect(paginate(endpoint, page_size=100, concurrency=3))
+
+    assert endpoint.max_in_flight == 3
+
+
+@pytest.mark.asyncio
+async def test_stops_at_first_short_page():
+    endpoint = SlowEndpoint(250)
+
+    pages = await collect(paginate(endpoint, page_size=100, concurrency=8))
+
+    assert [len(page) for page in pages] == [100, 100, 50]
+    # At most the window of 8 plus one refill per full page was requested.
+    assert max(endpoint.offsets) <= 900
+    assert endpoint.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_exact_multiple_of_page_size():
+    endpoint = SlowEndpoint(300)
+
+    pages = await collect(paginate(endpoint, page_size=100, concurrency=1))
+
+    assert [len(page) for page in pages] == [100, 100, 100]
+    assert endpoint.offsets == [0, 100, 200, 300]
+
+
+@pytest.mark.asyncio
+async def test_empty_listing():
+    endpoint = SlowEndpoint(0)
+
+    assert await collect(paginate(endpoint, page_size=100, concurrency=2)) == []
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_and_cancel_outstanding_pages():
+    endpoint = SlowEndpoint(1000)
+
+    async def failing(offset: int, limit: int) -> list[int]:
+        if offset == 200:
+            raise RuntimeError("boom")
+        return await endpoint(offset, limit)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await collect(paginate(failing, page_size=100, concurrency=4))
+
+    assert endpoint.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_single_short_page_costs_one_request():
+    endpoint = SlowEndpoint(20)
+
+    pages = await collect(paginate(endpoint, page_size=100, concurrency=4))
+
+    assert pages == [endpoint.items]
+    assert endpoint.offsets == [0]
@@ -0,0 +1,61 @@
+import pytest
+
+from purrr.client.policy import (
+    CacheEntries,
+    CacheEntry,
+    CachePolicy,
+    Decision,
+    EntityPolicy,
+)
+
+NOW = 1_000_000.0
+
+
+@pytest.fixture
+def policy():
+    return CachePolicy(
+        {"run": EntityPolicy(ttl=10, stale_ttl=20, negative_ttl=5)}, clock=lambda: NOW
+    )
+
+
+@pytest.mark.parametrize(
+    "entry, cached, immutable, decision",
+    [
+        (None, False, False, Decision.MISS),
+        # Cached before fetch times were recorded.
+        (None, True, False, Decision.MISS),
+        (None, True, True, Decision.HIT),
+        (CacheEntry(NOW - 1, False), True, False, Decision.HIT),
+        (CacheEntry(NOW - 15, False), True, False, Decision.STALE),
+        (CacheEntry(NOW - 31, False), True, False, Decision.MISS),
+        (CacheEntry(NOW - 3600, False), True, True, Decision.HIT),
+        (CacheEntry(NOW - 1, True), False, False, Decision.NEGATIVE),
+        (CacheEntry(NOW - 6, True), False, False, Decision.MISS),
+    ],
+)
+def test_decide(policy, entry, cached, immutable, decision):
+    assert policy.decide("run", entry, cached, immutable) is decision
+
+
+def test_decisions_are_counted(policy):
+    policy.decide("run", None, False)
+    policy.decide("run", CacheEntry(NOW, False), True)
+    policy.decide("run", CacheEntry(NOW, False), True)
+
+    assert policy.stats["run"] == {Decision.MISS: 1, Decision.HIT: 2}
+    assert policy.report() == "run: 1 miss, 2 hit"
+
+
+def test_entries_round_trip(db):
+    entries = CacheEntries(db)
+
+    entries.touch("run", ["a", "b"], now=NOW)
+    entries.touch("run", ["b"], missing=True, now=NOW + 1)
+
+    assert entries.read("run", "a") == CacheEntry(NOW, False)
+    assert entries.read("run", "b") == CacheEntry(NOW + 1, True)
+    assert entries.read("deployment", "a") is None
+    assert entries.read_many("run", ["a", "b", "c"]) == {
+        "a": CacheEntry(NOW, False),
+        "b": CacheEntry(NOW + 1, True),
+    }
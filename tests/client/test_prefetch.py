@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from purrr.client.prefetch import Prefetcher
+
+
+@pytest.mark.asyncio
+async def test_prefetcher_warms_in_order_with_bounded_concurrency():
+    warmed = []
+    running = 0
+    most_running = 0
+
+    async def warm(key: str) -> None:
+        nonlocal running, most_running
+        running += 1
+        most_running = max(most_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        warmed.append(key)
+
+    prefetcher = Prefetcher(warm, concurrency=2, budget=10)
+    prefetcher.schedule(["a", "b", "c", "d"])
+    await prefetcher.wait()
+
+    assert warmed == ["a", "b", "c", "d"]
+    assert most_running == 2
+    assert prefetcher.is_warm("a")
+
+    # Warm keys aren't warmed again.
+    prefetcher.schedule(["a", "e"])
+    await prefetcher.wait()
+    assert warmed == ["a", "b", "c", "d", "e"]
+
+
+@pytest.mark.asyncio
+async def test_prefetcher_cancels_keys_no_longer_wanted():
+    started = []
+
+    async def warm(key: str) -> None:
+        started.append(key)
+
+    prefetcher = Prefetcher(warm, concurrency=1, budget=10, delay=0.05)
+    prefetcher.schedule(["a", "b"])
+    await asyncio.sleep(0)
+    prefetcher.schedule(["c", "b"])
+    await prefetcher.wait()
+
+    assert sorted(started) == ["b", "c"]
+    assert not prefetcher.is_warm("a")
+
+
+@pytest.mark.asyncio
+async def test_prefetcher_forgets_past_its_budget():
+    async def warm(key: int) -> None:
+        if key == 99:
+            raise RuntimeError("API down")
+
+    prefetcher = Prefetcher(warm, concurrency=4, budget=3)
+    prefetcher.schedule(list(range(5)) + [99])
+    await prefetcher.wait()
+
+    assert [key for key in range(5) if prefetcher.is_warm(key)] == [2, 3, 4]
+    # A failed warm-up is tried again next time.
+    assert not prefetcher.is_warm(99)
@@ -1,9 +1,12 @@
 import pytest
-from datetime import datetime
-from uuid import UUID
+from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
 from prefect.client.schemas.objects import FlowRun
 
-from purrr.client.runs import RunsCache
+from purrr.client.filters import FilterError
+from purrr.client.main import SQLiteCache
+from purrr.client.runs import INDEXED_COLUMNS, SORTABLE_COLUMNS, RunsCache, order_sql
+from purrr.settings import settings
 
 
 @pytest.fixture
@@ -11,6 +14,12 @@ def runs_cache(db):
     return RunsCache(db)
 
 
+@pytest.fixture
+def typed_runs_cache():
+    """A runs cache on a connection that parses declared column types."""
+    return SQLiteCache(":memory:").runs
+
+
 @pytest.fixture
 def sample_flow_run():
     return FlowRun(
@@ -50,23 +59,178 @@ def test_upsert_flow_run(runs_cache, sample_flow_run):
     assert result[0][2] == sample_flow_run.name
 
 
-def test_filter_valid_query(runs_cache, sample_flow_run):
+def test_rows_valid_query(runs_cache, sample_flow_run):
     runs_cache.upsert([sample_flow_run])
-    filtered_runs = runs_cache.filter("state_name = 'Running'")
+    filtered_runs = runs_cache.rows("state_name = 'Running'")
     assert len(filtered_runs) == 1
-    assert filtered_runs[0].id == sample_flow_run.id
+    assert filtered_runs[0].id == str(sample_flow_run.id)
+    assert filtered_runs[0].work_pool_name == "default"
 
 
-def test_filter_invalid_query(runs_cache, sample_flow_run, caplog):
+def test_rows_invalid_query(runs_cache, sample_flow_run):
     runs_cache.upsert([sample_flow_run])
-    filtered_runs = runs_cache.filter("invalid query syntax")
-    assert len(filtered_runs) == 0
-    assert "SQLite error:" in caplog.text
+    with pytest.raises(FilterError, match="Unknown field 'invalid'"):
+        runs_cache.rows("invalid query syntax")
+
+
+@pytest.mark.parametrize("cache", ["runs_cache", "typed_runs_cache"])
+def test_rows_walk_every_match_once(cache, request):
+    runs_cache = request.getfixturevalue(cache)
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    runs = [
+        FlowRun(
+            id=uuid4(),
+            name=f"run-{i}",
+            flow_id=uuid4(),
+            # Pairs of runs share a created time, so windows split ties.
+            created=created + timedelta(minutes=i // 2),  # type: ignore
+            state_name="Failed" if i % 3 else "Completed",
+        )
+        for i in range(25)
+    ]
+    runs_cache.upsert(runs)
+
+    seen = []
+    while window := runs_cache.rows("state = Failed", offset=len(seen), limit=4):
+        seen.extend(window)
+
+    failed = [run for run in runs if run.state_name == "Failed"]
+    assert len(seen) == len(failed)
+    assert {run.id for run in seen} == {str(run.id) for run in failed}
+    assert [run.created for run in seen] == sorted(
+        (run.created for run in seen), reverse=True
+    )
+
+
+def test_rows_windows_match_one_read(runs_cache):
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    runs_cache.upsert(
+        [
+            FlowRun(
+                id=uuid4(),
+                name=f"run-{i}",
+                flow_id=uuid4(),
+                created=created + timedelta(minutes=i // 2),  # type: ignore
+                state_name="Failed" if i % 3 else "Completed",
+            )
+            for i in range(25)
+        ]
+    )
+
+    ordered = runs_cache.rows("state = Failed", limit=100)
+    windows = [runs_cache.rows("state = Failed", offset, 5) for offset in (0, 5, 10)]
+
+    assert runs_cache.count("state = Failed") == len(ordered) == 16
+    assert [row for window in windows for row in window] == ordered[:15]
+    assert runs_cache.rows("state = Failed", 15, 5) == ordered[15:]
+
+
+def test_rows_sort_by_time_across_offsets(runs_cache):
+    base = datetime(2024, 1, 1, 10, tzinfo=timezone.utc)
+    minus_two = timezone(timedelta(hours=-2))
+    runs = [
+        FlowRun(
+            id=uuid4(),
+            name=name,
+            flow_id=uuid4(),
+            created=base,  # type: ignore
+            updated=updated,  # type: ignore
+        )
+        for name, updated in [
+            # Later, but earlier on its own wall clock: 09:00-02:00 is 11:00Z.
+            ("later", (base + timedelta(hours=1)).astimezone(minus_two)),
+            ("earlier", base),
+            ("latest", (base + timedelta(hours=2)).astimezone(minus_two)),
+        ]
+    ]
+    runs_cache.upsert(runs)
+
+    ascending = runs_cache.rows(order_by="updated", limit=20)
+    descending = runs_cache.rows(order_by="updated", descending=True, limit=20)
+
+    assert [row.name for row in ascending] == ["earlier", "later", "latest"]
+    assert descending == ascending[::-1]
+    assert runs_cache.rows(order_by="updated", offset=1, limit=1) == ascending[1:2]
+    assert runs_cache.count("updated > 2024-01-01T10:30:00") == 2
+
+
+def test_old_timestamps_are_migrated_to_utc(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SQLiteCache(path)
+    cache.db.execute(
+        "INSERT INTO flow_runs (id, name, created, updated) VALUES (?, ?, ?, ?)",
+        ["run", "run", "2024-01-01 09:00:00-02:00", "2024-01-01 10:00:00"],
+    )
+    cache.db.execute("PRAGMA user_version = 0")
+    cache.db.commit()
+    cache.db.close()
+
+    migrated = SQLiteCache(path)
+
+    assert tuple(
+        migrated.db.execute(
+            "SELECT CAST(created AS TEXT), CAST(updated AS TEXT) FROM flow_runs"
+        ).fetchone()
+    ) == ("2024-01-01 11:00:00+00:00", "2024-01-01 10:00:00")
+    assert migrated.db.execute("PRAGMA user_version").fetchone()[0] >= 1
 
 
-def test_filter_no_results(runs_cache, sample_flow_run):
+def test_rows_rejects_unknown_sort_column(runs_cache):
+    with pytest.raises(ValueError, match="Can't sort"):
+        runs_cache.rows(order_by="raw_json; DROP TABLE flow_runs")
+
+
+@pytest.mark.parametrize("column", sorted(SORTABLE_COLUMNS))
+def test_sort_walks_index(runs_cache, column):
+    plan = runs_cache.explain(
+        f"SELECT id FROM flow_runs ORDER BY {order_sql(column, True)} LIMIT 50"
+    )
+
+    assert any(f"INDEX ix_flow_runs_{column}" in step for step in plan)
+    # Ties are broken by the index too, so nothing is sorted at read time.
+    assert not any("TEMP B-TREE" in step for step in plan)
+
+
+def test_old_single_column_indexes_are_replaced(db):
+    RunsCache(db)
+    db.execute("DROP INDEX ix_flow_runs_name")
+    db.execute("CREATE INDEX ix_flow_runs_name ON flow_runs (name)")
+
+    runs_cache = RunsCache(db)
+
+    columns = [row[2] for row in db.execute("PRAGMA index_info(ix_flow_runs_name)")]
+    assert columns == ["name", "id"]
+    assert "TEMP B-TREE" not in " ".join(
+        runs_cache.explain(f"SELECT id FROM flow_runs ORDER BY {order_sql('name')}")
+    )
+
+
+@pytest.mark.parametrize("column", INDEXED_COLUMNS)
+def test_filter_columns_use_index(runs_cache, column):
+    plan = runs_cache.explain(
+        f"SELECT raw_json FROM flow_runs WHERE {column} = ?", ["x"]
+    )
+
+    assert any(f"USING INDEX ix_flow_runs_{column}" in step for step in plan)
+
+
+def test_rows_log_plan_and_timing(runs_cache, sample_flow_run, caplog, monkeypatch):
+    monkeypatch.setattr(settings, "explain_queries", True)
+    runs_cache.upsert([sample_flow_run])
+
+    with caplog.at_level("INFO"):
+        runs_cache.rows("state_name = 'Running'")
+
+    assert (
+        "Query plan: SEARCH flow_runs USING INDEX ix_flow_runs_state_name"
+        in caplog.text
+    )
+    assert "Filter matched 1 runs" in caplog.text
+
+
+def test_rows_no_results(runs_cache, sample_flow_run):
     runs_cache.upsert([sample_flow_run])
-    filtered_runs = runs_cache.filter("state_name = 'Completed'")
+    filtered_runs = runs_cache.rows("state_name = 'Completed'")
     assert len(filtered_runs) == 0
 
 
@@ -81,3 +245,14 @@ def test_read_flow_run(runs_cache, sample_flow_run):
 def test_read_nonexistent_flow_run(runs_cache):
     result = runs_cache.read(UUID("00000000-0000-0000-0000-000000000000"))
     assert result is None
+
+
+def test_read_row(typed_runs_cache, sample_flow_run):
+    typed_runs_cache.upsert([sample_flow_run])
+
+    row = typed_runs_cache.read_row(sample_flow_run.id)
+
+    assert row.name == "test_flow"
+    assert row.state_name == "Running"
+    assert row.deployment_id == str(sample_flow_run.deployment_id)
+    assert typed_runs_cache.read_row(uuid4()) is None
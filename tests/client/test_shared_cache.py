@@ -0,0 +1,139 @@
+import multiprocessing
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pendulum
+
+from conftest import make_run
+from purrr.client.main import METADATA_COLUMNS, SQLiteCache
+from purrr.client.runs import INDEXED_COLUMNS
+
+PROCESSES = 4
+ROUNDS = 25
+RUNS_PER_ROUND = 20
+
+
+def hammer_cache(db_path: str, worker: int) -> int:
+    """Interleave writes and reads against a cache file another process shares."""
+    cache = SQLiteCache(db_path)
+    seen = 0
+    for round_ in range(ROUNDS):
+        cache.runs.upsert(
+            [make_run(f"worker-{worker}-{round_}") for _ in range(RUNS_PER_ROUND)]
+        )
+        cache.set_high_water_mark(f"worker-{worker}", pendulum.now("UTC"))
+        cache.log_execution("get_runs", True)
+        seen = max(seen, len(cache.runs.read_all()))
+    cache.db.close()
+    return seen
+
+
+def make_old_cache(db_path: str) -> None:
+    """Write a cache file the way versions before the migrations left it."""
+    db = sqlite3.connect(db_path)
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute(
+        "CREATE TABLE purrr_metadata "
+        "(function_name TEXT PRIMARY KEY, time_executed TIMESTAMP, success BOOLEAN)"
+    )
+    db.execute(
+        "CREATE TABLE flow_runs (raw_json JSON, id TEXT PRIMARY KEY, name TEXT, "
+        "created TIMESTAMP, updated TIMESTAMP, deployment_id TEXT, flow_id TEXT, "
+        "state_name TEXT, work_pool_name TEXT)"
+    )
+    for column in INDEXED_COLUMNS:
+        db.execute(f"CREATE INDEX ix_flow_runs_{column} ON flow_runs ({column})")
+    db.execute(
+        "CREATE TABLE logs (name TEXT, level INTEGER, message TEXT, "
+        "timestamp TIMESTAMP, flow_run_id TEXT, task_run_id TEXT, worker_id TEXT)"
+    )
+    db.execute(
+        "INSERT INTO flow_runs (id, name, created) VALUES (?, ?, ?)",
+        ["run", "run", "2024-01-01 09:00:00-02:00"],
+    )
+    db.commit()
+    db.close()
+
+
+def open_cache(db_path: str, barrier) -> int:
+    """Open the cache once every process is ready to, so they race."""
+    barrier.wait()
+    cache = SQLiteCache(db_path)
+    version = cache.db.execute("PRAGMA user_version").fetchone()[0]
+    cache.db.close()
+    return version
+
+
+def test_cache_uses_wal(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+
+    assert cache.db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert cache.db.execute("PRAGMA busy_timeout").fetchone()[0] > 0
+
+
+def test_processes_share_cache_file(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    # Create the tables before the workers race to.
+    SQLiteCache(db_path).db.close()
+
+    with ProcessPoolExecutor(
+        PROCESSES, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        seen = list(pool.map(hammer_cache, [db_path] * PROCESSES, range(PROCESSES)))
+
+    cache = SQLiteCache(db_path)
+    total = PROCESSES * ROUNDS * RUNS_PER_ROUND
+    assert len(cache.runs.read_all()) == total
+    # Every worker read a consistent snapshot that included its own writes.
+    assert all(ROUNDS * RUNS_PER_ROUND <= count <= total for count in seen)
+    for worker in range(PROCESSES):
+        assert cache.get_high_water_mark(f"worker-{worker}") is not None
+
+
+def test_processes_migrate_an_old_cache_once(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    make_old_cache(db_path)
+    context = multiprocessing.get_context("spawn")
+    # Hold the write lock while every process opens the file, so they all
+    # look at the old schema before any of them can change it.
+    holder = sqlite3.connect(db_path)
+    holder.execute("BEGIN IMMEDIATE")
+
+    with context.Manager() as manager, ProcessPoolExecutor(PROCESSES, context) as pool:
+        barrier = manager.Barrier(PROCESSES + 1)
+        opened = [pool.submit(open_cache, db_path, barrier) for _ in range(PROCESSES)]
+        barrier.wait()
+        time.sleep(1)
+        holder.commit()
+        versions = [future.result() for future in opened]
+
+    cache = SQLiteCache(db_path)
+    assert len(set(versions)) == 1 and versions[0] > 0
+    columns = {row[1] for row in cache.db.execute("PRAGMA table_info(purrr_metadata)")}
+    assert columns >= METADATA_COLUMNS.keys()
+    assert [
+        row[2] for row in cache.db.execute("PRAGMA index_info(ix_flow_runs_name)")
+    ] == [
+        "name",
+        "id",
+    ]
+    assert (
+        cache.db.execute("SELECT CAST(created AS TEXT) FROM flow_runs").fetchone()[0]
+        == "2024-01-01 11:00:00+00:00"
+    )
+
+
+def test_readers_leave_the_schema_alone(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+    cache.db.execute("DROP INDEX ix_flow_runs_name")
+    cache.db.commit()
+
+    cache.reader()
+
+    assert (
+        cache.db.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'ix_flow_runs_name'"
+        ).fetchone()
+        is None
+    )
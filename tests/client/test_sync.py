@@ -0,0 +1,179 @@
+import pendulum
+import pytest
+from prefect.client.schemas.filters import Operator
+from prefect.client.schemas.objects import StateType
+
+from conftest import make_run
+from purrr.client.runs import RunsCache
+from purrr.settings import settings
+
+
+@pytest.mark.asyncio
+async def test_first_call_does_full_sync(client, fake_prefect):
+    now = pendulum.now("UTC")
+    fake_prefect.flow_runs = [
+        make_run(f"run-{i}", StateType.COMPLETED, now.subtract(minutes=60 + i))
+        for i in range(450)
+    ]
+
+    runs = await client.get_runs()
+
+    assert len(runs) == 450
+    assert fake_prefect.calls[0][1]["flow_run_filter"] is None
+    assert client.cache.get_high_water_mark("get_runs[*]") == now.subtract(minutes=60)
+
+
+@pytest.mark.asyncio
+async def test_second_call_only_fetches_changes(client, fake_prefect):
+    now = pendulum.now("UTC")
+    running = make_run("running", StateType.RUNNING, now.subtract(minutes=90))
+    fake_prefect.flow_runs = [
+        make_run(f"old-{i}", StateType.COMPLETED, now.subtract(minutes=120 + i))
+        for i in range(300)
+    ] + [running]
+    await client.get_runs()
+    fake_prefect.calls.clear()
+
+    finished = running.model_copy(
+        update={
+            "state_type": StateType.COMPLETED,
+            "state_name": "Completed",
+            "updated": now,
+        }
+    )
+    new_run = make_run("new", StateType.RUNNING, now)
+    fake_prefect.flow_runs = fake_prefect.flow_runs[:-1] + [finished, new_run]
+
+    runs = await client.get_runs()
+
+    delta_filter = fake_prefect.calls[0][1]["flow_run_filter"]
+    assert delta_filter.operator == Operator.or_
+    assert delta_filter.id.any_ == [running.id]
+    assert all(
+        call[1]["flow_run_filter"] is delta_filter for call in fake_prefect.calls
+    )
+
+    assert len(runs) == 302
+    assert client.cache.runs.read(running.id).state_name == "Completed"
+    assert client.cache.runs.read(new_run.id) is not None
+    assert client.cache.get_high_water_mark("get_runs[*]") == now
+
+
+@pytest.mark.asyncio
+async def test_delta_respects_state_types(client, fake_prefect):
+    now = pendulum.now("UTC")
+    fake_prefect.flow_runs = [
+        make_run("failed", StateType.FAILED, now.subtract(minutes=30)),
+        make_run("completed", StateType.COMPLETED, now.subtract(minutes=20)),
+    ]
+    await client.get_runs(state_types=[StateType.FAILED])
+    fake_prefect.flow_runs.append(make_run("failed-2", StateType.FAILED, now))
+
+    runs = await client.get_runs(state_types=[StateType.FAILED])
+
+    assert sorted(run.name for run in runs) == ["failed", "failed-2"]
+
+
+@pytest.mark.asyncio
+async def test_empty_cache_falls_back_to_full_sync(client, fake_prefect):
+    now = pendulum.now("UTC")
+    fake_prefect.flow_runs = [
+        make_run("run", StateType.COMPLETED, now.subtract(minutes=10))
+    ]
+    await client.get_runs()
+    client.cache.db.execute("DELETE FROM flow_runs")
+    fake_prefect.calls.clear()
+
+    runs = await client.get_runs()
+
+    assert fake_prefect.calls[0][1]["flow_run_filter"] is None
+    assert len(runs) == 1
+
+
+@pytest.mark.asyncio
+async def test_full_refresh_ignores_high_water_mark(client, fake_prefect):
+    now = pendulum.now("UTC")
+    fake_prefect.flow_runs = [
+        make_run("run", StateType.COMPLETED, now.subtract(minutes=10))
+    ]
+    await client.get_runs()
+    fake_prefect.calls.clear()
+
+    await client.get_runs(full_refresh=True)
+
+    assert fake_prefect.calls[0][1]["flow_run_filter"] is None
+
+
+@pytest.mark.asyncio
+async def test_sync_runs_returns_only_changed_runs(client, fake_prefect, monkeypatch):
+    now = pendulum.now("UTC")
+    fake_prefect.flow_runs = [
+        make_run(f"old-{i}", StateType.COMPLETED, now.subtract(minutes=120 + i))
+        for i in range(20)
+    ]
+    await client.sync_runs()
+    fake_prefect.flow_runs.append(make_run("new", StateType.RUNNING, now))
+
+    def read_all(*args, **kwargs):
+        raise AssertionError("sync_runs parsed the whole cache")
+
+    monkeypatch.setattr(RunsCache, "read_all", read_all)
+    changed = await client.sync_runs()
+
+    # Only the delta, which overlaps the high-water mark by a minute.
+    assert "new" in {run.name for run in changed}
+    assert len(changed) < 20
+    assert client.cache.runs.count() == 21
+
+
+@pytest.mark.asyncio
+async def test_delta_rechecks_runs_that_just_finished(client, fake_prefect):
+    now = pendulum.now("UTC")
+    finished = make_run("finished", StateType.COMPLETED, now.subtract(minutes=90))
+    old = make_run("old", StateType.COMPLETED, now.subtract(minutes=120))
+    fake_prefect.flow_runs = [old, finished]
+    await client.get_runs()
+    fake_prefect.calls.clear()
+
+    await client.get_runs()
+
+    assert fake_prefect.calls[0][1]["flow_run_filter"].id.any_ == [finished.id]
+
+
+@pytest.mark.asyncio
+async def test_full_sync_runs_periodically_and_drops_deleted_runs(
+    client, fake_prefect, monkeypatch
+):
+    now = pendulum.now("UTC")
+    kept, deleted = (
+        make_run("kept", StateType.COMPLETED, now.subtract(minutes=30)),
+        make_run("deleted", StateType.FAILED, now.subtract(minutes=20)),
+    )
+    fake_prefect.flow_runs = [kept, deleted]
+    await client.sync_runs()
+    fake_prefect.flow_runs = [kept]
+
+    await client.sync_runs()
+    assert client.cache.runs.read(deleted.id) is not None
+
+    monkeypatch.setattr(settings, "runs_full_sync_interval", 0)
+    fake_prefect.calls.clear()
+    await client.sync_runs()
+
+    assert fake_prefect.calls[0][1]["flow_run_filter"] is None
+    assert client.cache.runs.read(deleted.id) is None
+    assert client.cache.runs.read(kept.id) is not None
+
+
+@pytest.mark.asyncio
+async def test_full_sync_of_some_state_types_keeps_other_runs(client, fake_prefect):
+    now = pendulum.now("UTC")
+    fake_prefect.flow_runs = [
+        make_run("failed", StateType.FAILED, now.subtract(minutes=30)),
+        make_run("completed", StateType.COMPLETED, now.subtract(minutes=20)),
+    ]
+    await client.get_runs()
+
+    await client.get_runs(state_types=[StateType.FAILED], full_refresh=True)
+
+    assert client.cache.runs.count() == 2
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import uuid
+
+import pendulum
+import pytest
+from prefect.client.schemas.objects import Flow, Log
+
+from conftest import make_run
+from purrr.client import CachingPrefectClient
+from purrr.settings import settings
+from purrr.sync import SyncLock, SyncLockHeld, Syncer, parse_args, run_syncer
+
+
+@pytest.fixture
+def client(fake_prefect, tmp_path):
+    # A cache file rather than the shared in-memory one: the sync lock sits
+    # next to it.
+    run = make_run()
+    fake_prefect.flow_runs = [run]
+    fake_prefect.flows = [Flow(id=run.flow_id, name="flow", updated=run.updated)]
+    fake_prefect.logs = [
+        Log(
+            name="flow",
+            level=20,
+            message="hello",
+            timestamp=run.created,
+            flow_run_id=run.id,
+        )
+    ]
+    return CachingPrefectClient(db_name=str(tmp_path / "cache.db"), client=fake_prefect)
+
+
+def test_lock_is_exclusive(tmp_path):
+    path = tmp_path / "cache.db.sync.lock"
+    with SyncLock(path):
+        assert path.read_text() == str(os.getpid())
+        with pytest.raises(SyncLockHeld, match=str(os.getpid())):
+            SyncLock(path).acquire()
+
+    # Released, so the next syncer can take it.
+    with SyncLock(path):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_sync_once_fills_the_cache(client, fake_prefect):
+    events = []
+
+    status = await run_syncer(client, once=True, emit=events.append)
+
+    assert status == 0
+    synced = {event["step"]: event["count"] for event in events if "step" in event}
+    assert synced == {"runs": 1, "deployments": 0, "flows": 1, "logs": 1}
+    assert [event["event"] for event in events][-2:] == ["cycle", "stopped"]
+    reopened = CachingPrefectClient(db_name=client.cache.db_path, client=fake_prefect)
+    assert len(reopened.cache.runs.read_all()) == 1
+    assert len(reopened.cache.flows.read_all()) == 1
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_second_syncer_exits(client):
+    events = []
+    with SyncLock.for_cache(client.cache.db_path):
+        status = await run_syncer(client, once=True, emit=events.append)
+
+    assert status == 1
+    assert [event["event"] for event in events] == ["locked"]
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_step_doesnt_stop_the_others(client, fake_prefect):
+    async def broken(*args, **kwargs):
+        raise RuntimeError("API down")
+
+    fake_prefect.read_deployments = broken
+    events = []
+
+    await Syncer(client, emit=events.append).sync_once()
+
+    failed = [event for event in events if event["event"] == "failed"]
+    assert [(event["step"], event["error"]) for event in failed] == [
+        ("deployments", "RuntimeError: API down")
+    ]
+    assert {event["step"] for event in events if event["event"] == "synced"} == {
+        "runs",
+        "flows",
+        "logs",
+    }
+    assert events[-1]["failed"] == 1
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_stop_ends_the_wait_between_syncs(client):
+    events = []
+    syncer = Syncer(client, interval=60, emit=events.append)
+    running = asyncio.ensure_future(syncer.run())
+    while syncer.cycles == 0:
+        await asyncio.sleep(0.01)
+
+    syncer.stop()
+    await asyncio.wait_for(running, 5)
+
+    assert syncer.cycles == 1
+    assert events[-1]["event"] == "stopped"
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_logs_sync_for_the_newest_changed_runs(client, fake_prefect, monkeypatch):
+    now = pendulum.now("UTC")
+    runs = [
+        make_run(f"run-{i}", created=now.subtract(minutes=i), updated=now)
+        for i in range(5)
+    ]
+    undated = runs[0].model_copy(update={"id": uuid.uuid4(), "created": None})
+    fake_prefect.flow_runs = [undated, *runs]
+    monkeypatch.setattr(settings, "sync_log_runs", 3)
+    synced = []
+
+    async def sync_logs(run_ids):
+        synced.extend(run_ids)
+        return 0
+
+    monkeypatch.setattr(client, "sync_logs", sync_logs)
+    events = []
+
+    await Syncer(client, emit=events.append).sync_once()
+
+    assert [event["step"] for event in events if event["event"] == "failed"] == []
+    assert synced == [run.id for run in runs[:3]]
+    assert {e["step"]: e["count"] for e in events if "step" in e}["runs"] == 6
+    client.close()
+
+
+def test_parse_args():
+    args = parse_args(["--interval", "5", "--once"])
+
+    assert (args.interval, args.once, args.db) == (5.0, True, None)
@@ -1,5 +1,22 @@
 import sqlite3
+import uuid
+from datetime import datetime
+
+import pendulum
 import pytest
+from prefect.client.schemas.filters import (
+    DeploymentFilter,
+    FlowFilter,
+    FlowRunFilter,
+    LogFilter,
+    Operator,
+)
+from prefect.client.schemas.objects import Flow, FlowRun, Log, StateType
+from prefect.client.schemas.responses import DeploymentResponse
+from prefect.client.schemas.sorting import DeploymentSort, FlowSort
+from prefect.exceptions import ObjectNotFound
+
+from purrr.client.main import CachingPrefectClient
 
 
 @pytest.fixture
@@ -7,3 +24,191 @@ def db():
     conn = sqlite3.connect(":memory:")
     conn.row_factory = sqlite3.Row
     return conn
+
+
+class FakePrefectClient:
+    """Stands in for ``PrefectClient``, serving objects from in-memory lists."""
+
+    default_limit = 200
+
+    def __init__(self):
+        self.flow_runs: list[FlowRun] = []
+        self.deployments: list[DeploymentResponse] = []
+        self.flows: list[Flow] = []
+        self.logs: list[Log] = []
+        self.calls: list[tuple[str, dict]] = []
+
+    def _page(self, items: list, offset: int, limit: int | None) -> list:
+        return items[offset : offset + (limit or self.default_limit)]
+
+    async def read_flow_runs(
+        self,
+        flow_run_filter: FlowRunFilter | None = None,
+        sort=None,
+        limit: int | None = None,
+        offset: int = 0,
+        **kwargs,
+    ) -> list[FlowRun]:
+        self.calls.append(("read_flow_runs", {"flow_run_filter": flow_run_filter}))
+        runs = [r for r in self.flow_runs if _matches(r, flow_run_filter)]
+        return self._page(runs, offset, limit)
+
+    async def read_flow_run(self, flow_run_id) -> FlowRun:
+        self.calls.append(("read_flow_run", {"flow_run_id": flow_run_id}))
+        for flow_run in self.flow_runs:
+            if flow_run.id == flow_run_id:
+                return flow_run
+        raise ObjectNotFound(http_exc=Exception(f"Flow run {flow_run_id} not found"))
+
+    async def read_deployment(self, deployment_id) -> DeploymentResponse:
+        self.calls.append(("read_deployment", {"deployment_id": deployment_id}))
+        for deployment in self.deployments:
+            if deployment.id == deployment_id:
+                return deployment
+        raise ObjectNotFound(
+            http_exc=Exception(f"Deployment {deployment_id} not found")
+        )
+
+    async def read_deployments(
+        self,
+        deployment_filter: DeploymentFilter | None = None,
+        sort=None,
+        limit: int | None = None,
+        offset: int = 0,
+        **kwargs,
+    ) -> list[DeploymentResponse]:
+        self.calls.append(
+            (
+                "read_deployments",
+                {
+                    "deployment_filter": deployment_filter,
+                    "sort": sort,
+                    "offset": offset,
+                },
+            )
+        )
+        deployments = self.deployments
+        if deployment_filter and deployment_filter.id:
+            deployments = [d for d in deployments if d.id in deployment_filter.id.any_]
+        if sort == DeploymentSort.UPDATED_DESC:
+            deployments = sorted(deployments, key=lambda d: d.updated, reverse=True)
+        elif sort == DeploymentSort.NAME_ASC:
+            deployments = sorted(deployments, key=lambda d: d.name)
+        return self._page(deployments, offset, limit)
+
+    async def read_flow(self, flow_id) -> Flow:
+        self.calls.append(("read_flow", {"flow_id": flow_id}))
+        for flow in self.flows:
+            if flow.id == flow_id:
+                return flow
+        raise ObjectNotFound(http_exc=Exception(f"Flow {flow_id} not found"))
+
+    async def read_flows(
+        self,
+        flow_filter: FlowFilter | None = None,
+        sort=None,
+        limit: int | None = None,
+        offset: int = 0,
+        **kwargs,
+    ) -> list[Flow]:
+        self.calls.append(
+            (
+                "read_flows",
+                {"flow_filter": flow_filter, "sort": sort, "offset": offset},
+            )
+        )
+        flows = self.flows
+        if flow_filter and flow_filter.id:
+            flows = [f for f in flows if f.id in flow_filter.id.any_]
+        if sort == FlowSort.UPDATED_DESC:
+            flows = sorted(flows, key=lambda f: f.updated, reverse=True)
+        elif sort == FlowSort.NAME_ASC:
+            flows = sorted(flows, key=lambda f: f.name)
+        return self._page(flows, offset, limit)
+
+    async def read_logs(
+        self,
+        log_filter: LogFilter | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        sort=None,
+    ) -> list[Log]:
+        self.calls.append(("read_logs", {"log_filter": log_filter}))
+        logs = sorted(self.logs, key=lambda log: log.timestamp)
+        if log_filter and log_filter.flow_run_id:
+            logs = [
+                log for log in logs if log.flow_run_id in log_filter.flow_run_id.any_
+            ]
+        if log_filter and log_filter.task_run_id:
+            logs = [
+                log for log in logs if log.task_run_id in log_filter.task_run_id.any_
+            ]
+        if log_filter and log_filter.timestamp and log_filter.timestamp.after_:
+            logs = [log for log in logs if log.timestamp >= log_filter.timestamp.after_]
+        return self._page(logs, offset or 0, limit)
+
+
+def _matches(flow_run: FlowRun, flow_run_filter: FlowRunFilter | None) -> bool:
+    if flow_run_filter is None:
+        return True
+
+    checks = []
+    if flow_run_filter.id and flow_run_filter.id.any_ is not None:
+        checks.append(flow_run.id in flow_run_filter.id.any_)
+    if flow_run_filter.state and flow_run_filter.state.type:
+        checks.append(flow_run.state_type in flow_run_filter.state.type.any_)
+    if flow_run_filter.start_time and flow_run_filter.start_time.after_:
+        checks.append(
+            flow_run.start_time is not None
+            and flow_run.start_time >= flow_run_filter.start_time.after_
+        )
+    if (
+        flow_run_filter.expected_start_time
+        and flow_run_filter.expected_start_time.after_
+    ):
+        checks.append(
+            flow_run.expected_start_time is not None
+            and flow_run.expected_start_time
+            >= flow_run_filter.expected_start_time.after_
+        )
+
+    if flow_run_filter.operator == Operator.or_:
+        return any(checks)
+    return all(checks)
+
+
+@pytest.fixture
+def fake_prefect():
+    return FakePrefectClient()
+
+
+@pytest.fixture
+def client(fake_prefect):
+    return CachingPrefectClient(db_name=":memory:", client=fake_prefect)
+
+
+def make_run(
+    name: str = "run",
+    state_type: StateType = StateType.COMPLETED,
+    created: datetime | None = None,
+    **fields,
+) -> FlowRun:
+    """A flow run created, updated and started at ``created``, now by default.
+
+    ``fields`` set anything else on the run, or override the defaults.
+    """
+    created = created or pendulum.now("UTC")
+    return FlowRun(
+        **{
+            "id": uuid.uuid4(),
+            "name": name,
+            "flow_id": uuid.uuid4(),
+            "created": created,
+            "updated": created,
+            "start_time": created,
+            "expected_start_time": created,
+            "state_type": state_type,
+            "state_name": state_type.value.title(),
+            **fields,
+        }
+    )